@@ -0,0 +1,110 @@
+"""
+Microbenchmark for building the message params of a turn as the history grows.
+
+Compares the previous approach (convert `system_content + summary_memory + memory` into new param dicts on
+every turn) with `OpenAIClient.message_to_params`, which keeps the converted list and only converts the
+messages appended since the previous turn.
+
+Usage:
+    python -m benchmarks.bench_message_params [--sizes 100 1000 5000 10000] [--turns 200]
+"""
+
+import argparse
+import os
+import time
+from typing import List
+
+from fellow.clients.OpenAIClient import (
+    OpenAIClient,
+    OpenAIClientConfig,
+    OpenAIClientMessage,
+)
+from fellow.clients.TokenHistory import TokenHistory
+
+
+def make_client(model: str) -> OpenAIClient:
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    return OpenAIClient(
+        OpenAIClientConfig(
+            system_content="You are a helpful assistant.",
+            memory_max_tokens=10**9,
+            summary_memory_max_tokens=10**9,
+            model=model,
+        )
+    )
+
+
+def make_turn(i: int) -> List[OpenAIClientMessage]:
+    return [
+        {"role": "assistant", "content": f"Let me look at file {i}.", "tokens": 12},
+        {
+            "role": "assistant",
+            "tool_calls": [
+                {
+                    "id": f"call_{i}",
+                    "type": "function",
+                    "function": {
+                        "name": "view_file",
+                        "arguments": f'{{"filepath": "file_{i}.py"}}',
+                    },
+                }
+            ],
+            "tokens": 20,
+        },
+        {
+            "role": "tool",
+            "tool_call_id": f"call_{i}",
+            "name": "view_file",
+            "content": f"def function_{i}():\n    return {i}\n",
+            "tokens": 15,
+        },
+    ]
+
+
+def baseline(client: OpenAIClient) -> None:
+    [
+        param
+        for message in client.system_content + client.summary_memory + client.memory
+        if (param := client._message_to_param(message)) is not None
+    ]
+
+
+def per_turn_overhead(client: OpenAIClient, history: int, turns: int, fn) -> float:
+    """
+    Fills the memory with `history` messages, then measures `turns` turns, each appending one tool turn
+    and building the params. Returns the mean time per turn in microseconds.
+    """
+    client.memory = TokenHistory()
+    for i in range(history // 3):
+        client.memory.extend(make_turn(i))
+    fn(client)
+    start = time.perf_counter()
+    for i in range(turns):
+        client.memory.extend(make_turn(history + i))
+        fn(client)
+    return (time.perf_counter() - start) / turns * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="gpt-3.5-turbo")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100, 1_000, 5_000, 10_000]
+    )
+    parser.add_argument("--turns", type=int, default=200)
+    args = parser.parse_args()
+
+    client = make_client(args.model)
+    print(
+        f"{'history':>8} {'before (µs/turn)':>18} {'after (µs/turn)':>17} {'speedup':>8}"
+    )
+    for size in args.sizes:
+        before = per_turn_overhead(client, size, args.turns, baseline)
+        after = per_turn_overhead(
+            client, size, args.turns, lambda c: c.message_to_params()
+        )
+        print(f"{size:>8} {before:>18.1f} {after:>17.1f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Benchmark for the `search_files` command on a synthetic repository.
+
+Generates a repository of `--files` source files (100k by default) in nested packages, plus the directories a
+real checkout has that nobody wants to search: `.git` objects, `node_modules`, a `.venv`, a `build/` directory
+listed in `.gitignore` and some binary files. Compares the previous implementation (`os.walk` over everything,
+each file decoded and lowercased line by line) with `search_files` (parallel walk that skips these, binary
+sniffing, byte-level matching in a thread pool).
+
+Usage:
+    python -m benchmarks.bench_search_files [--files 100000] [--repeat 3] [--directory /tmp/repo]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from typing import Callable, List
+
+from fellow.commands.search_files import SearchFilesInput, search_files
+
+WORDS = ["config", "parser", "client", "request", "value", "index", "result", "self"]
+
+
+def make_repository(root: str, files: int, seed: int = 0) -> None:
+    """
+    Writes `files` Python files of 20-60 lines into 100 files per package, and about 20% extra files into
+    `.git`, `node_modules`, `.venv` and `build` plus 1% binary files. A few files contain `TODO(fellow)`.
+    """
+    rng = random.Random(seed)
+
+    def source(lines: int) -> str:
+        return "".join(
+            f"    {rng.choice(WORDS)}_{i} = {rng.choice(WORDS)}({rng.randint(0, 999)})\n"
+            for i in range(lines)
+        )
+
+    def write(path: str, content: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    for i in range(files):
+        content = f"def function_{i}():\n" + source(rng.randint(20, 60))
+        if i % 997 == 0:
+            content += "    # TODO(fellow): remove this\n"
+        write(
+            os.path.join(root, f"pkg_{i // 10000}", f"mod_{i // 100}", f"f{i}.py"),
+            content,
+        )
+    for directory in (".git/objects", "node_modules/lib", ".venv/lib", "build"):
+        for i in range(files // 20):
+            write(
+                os.path.join(root, directory, f"d{i // 100}", f"f{i}.js"),
+                "// TODO(fellow)\n" + source(20),
+            )
+    for i in range(files // 100):
+        path = os.path.join(root, "assets", f"image_{i}.bin")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(b"\x89PNG\0" + rng.randbytes(4096))
+    write(os.path.join(root, ".gitignore"), "build/\n")
+
+
+def baseline_search(directory: str, search: str) -> List[str]:
+    """
+    The previous implementation of `search_files`.
+    """
+    base_dir = os.path.abspath(os.path.join(os.getcwd(), directory))
+    matches: List[str] = []
+    needle = search.lower()
+    for root, _, files in os.walk(base_dir):
+        for file in files:
+            path = os.path.join(root, file)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for i, line in enumerate(f, 1):
+                        if needle in line.lower():
+                            rel_path = os.path.relpath(path, start=os.getcwd())
+                            matches.append(f"{rel_path}:{i}: {line.strip()}")
+            except Exception as e:
+                matches.append(f"[ERROR] Could not read {path}: {e}")
+    return matches
+
+
+def best_of(repeat: int, fn: Callable[[], object]) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--directory", help="Reuse (or create) the repository in this directory"
+    )
+    args = parser.parse_args()
+
+    root = args.directory or tempfile.mkdtemp(prefix="fellow-bench-search-")
+    try:
+        if not os.path.isdir(os.path.join(root, "pkg_0")):
+            start = time.perf_counter()
+            make_repository(root, args.files)
+            print(
+                f"Generated {args.files} files in {root} in {time.perf_counter() - start:.1f}s"
+            )
+        os.chdir(root)
+
+        for search, regex in (("TODO(fellow)", False), (r"value_\d+ = index\(9", True)):
+            after = best_of(
+                args.repeat,
+                lambda: search_files(
+                    SearchFilesInput(
+                        directory=".",
+                        search=search,
+                        extension=None,
+                        regex=regex,
+                        case_sensitive=False,
+                        max_results=10**6,
+                    ),
+                    {},  # type: ignore[typeddict-item]
+                ),
+            )
+            if regex:
+                print(f"{search!r} (regex): {after:.2f}s")
+                continue
+            before = best_of(args.repeat, lambda: baseline_search(".", search))
+            print(
+                f"{search!r}: before {before:.2f}s, after {after:.2f}s, "
+                f"{before / after:.1f}x faster"
+            )
+    finally:
+        if not args.directory:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Microbenchmark for token counting of large `function` messages.
+
+Compares the previous approach (resolve the encoder and encode the full content for every message)
+with `TokenCounter` (encoder resolved once, LRU memoization by content hash, `encode_batch` for turns
+that add several messages).
+
+Usage:
+    python -m benchmarks.bench_token_counter [--model gpt-4o] [--messages 200] [--size 30000]
+"""
+
+import argparse
+import random
+import string
+import time
+from typing import Callable, List
+
+import tiktoken
+
+from fellow.clients.TokenCounter import TokenCounter
+
+
+def make_function_outputs(count: int, size: int, distinct: int) -> List[str]:
+    """
+    Builds `count` tool outputs of roughly `size` characters. Only `distinct` of them are unique, which
+    mimics an agent viewing the same files or rerunning the same tests several times.
+    """
+    rng = random.Random(42)
+    alphabet = string.ascii_letters + string.digits + "    \n(){}[]:.,_="
+    unique = ["".join(rng.choices(alphabet, k=size)) for _ in range(distinct)]
+    return [unique[i % distinct] for i in range(count)]
+
+
+def baseline(model: str, outputs: List[str]) -> None:
+    for output in outputs:
+        encoding = tiktoken.encoding_for_model(model)
+        4 + len(encoding.encode(output)) + 2
+
+
+def counter_single(model: str, outputs: List[str]) -> None:
+    counter = TokenCounter(model)
+    for output in outputs:
+        4 + counter.count(output) + 2
+
+
+def counter_batched(model: str, outputs: List[str], batch: int = 4) -> None:
+    counter = TokenCounter(model)
+    for i in range(0, len(outputs), batch):
+        counter.count_batch(outputs[i : i + batch])
+
+
+def measure(name: str, fn: Callable[[], None], count: int) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed
+    print(f"{name:<32} {elapsed * 1000:>10.1f} ms {rate:>12.1f} counts/s")
+    return rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="gpt-3.5-turbo")
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--size", type=int, default=30_000)
+    parser.add_argument("--distinct", type=int, default=50)
+    args = parser.parse_args()
+
+    outputs = make_function_outputs(args.messages, args.size, args.distinct)
+    encoding_for_warmup = tiktoken.encoding_for_model(args.model)
+    encoding_for_warmup.encode("warmup")
+
+    print(
+        f"model={args.model} messages={args.messages} size={args.size} "
+        f"distinct={args.distinct}"
+    )
+    before = measure(
+        "before (encode per message)",
+        lambda: baseline(args.model, outputs),
+        args.messages,
+    )
+    after = measure(
+        "after (TokenCounter.count)",
+        lambda: counter_single(args.model, outputs),
+        args.messages,
+    )
+    after_batched = measure(
+        "after (TokenCounter.count_batch)",
+        lambda: counter_batched(args.model, outputs),
+        args.messages,
+    )
+    print(
+        f"speedup: {after / before:.1f}x (single), {after_batched / before:.1f}x (batched)"
+    )
+
+
+if __name__ == "__main__":
+    main()
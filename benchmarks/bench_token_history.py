@@ -0,0 +1,74 @@
+"""
+Microbenchmark for the token limit checks and history splits of `OpenAIClient` as the history grows.
+
+Compares the previous approach (sum the token counts of `memory` and `summary_memory` on every turn and scan
+backwards for the split point) with `TokenHistory`, which keeps running prefix sums: the limit check is O(1)
+and the split point is found by binary search.
+
+Usage:
+    python -m benchmarks.bench_token_history [--sizes 100 1000 10000] [--turns 1000]
+"""
+
+import argparse
+import random
+import time
+from typing import Any, Callable, Dict, List
+
+from fellow.clients.TokenHistory import TokenHistory
+
+
+def make_messages(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [
+        {"role": "user", "content": "", "tokens": rng.randint(5, 500)}
+        for _ in range(count)
+    ]
+
+
+def baseline_turn(memory: List[Dict[str, Any]], token_limit: int) -> int:
+    over_limit = sum(message["tokens"] for message in memory) > token_limit
+    token_count = 0
+    for i in range(len(memory) - 1, -1, -1):
+        token_count += memory[i]["tokens"]
+        if token_count > token_limit // 2:
+            return i + 1 + over_limit
+    return over_limit
+
+
+def token_history_turn(memory: TokenHistory, token_limit: int) -> int:
+    over_limit = memory.tokens > token_limit
+    return memory.split_index(token_limit // 2) + over_limit
+
+
+def per_turn(memory: Any, turns: int, fn: Callable[[Any, int], int]) -> float:
+    """
+    Measures `turns` turns, each appending a message and checking the limit and split point of the whole
+    history. Returns the mean time per turn in microseconds.
+    """
+    token_limit = sum(message["tokens"] for message in memory)
+    new_messages = make_messages(turns, seed=1)
+    start = time.perf_counter()
+    for new_message in new_messages:
+        memory.append(new_message)
+        fn(memory, token_limit)
+    return (time.perf_counter() - start) / turns * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000])
+    parser.add_argument("--turns", type=int, default=1_000)
+    args = parser.parse_args()
+
+    print(
+        f"{'history':>8} {'before (µs/turn)':>18} {'after (µs/turn)':>17} {'speedup':>8}"
+    )
+    for size in args.sizes:
+        messages = make_messages(size)
+        before = per_turn(list(messages), args.turns, baseline_turn)
+        after = per_turn(TokenHistory(messages), args.turns, token_history_turn)
+        print(f"{size:>8} {before:>18.1f} {after:>17.1f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import json
 import os
 import re
 from pathlib import Path
@@ -21,7 +22,8 @@ def test_simple_hello_world_task(use_fixture, mock_openai_server, tmp_path):
         ]
     }
     result = run_command(
-        f'fellow --task "Write a hello world python script" --commands {json_to_command_line_string(commands)}'
+        f'fellow --task "Write a hello world python script" --memory.export true '
+        f"--commands {json_to_command_line_string(commands)}"
     )
     task_id = UUID(
         re.search(r"Starting task with id: ([0-9a-fA-F-]{36})", result).group(1)
@@ -32,8 +34,161 @@ def test_simple_hello_world_task(use_fixture, mock_openai_server, tmp_path):
     assert os.path.exists(Path(f".fellow/runs/{task_id.hex}/memory.json"))
     assert os.path.exists(Path(f".fellow/runs/{task_id.hex}/log.md"))
     assert os.path.exists(Path(f".fellow/runs/{task_id.hex}/metadata.json"))
+    with open(Path(f".fellow/runs/{task_id.hex}/metrics.jsonl")) as f:
+        metrics = [json.loads(line) for line in f]
+    assert metrics[-1]["type"] == "summary"
+    assert metrics[0]["type"] == "step"
+    assert metrics[0]["prompt_tokens"] > 0
+    assert "[INFO] HTTP 6 requests over 1 connections (5 reused)" in result
 
     assert os.path.exists(Path("hello_world.py"))
     with open(Path("hello_world.py")) as f:
         content = f.read()
     assert content == "print('Hello, World!')"
+
+
+def test_simple_hello_world_task_streaming(use_fixture, mock_openai_server, tmp_path):
+    use_fixture("e2e/fixtures/mock_openai_server.json")
+    os.chdir(tmp_path)
+
+    commands = {
+        command_name: {"policies": []}
+        for command_name in [
+            "create_file",
+            "view_file",
+            "edit_file",
+            "list_files",
+            "run_python",
+        ]
+    }
+    result = run_command(
+        f'fellow --task "Write a hello world python script" '
+        f"--commands {json_to_command_line_string(commands)} "
+        f"--ai_client.config {json_to_command_line_string({'stream': True})}"
+    )
+    assert "AI: The plan has been defined." in result
+    assert "hello_world.py" in result
+
+    assert os.path.exists(Path("hello_world.py"))
+    with open(Path("hello_world.py")) as f:
+        content = f.read()
+    assert content == "print('Hello, World!')"
+
+
+def test_parallel_tool_calls(use_fixture, mock_openai_server, tmp_path):
+    use_fixture("e2e/fixtures/parallel_tool_calls.json")
+    os.chdir(tmp_path)
+    Path("a.py").write_text("A = 1")
+    Path("b.py").write_text("B = 2")
+
+    commands = {"view_file": {"policies": []}}
+    result = run_command(
+        f'fellow --task "Explain a.py and b.py" --planning.active false --memory.export true '
+        f"--commands {json_to_command_line_string(commands)}"
+    )
+    task_id = UUID(
+        re.search(r"Starting task with id: ([0-9a-fA-F-]{36})", result).group(1)
+    )
+    assert 'AI: view_file {"filepath": "a.py"}' in result
+    assert 'AI: view_file {"filepath": "b.py"}' in result
+
+    with open(Path(f".fellow/runs/{task_id.hex}/memory.json")) as f:
+        memory = json.load(f)
+    tool_messages = [message for message in memory if message["role"] == "tool"]
+    assert [message["tool_call_id"] for message in tool_messages] == [
+        "call_a",
+        "call_b",
+    ]
+    assert [message["content"] for message in tool_messages] == ["A = 1", "B = 2"]
+
+
+def test_rate_limited_requests_are_retried(use_fixture, mock_openai_server, tmp_path):
+    use_fixture("e2e/fixtures/rate_limited.json")
+    os.chdir(tmp_path)
+
+    commands = {
+        command_name: {"policies": []}
+        for command_name in [
+            "create_file",
+            "view_file",
+            "edit_file",
+            "list_files",
+            "run_python",
+        ]
+    }
+    result = run_command(
+        f'fellow --task "Write a hello world python script" '
+        f"--commands {json_to_command_line_string(commands)} "
+        f"--ai_client.config {json_to_command_line_string({'retry_backoff': 0.01})}"
+    )
+    assert "[WARNING] Request failed (429), retrying in 0.0s (1/5)" in result
+    assert "[WARNING] Request failed (503), retrying in" in result
+
+    assert os.path.exists(Path("hello_world.py"))
+    with open(Path("hello_world.py")) as f:
+        content = f.read()
+    assert content == "print('Hello, World!')"
+
+
+def test_replay_client_runs_offline(tmp_path):
+    fixture = Path("e2e/fixtures/mock_openai_server.json").resolve()
+    os.chdir(tmp_path)
+
+    commands = {
+        command_name: {"policies": []}
+        for command_name in [
+            "create_file",
+            "view_file",
+            "edit_file",
+            "list_files",
+            "run_python",
+        ]
+    }
+    result = run_command(
+        f'fellow --task "Write a hello world python script" '
+        f"--commands {json_to_command_line_string(commands)} "
+        f"--ai_client.client replay "
+        f"--ai_client.config {json_to_command_line_string({'fixture': str(fixture), 'model': 'replay'})}"
+    )
+    assert "[INFO] Usage replay: 6 requests" in result
+
+    with open(Path("hello_world.py")) as f:
+        content = f.read()
+    assert content == "print('Hello, World!')"
+
+
+def test_resume_interrupted_task(use_fixture, mock_openai_server, tmp_path):
+    use_fixture("e2e/fixtures/mock_openai_server.json")
+    os.chdir(tmp_path)
+
+    commands = {
+        command_name: {"policies": []}
+        for command_name in [
+            "create_file",
+            "view_file",
+            "edit_file",
+            "list_files",
+            "run_python",
+        ]
+    }
+    result = run_command(
+        f'fellow --task "Write a hello world python script" --steps_limit 2 '
+        f"--commands {json_to_command_line_string(commands)}"
+    )
+    task_id = UUID(
+        re.search(r"Starting task with id: ([0-9a-fA-F-]{36})", result).group(1)
+    )
+    assert not os.path.exists(Path("hello_world.py"))
+
+    result = run_command(
+        f"fellow --resume --task_id {task_id} "
+        f"--commands {json_to_command_line_string(commands)}"
+    )
+    assert f"[INFO] Resuming task {task_id} at step 2" in result
+    assert "[INFO] HTTP 4 requests" in result
+    with open(Path("hello_world.py")) as f:
+        content = f.read()
+    assert content == "print('Hello, World!')"
+
+    result = run_command(f"fellow --resume --task_id {task_id}")
+    assert f"[INFO] Task {task_id} is already finished." in result
@@ -1,13 +1,74 @@
 import json
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
+from typing import List, Optional
 
 FIXTURE_PATH = (
     Path(__file__).parent.parent.parent / "e2e" / "fixtures" / "current_fixture.json"
 )
+STREAM_CHUNK_SIZE = 8
+
+
+def to_stream_chunks(response: dict, include_usage: bool) -> List[dict]:
+    """
+    Splits a recorded chat completion into the chunks the API would send when streaming.
+    """
+    choice = response["choices"][0]
+    message = choice["message"]
+    base = {
+        "id": response["id"],
+        "object": "chat.completion.chunk",
+        "created": response["created"],
+        "model": response["model"],
+    }
+
+    def chunk(delta: dict, finish_reason: Optional[str] = None) -> dict:
+        return {
+            **base,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+
+    def pieces(text: str) -> List[str]:
+        return [
+            text[i : i + STREAM_CHUNK_SIZE]
+            for i in range(0, len(text), STREAM_CHUNK_SIZE)
+        ]
+
+    chunks = [chunk({"role": "assistant", "content": ""})]
+    for piece in pieces(message.get("content") or ""):
+        chunks.append(chunk({"content": piece}))
+    for index, tool_call in enumerate(message.get("tool_calls") or []):
+        function = tool_call["function"]
+        chunks.append(
+            chunk(
+                {
+                    "tool_calls": [
+                        {
+                            "index": index,
+                            "id": tool_call["id"],
+                            "type": "function",
+                            "function": {"name": function["name"], "arguments": ""},
+                        }
+                    ]
+                }
+            )
+        )
+        for piece in pieces(function["arguments"]):
+            chunks.append(
+                chunk(
+                    {"tool_calls": [{"index": index, "function": {"arguments": piece}}]}
+                )
+            )
+    chunks.append(chunk({}, choice["finish_reason"]))
+    if include_usage and response.get("usage"):
+        chunks.append({**base, "choices": [], "usage": response["usage"]})
+    return chunks
 
 
 class MockOpenAIHandler(BaseHTTPRequestHandler):
+    # keep connections alive like the real API, so clients can reuse them
+    protocol_version = "HTTP/1.1"
+
     # Shared state across requests
     response_index = 0
     cached_responses = None
@@ -22,6 +83,9 @@ class MockOpenAIHandler(BaseHTTPRequestHandler):
             return None
 
     def do_POST(self):
+        # always consume the body, otherwise it would be read as the next request on a kept-alive connection
+        content_length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(content_length)
         if self.path == "/v1/chat/completions":
             if MockOpenAIHandler.cached_responses is None:
                 MockOpenAIHandler.cached_responses = self._load_fixture()
@@ -29,15 +93,25 @@ class MockOpenAIHandler(BaseHTTPRequestHandler):
             responses = MockOpenAIHandler.cached_responses
 
             if not responses or MockOpenAIHandler.response_index >= len(responses):
+                message = b"No more mock responses available."
                 self.send_response(500)
+                self.send_header("Content-Length", str(len(message)))
                 self.end_headers()
-                self.wfile.write(b"No more mock responses available.")
+                self.wfile.write(message)
                 return
 
             response = responses[MockOpenAIHandler.response_index]
-            response_body = json.dumps(response).encode()
             MockOpenAIHandler.response_index += 1
 
+            request = json.loads(body or b"{}")
+            if "error_status" in response:
+                self._send_error(response)
+                return
+            if request.get("stream"):
+                self._send_stream(response, request)
+                return
+
+            response_body = json.dumps(response).encode()
             self.send_response(200)
             self.send_header("Content-Type", "application/json")
             self.send_header("Content-Length", str(len(response_body)))
@@ -46,8 +120,39 @@ class MockOpenAIHandler(BaseHTTPRequestHandler):
             self.wfile.flush()
         else:
             self.send_response(404)
+            self.send_header("Content-Length", "0")
             self.end_headers()
 
+    def _send_error(self, response: dict):
+        """
+        Answers with an API error instead of a completion, e.g. a rate limit:
+        {"error_status": 429, "retry_after": "1", "error": {"message": "...", "code": "rate_limit_exceeded"}}
+        """
+        response_body = json.dumps({"error": response.get("error", {})}).encode()
+        self.send_response(response["error_status"])
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response_body)))
+        if "retry_after" in response:
+            self.send_header("Retry-After", str(response["retry_after"]))
+        self.end_headers()
+        self.wfile.write(response_body)
+        self.wfile.flush()
+
+    def _send_stream(self, response: dict, request: dict):
+        include_usage = (request.get("stream_options") or {}).get("include_usage")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        # the stream has no length, its end is signalled by closing the connection
+        self.send_header("Connection", "close")
+        self.close_connection = True
+        self.end_headers()
+        for chunk in to_stream_chunks(response, bool(include_usage)):
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
     def do_GET(self):
         if self.path == "/ping":
             response = b"pong"
@@ -59,11 +164,13 @@ class MockOpenAIHandler(BaseHTTPRequestHandler):
             self.wfile.flush()
         else:
             self.send_response(404)
+            self.send_header("Content-Length", "0")
             self.end_headers()
 
 
 if __name__ == "__main__":
     port = 8000
-    server = HTTPServer(("localhost", port), MockOpenAIHandler)
+    # threaded, so a kept-alive connection does not block other connections
+    server = ThreadingHTTPServer(("localhost", port), MockOpenAIHandler)
     print(f"Mock server running at http://localhost:{port}")
     server.serve_forever()
@@ -1,5 +1,7 @@
+import asyncio
 from typing import (
     TYPE_CHECKING,
+    Any,
     Dict,
     List,
     Optional,
@@ -11,12 +13,72 @@ from typing import (
 )
 
 from openai import BaseModel
-from typing_extensions import Required, Self
+from typing_extensions import NotRequired, Required, Self
 
 if TYPE_CHECKING:  # pragma: no cover
     from fellow.commands.Command import Command  # pragma: no cover
 
 
+class ChatUsage(TypedDict, total=False):
+    model: str
+    """
+    The model that answered the request.
+    """
+
+    latency: float
+    """
+    Wall time of the request in seconds.
+    """
+
+    time_to_first_token: Optional[float]
+    """
+    Seconds until the first streamed token arrived, if the response was streamed.
+    """
+
+    prompt_tokens: int
+    """
+    Number of prompt tokens reported by the provider.
+    """
+
+    estimated_prompt_tokens: int
+    """
+    Number of prompt tokens the client estimated for the request, to validate its token accounting against
+    `prompt_tokens`.
+    """
+
+    completion_tokens: int
+    """
+    Number of completion tokens reported by the provider.
+    """
+
+    cached_tokens: int
+    """
+    Number of prompt tokens the provider served from its prompt cache.
+    """
+
+    cache_hit: bool
+    """
+    True if the response was served from the client's response cache instead of the provider.
+    """
+
+
+class ToolCall(TypedDict):
+    id: Optional[str]
+    """
+    The identifier the model assigned to this call, if the provider uses one.
+    """
+
+    name: str
+    """
+    The name of the function the assistant wants to call.
+    """
+
+    arguments: str
+    """
+    The arguments for the function call as JSON string.
+    """
+
+
 class ChatResult(TypedDict):
     message: Optional[str]
     """
@@ -33,6 +95,22 @@ class ChatResult(TypedDict):
     The arguments for the function call (as JSON/dict), if any.
     """
 
+    function_calls: NotRequired[List[ToolCall]]
+    """
+    All function calls of this turn, for clients that support several calls per turn.
+    `function_name` and `function_args` describe the first of them.
+    """
+
+    streamed: NotRequired[bool]
+    """
+    True if the message was already printed while it was streamed.
+    """
+
+    usage: NotRequired[ChatUsage]
+    """
+    Latency and token usage of the request, if the client reports it.
+    """
+
 
 class FunctionResult(TypedDict):
     name: Required[str]
@@ -45,6 +123,16 @@ class FunctionResult(TypedDict):
     The return value of the function as a string.
     """
 
+    call_id: NotRequired[Optional[str]]
+    """
+    The id of the tool call this result answers, if the client reported one.
+    """
+
+    wall_time: NotRequired[float]
+    """
+    Wall time of the command in seconds.
+    """
+
 
 class Function(TypedDict, total=False):
     name: Required[str]
@@ -100,6 +188,7 @@ class Client(Protocol[T]):
         functions: List[Function],
         message: str = "",
         function_result: Optional[FunctionResult] = None,
+        function_results: Optional[List[FunctionResult]] = None,
     ) -> ChatResult:
         """
         Sends a message to the AI and optionally provides function results.
@@ -108,11 +197,43 @@ class Client(Protocol[T]):
         :param functions: List of function schemas for the model to call.
         :param message: User input message.
         :param function_result: Function result of previous function call, if any.
+        :param function_results: Results of all function calls of the previous turn, only passed to clients
+            that returned `function_calls`.
 
         :return: ChatResult containing the assistant's response, function name, and arguments.
         """
         ...  # pragma: no cover
 
+    async def achat(
+        self,
+        functions: List[Function],
+        message: str = "",
+        function_result: Optional[FunctionResult] = None,
+        function_results: Optional[List[FunctionResult]] = None,
+    ) -> ChatResult:
+        """
+        Async variant of `chat` with the same arguments, memory handling and result. Lets one event loop
+        drive many agent sessions at once. By default `chat` runs in a worker thread; clients with a native
+        async API override this. `function_results` is only passed to `chat` if set, so custom clients that
+        predate it keep working.
+
+        :param functions: List of function schemas for the model to call.
+        :param message: User input message.
+        :param function_result: Function result of previous function call, if any.
+        :param function_results: Results of all function calls of the previous turn, only passed to clients
+            that returned `function_calls`.
+
+        :return: ChatResult containing the assistant's response, function name, and arguments.
+        """
+        kwargs: Dict[str, Any] = (
+            {"function_results": function_results}
+            if function_results is not None
+            else {"function_result": function_result}
+        )
+        return await asyncio.to_thread(
+            self.chat, functions=functions, message=message, **kwargs
+        )
+
     def store_memory(self, filename: str) -> None:
         """
         Writes the entire interaction history to a file.
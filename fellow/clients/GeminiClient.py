@@ -1,69 +1,587 @@
+import asyncio
+import itertools
 import json
 import os
-from typing import TYPE_CHECKING, List, Optional, Union
+import time
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 # todo: todo: follow: https://github.com/googleapis/python-genai/issues/61
 from google import genai  # type: ignore
 from google.genai import types  # type: ignore
+from google.genai.chats import AsyncChat  # type: ignore
 from google.genai.types import Part  # type: ignore
 from typing_extensions import Self
 
 from fellow.clients.Client import (
     ChatResult,
+    ChatUsage,
     Client,
     ClientConfig,
     Function,
     FunctionResult,
+    ToolCall,
 )
+from fellow.clients.HttpPool import HttpPool, HttpPoolConfig
+from fellow.clients.RequestScheduler import RequestScheduler
+from fellow.clients.UsageTracker import UsageTracker
 
 if TYPE_CHECKING:  # pragma: no cover
     from fellow.commands.Command import Command  # pragma: no cover
 
 
+class _StreamAccumulator:
+    """
+    Assembles the chunks of a streamed response (text and function calls) into a regular
+    GenerateContentResponse and prints the text as it arrives. Used for sync and async streams alike.
+    """
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.time_to_first_token: Optional[float] = None
+        self.text_parts: List[str] = []
+        self.function_calls: List[types.FunctionCall] = []
+        self.usage_metadata: Optional[types.GenerateContentResponseUsageMetadata] = None
+
+    def add(self, chunk: types.GenerateContentResponse) -> None:
+        """
+        Adds one chunk of the stream.
+
+        :param chunk: The streamed chunk.
+        """
+        if chunk.usage_metadata:
+            self.usage_metadata = chunk.usage_metadata
+        content = chunk.candidates[0].content if chunk.candidates else None
+        for part in (content.parts if content else None) or []:
+            if self.time_to_first_token is None and (part.text or part.function_call):
+                self.time_to_first_token = time.perf_counter() - self.start
+            if part.text and not part.thought:
+                if not self.text_parts:
+                    print("AI: ", end="", flush=True)
+                print(part.text, end="", flush=True)
+                self.text_parts.append(part.text)
+            if part.function_call:
+                self.function_calls.append(part.function_call)
+
+    def response(self) -> types.GenerateContentResponse:
+        """
+        Finishes the printed text and returns the assembled response.
+
+        :return: The response as if it had been requested without streaming.
+        """
+        if self.text_parts:
+            print()
+        parts = [Part(text="".join(self.text_parts))] if self.text_parts else []
+        parts += [
+            Part(function_call=function_call) for function_call in self.function_calls
+        ]
+        return types.GenerateContentResponse(
+            candidates=[
+                types.Candidate(content=types.Content(role="model", parts=parts))
+            ],
+            usage_metadata=self.usage_metadata,
+        )
+
+
 class GeminiClientConfig(ClientConfig):
     system_content: str
     model: str  # = "gemini-1.5-flash"
+    stream: bool = False
+    """
+    Stream responses with `send_message_stream`, print the text as it arrives and record the time to first
+    token.
+    """
+    memory_max_tokens: Optional[int] = None
+    """
+    Token limit of the chat history (counted with Gemini's token counting). Once it is exceeded, the older
+    part of the history beyond half the limit is summarized and the chat is rebuilt from the summary and the
+    recent history. Unlimited if not set.
+    """
+    summary_memory_max_tokens: Optional[int] = None
+    """
+    Token limit of the accumulated summaries. Once it is exceeded, the older summaries are summarized again.
+    Unlimited if not set.
+    """
+    summary_model: Optional[str] = None
+    """
+    Model used for history summaries and the `summarize_file` command. Defaults to `model`.
+    """
+    summary_max_output_tokens: Optional[int] = None
+    """
+    Upper bound for the tokens of a single summary. Unbounded if not set.
+    """
+    requests_per_minute: Optional[int] = None
+    """
+    Requests per minute allowed per model, shared by all clients in the process. Unlimited if not set.
+    """
+    tokens_per_minute: Optional[int] = None
+    """
+    Prompt tokens per minute allowed per model (estimated as 4 characters per token). Unlimited if not set.
+    """
+    max_retries: int = 5
+    """
+    Retries of a request failing with a rate limit (429), server (5xx) or connection error.
+    """
+    retry_backoff: float = 1.0
+    """
+    Backoff of the first retry in seconds, doubled (with jitter) on every further retry.
+    """
+    retry_backoff_max: float = 60.0
+    """
+    Upper bound of a single retry delay in seconds.
+    """
+    http: HttpPoolConfig = HttpPoolConfig()
+    """
+    Connection pool (keep-alive, pool size, HTTP/2) and timeouts of the HTTP transport shared per process.
+    """
 
 
 class GeminiClient(Client[GeminiClientConfig]):
     config_class = GeminiClientConfig
 
-    # todo: implement summarization for token optimization
     def __init__(self, config: GeminiClientConfig):
         if os.environ.get("GEMINI_API_KEY") is None:
             raise ValueError("[ERROR] GEMINI_API_KEY environment variable is not set.")
-        self.client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+        self.model = config.model
+        self.summary_model = config.summary_model or config.model
+        self.summary_max_output_tokens = config.summary_max_output_tokens
+        self.stream = config.stream
+        self.memory_max_tokens = config.memory_max_tokens
+        self.summary_memory_max_tokens = config.summary_memory_max_tokens
+        self.usage = UsageTracker()
+        self.scheduler = self._scheduler_for(self.model, config)
+        self.summary_scheduler = self._scheduler_for(self.summary_model, config)
+        self.http_pool = HttpPool.for_config(config.http)
+        self.client = genai.Client(
+            api_key=os.getenv("GEMINI_API_KEY"),
+            http_options=types.HttpOptions(
+                client_args=self.http_pool.client_args(),
+                async_client_args=self.http_pool.async_client_args(),
+            ),
+        )
         self.client_chat = self.client.chats.create(model=config.model)
+        # summaries of the history that was compacted away, with their token counts
+        self.summary_memory: List[Tuple[str, int]] = []
+        # token counts of the curated history after the summary content, counted lazily
+        self._history_tokens: List[int] = []
+        # prompt plus output tokens of the last response in the current chat session, if reported
+        self._context_tokens: Optional[int] = None
 
     @classmethod
     def create(cls, config: GeminiClientConfig) -> Self:
         return cls(config)
 
+    @staticmethod
+    def _scheduler_for(model: str, config: GeminiClientConfig) -> RequestScheduler:
+        return RequestScheduler.for_key(
+            f"gemini:{model}",
+            requests_per_minute=config.requests_per_minute,
+            tokens_per_minute=config.tokens_per_minute,
+            max_retries=config.max_retries,
+            backoff_base=config.retry_backoff,
+            backoff_max=config.retry_backoff_max,
+        )
+
     def chat(
         self,
         functions: List[Function],
         message: str = "",
         function_result: Optional[FunctionResult] = None,
+        function_results: Optional[List[FunctionResult]] = None,
+    ) -> ChatResult:
+        msg, config = self._prepare_request(
+            functions, message, function_result, function_results
+        )
+        start = time.perf_counter()
+        time_to_first_token: Optional[float] = None
+        if self.stream:
+            accumulator = _StreamAccumulator()
+            stream = self.scheduler.call(
+                lambda: self._open_stream(msg, config), self._prompt_tokens(msg)
+            )
+            for chunk in stream:
+                accumulator.add(chunk)
+            response = accumulator.response()
+            time_to_first_token = accumulator.time_to_first_token
+        else:
+            response = self.scheduler.call(
+                lambda: self.client_chat.send_message(message=msg, config=config),
+                self._prompt_tokens(msg),
+            )
+        latency = time.perf_counter() - start
+        self._record_usage(self.model, latency, response)
+        self._maybe_summarize_history(response)
+        return self._handle_response(response, latency, time_to_first_token)
+
+    async def achat(
+        self,
+        functions: List[Function],
+        message: str = "",
+        function_result: Optional[FunctionResult] = None,
+        function_results: Optional[List[FunctionResult]] = None,
     ) -> ChatResult:
+        """
+        Async variant of `chat`. The request is awaited via `client.aio`, the sync chat stays the single
+        source of the history: the async chat starts from its curated history and the new turn is
+        recorded back into it.
+        """
+        msg, config = self._prepare_request(
+            functions, message, function_result, function_results
+        )
+        history = self.client_chat.get_history(curated=True)
+        async_chat = self.client.aio.chats.create(model=self.model, history=history)
+        start = time.perf_counter()
+        time_to_first_token: Optional[float] = None
+        if self.stream:
+            accumulator = _StreamAccumulator()
+            stream = await self.scheduler.acall(
+                lambda: self._aopen_stream(async_chat, msg, config),
+                self._prompt_tokens(msg),
+            )
+            async for chunk in stream:
+                accumulator.add(chunk)
+            response = accumulator.response()
+            time_to_first_token = accumulator.time_to_first_token
+        else:
+            response = await self.scheduler.acall(
+                lambda: async_chat.send_message(message=msg, config=config),
+                self._prompt_tokens(msg),
+            )
+        latency = time.perf_counter() - start
+        self._record_usage(self.model, latency, response)
+        new_contents = async_chat.get_history()[len(history) :]
+        if new_contents:
+            self.client_chat.record_history(
+                user_input=new_contents[0],
+                model_output=new_contents[1:],
+                automatic_function_calling_history=[],
+                is_valid=len(async_chat.get_history(curated=True)) > len(history),
+            )
+        await asyncio.to_thread(self._maybe_summarize_history, response)
+        return self._handle_response(response, latency, time_to_first_token)
+
+    def _open_stream(
+        self, msg: Union[Part, List[Part], str], config: types.GenerateContentConfig
+    ) -> Iterator[types.GenerateContentResponse]:
+        """
+        Starts a streamed request. The request is only sent once the stream is iterated, so the first chunk
+        is awaited here; errors of the request itself are raised (and retried by the scheduler) before any
+        text is printed.
+
+        :return: An iterator over all chunks, including the first.
+        """
+        stream = self.client_chat.send_message_stream(message=msg, config=config)
+        first_chunk = next(stream, None)
+        return itertools.chain([first_chunk] if first_chunk else [], stream)
+
+    @staticmethod
+    async def _aopen_stream(
+        chat: AsyncChat,
+        msg: Union[Part, List[Part], str],
+        config: types.GenerateContentConfig,
+    ) -> AsyncIterator[types.GenerateContentResponse]:
+        """
+        Async variant of `_open_stream`.
+        """
+        stream = await chat.send_message_stream(message=msg, config=config)
+        try:
+            first_chunk: Optional[types.GenerateContentResponse] = await anext(stream)
+        except StopAsyncIteration:
+            first_chunk = None
+
+        async def chunks() -> AsyncIterator[types.GenerateContentResponse]:
+            if first_chunk:
+                yield first_chunk
+            async for chunk in stream:
+                yield chunk
+
+        return chunks()
+
+    def summarize(self, content: str, instruction: str) -> str:
+        """
+        Summarizes `content` in a one-shot request with `summary_model`, limited to
+        `summary_max_output_tokens`. The request does not touch the chat history.
+
+        :param content: The text to summarize.
+        :param instruction: The system instruction describing what to summarize.
+        :return: Summary string generated by the model.
+        """
+        start = time.perf_counter()
+        response = self.summary_scheduler.call(
+            lambda: self.client.models.generate_content(
+                model=self.summary_model,
+                contents=content,
+                config=types.GenerateContentConfig(
+                    system_instruction=instruction,
+                    max_output_tokens=self.summary_max_output_tokens,
+                ),
+            ),
+            (len(instruction) + len(content)) // 4,
+        )
+        self._record_usage(self.summary_model, time.perf_counter() - start, response)
+        return response.text or ""
+
+    def _maybe_summarize_history(
+        self, response: Optional[types.GenerateContentResponse] = None
+    ) -> None:
+        """
+        Keeps the chat history within `memory_max_tokens` and the summaries within
+        `summary_memory_max_tokens`.
+
+        The token counts of the new contents are taken from the usage metadata of `response` where
+        possible (see `_count_history_tokens`), so a turn usually needs no `count_tokens` request.
+
+        If the history exceeds its limit, the contents beyond half the limit are summarized and the chat
+        session is rebuilt from a single user content with all summaries, followed by the recent history.
+        The recent history always starts with a model content, so function calls stay next to their
+        responses and user and model turns keep alternating. If the summaries exceed their limit, the older
+        ones are summarized into one.
+        """
+        if self.memory_max_tokens is None:
+            return
+        # the leading summary content is limited by `summary_memory_max_tokens`
+        history = self.client_chat.get_history(curated=True)[
+            1 if self.summary_memory else 0 :
+        ]
+        self._count_history_tokens(history, response)
+        if sum(self._history_tokens) <= self.memory_max_tokens:
+            return
+        split = self._split_history(
+            history, self._history_tokens, self.memory_max_tokens // 2
+        )
+        if split == 0:
+            return
+        summary = self.summarize(
+            "\n".join(self._stringify_content(content) for content in history[:split]),
+            instruction="Summarize the following conversation for context retention.",
+        )
+        self.summary_memory.append((summary, self._count_tokens(summary)))
+        self._compact_summary_memory()
+        self._rebuild_chat(history[split:], self._history_tokens[split:])
+
+    def _compact_summary_memory(self) -> None:
+        """
+        Summarizes the older summaries into one if `summary_memory_max_tokens` is exceeded. The latest
+        summaries that fit into half the limit are kept as they are.
+        """
+        limit = self.summary_memory_max_tokens
+        if limit is None or sum(t for _, t in self.summary_memory) <= limit:
+            return
+        split = len(self.summary_memory)
+        tokens = 0
+        while split > 1 and tokens + self.summary_memory[split - 1][1] <= limit // 2:
+            split -= 1
+            tokens += self.summary_memory[split][1]
+        summary = self.summarize(
+            "\n\n".join(text for text, _ in self.summary_memory[:split]),
+            instruction="Summarize the following conversation summaries for context retention.",
+        )
+        self.summary_memory = [
+            (summary, self._count_tokens(summary))
+        ] + self.summary_memory[split:]
+
+    def _rebuild_chat(
+        self, recent_history: List[types.Content], recent_tokens: List[int]
+    ) -> None:
+        summary_content = types.Content(
+            role="user",
+            parts=[
+                Part(
+                    text="Summary of previous conversation: "
+                    + "\n\n".join(text for text, _ in self.summary_memory)
+                )
+            ],
+        )
+        self.client_chat = self.client.chats.create(
+            model=self.model, history=[summary_content] + recent_history
+        )
+        self._history_tokens = recent_tokens
+        self._context_tokens = None
+
+    def _count_history_tokens(
+        self,
+        history: List[types.Content],
+        response: Optional[types.GenerateContentResponse] = None,
+    ) -> None:
+        """
+        Counts the tokens of the history contents that were added since the last call.
+
+        If the turn added one input and one model content and the usage of this and the previous response
+        in the chat session is known, the output tokens are the model content's count and the growth of the
+        prompt since the previous response is the input's count. Otherwise (first turn, after a rebuild,
+        contents added by `set_plan`, missing usage) the contents are counted with `count_tokens`.
+
+        :param history: The curated history after the summary content.
+        :param response: The response of the turn.
+        """
+        new_contents = history[len(self._history_tokens) :]
+        prompt_tokens, completion_tokens, _ = (
+            self._token_usage(response) if response is not None else (0, 0, 0)
+        )
+        context_tokens = prompt_tokens + completion_tokens if prompt_tokens else None
+        previous_context_tokens, self._context_tokens = (
+            self._context_tokens,
+            context_tokens,
+        )
+        if (
+            context_tokens is not None
+            and previous_context_tokens is not None
+            and len(new_contents) == 2
+            and new_contents[1].role == "model"
+            and completion_tokens > 0
+            and prompt_tokens > previous_context_tokens
+        ):
+            self._history_tokens += [
+                prompt_tokens - previous_context_tokens,
+                completion_tokens,
+            ]
+            return
+        for content in new_contents:
+            self._history_tokens.append(self._count_tokens(content))
+
+    def _count_tokens(self, content: Union[types.Content, str]) -> int:
+        """
+        Counts the tokens of a content with a `count_tokens` request, sent through the scheduler so it is
+        rate limited and retried like the chat requests.
+        """
+        response = self.scheduler.call(
+            lambda: self.client.models.count_tokens(model=self.model, contents=content)
+        )
+        return response.total_tokens or 0
+
+    @staticmethod
+    def _split_history(
+        history: List[types.Content], tokens: List[int], token_limit: int
+    ) -> int:
+        """
+        Finds where the recent history, which fits into `token_limit`, begins. The recent history has to
+        start with a model content; if none of the contents within the limit is one, the latest model
+        content is used.
+
+        :return: The index of the first recent content, 0 if the history can't be split.
+        """
+        total = 0
+        split = len(history)
+        while split > 0 and total + tokens[split - 1] <= token_limit:
+            split -= 1
+            total += tokens[split]
+        for index in range(split, len(history)):
+            if history[index].role == "model":
+                return index
+        for index in range(split - 1, 0, -1):
+            if history[index].role == "model":
+                return index
+        return 0
+
+    @staticmethod
+    def _stringify_content(content: types.Content) -> str:
+        parts = []
+        for part in content.parts or []:
+            if part.text:
+                parts.append(part.text)
+            if part.function_call:
+                parts.append(
+                    f"[Function call] {part.function_call.name}"
+                    f"({json.dumps(part.function_call.args or {})})"
+                )
+            if part.function_response:
+                parts.append(
+                    f"[Function result] {part.function_response.name}: "
+                    f"{json.dumps(part.function_response.response or {})}"
+                )
+        role = (content.role or "user").capitalize()
+        return f"{role}: {' | '.join(parts) if parts else '[No content]'}"
+
+    def _prompt_tokens(self, msg: Union[Part, List[Part], str]) -> int:
+        """
+        Roughly estimates the prompt tokens of the next request (4 characters per token), used for the
+        tokens-per-minute limit.
+        """
+        if self.scheduler.token_bucket is None:
+            return 0
+        parts = msg if isinstance(msg, list) else [msg]
+        characters = sum(
+            len(content.model_dump_json(exclude_none=True))
+            for content in self.client_chat.get_history(curated=True)
+        ) + sum(
+            len(part if isinstance(part, str) else part.model_dump_json())
+            for part in parts
+        )
+        return characters // 4
+
+    def _record_usage(
+        self, model: str, latency: float, response: types.GenerateContentResponse
+    ) -> None:
+        prompt_tokens, completion_tokens, cached_tokens = self._token_usage(response)
+        self.usage.record(
+            model,
+            latency,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cached_tokens=cached_tokens,
+        )
+
+    @staticmethod
+    def _token_usage(response: types.GenerateContentResponse) -> Tuple[int, int, int]:
+        """
+        :return: The prompt, completion and cached tokens reported in the usage metadata (0 if missing).
+        """
+        usage_metadata = response.usage_metadata
+        values = (
+            getattr(usage_metadata, "prompt_token_count", None),
+            getattr(usage_metadata, "candidates_token_count", None),
+            getattr(usage_metadata, "cached_content_token_count", None),
+        )
+        prompt_tokens, completion_tokens, cached_tokens = (
+            value if isinstance(value, int) else 0 for value in values
+        )
+        return prompt_tokens, completion_tokens, cached_tokens
+
+    @staticmethod
+    def _prepare_request(
+        functions: List[Function],
+        message: str,
+        function_result: Optional[FunctionResult],
+        function_results: Optional[List[FunctionResult]],
+    ) -> Tuple[Union[Part, List[Part], str], types.GenerateContentConfig]:
         tools = types.Tool(function_declarations=functions)
         config = types.GenerateContentConfig(tools=[tools])
 
-        if function_result:
-            msg: Union[Part, str] = Part.model_validate(
-                {
-                    "function_response": {
-                        "name": function_result["name"],
-                        "response": {"output": function_result["output"]},
+        results = ([function_result] if function_result else []) + (
+            function_results or []
+        )
+        msg: Union[Part, List[Part], str]
+        if results:
+            parts = [
+                Part.model_validate(
+                    {
+                        "function_response": {
+                            "id": result.get("call_id"),
+                            "name": result["name"],
+                            "response": {"output": result["output"]},
+                        }
                     }
-                }
-            )
+                )
+                for result in results
+            ]
+            msg = parts[0] if len(parts) == 1 else parts
         else:
             msg = message
+        return msg, config
 
-        response = self.client_chat.send_message(
-            message=msg,
-            config=config,
-        )
+    def _handle_response(
+        self,
+        response: types.GenerateContentResponse,
+        latency: float,
+        time_to_first_token: Optional[float],
+    ) -> ChatResult:
         function_args: Optional[str] = None
         function_name: Optional[str] = None
         if response.function_calls:
@@ -71,12 +589,35 @@ class GeminiClient(Client[GeminiClientConfig]):
                 function_name = response.function_calls[0].name
             if response.function_calls[0].args:
                 function_args = json.dumps(response.function_calls[0].args)
+        function_calls: List[ToolCall] = [
+            {
+                "id": function_call.id,
+                "name": function_call.name,
+                "arguments": json.dumps(function_call.args or {}),
+            }
+            for function_call in response.function_calls or []
+            if function_call.name
+        ]
 
-        return ChatResult(
+        prompt_tokens, completion_tokens, cached_tokens = self._token_usage(response)
+        usage: ChatUsage = {
+            "model": self.model,
+            "latency": latency,
+            "time_to_first_token": time_to_first_token,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cached_tokens": cached_tokens,
+        }
+        result = ChatResult(
             message=response.text,
             function_name=function_name,
             function_args=function_args,
+            function_calls=function_calls,
+            usage=usage,
         )
+        if self.stream:
+            result["streamed"] = True
+        return result
 
     def store_memory(self, filename: str) -> None:
         history: List[types.Content] = self.client_chat.get_history()
@@ -87,9 +628,7 @@ class GeminiClient(Client[GeminiClientConfig]):
     def set_plan(self, plan: str) -> None:
         # todo. this can be optimized with summarization implementation
         # todo: test
-        self.client_chat.send_message(
-            message=plan,
-        )
+        self.scheduler.call(lambda: self.client_chat.send_message(message=plan))
 
     def get_function_schema(self, command: "Command") -> Function:
         if not hasattr(command.command_handler, "__name__"):
@@ -0,0 +1,174 @@
+import importlib.util
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from openai import BaseModel
+
+
+class HttpPoolConfig(BaseModel):
+    """
+    Connection pool and timeout settings of the HTTP transport shared by all clients in the process.
+    """
+
+    max_connections: int = 100
+    """
+    Maximum number of concurrent connections.
+    """
+    max_keepalive_connections: int = 20
+    """
+    Maximum number of idle connections kept open for reuse.
+    """
+    keepalive_expiry: float = 60.0
+    """
+    Seconds an idle connection is kept open. Longer than a typical agent turn, so consecutive requests reuse
+    the connection instead of paying the TCP and TLS handshake again.
+    """
+    http2: bool = False
+    """
+    Use HTTP/2 if the server supports it. Requires the `h2` package (`pip install httpx[http2]`).
+    """
+    connect_timeout: float = 5.0
+    """
+    Seconds to wait for a connection to be established.
+    """
+    read_timeout: float = 600.0
+    """
+    Seconds to wait for the next chunk of a response. Long completions stream slowly, so this is generous.
+    """
+
+
+class HttpPool:
+    """
+    Pooled keep-alive HTTP transport, owned per process.
+
+    A sync and an async `httpx` transport (each with its own connection pool) are created once per settings
+    via `HttpPool.for_config()` and shared by the main client, summarization and the `summarize_file`
+    command, so connections and TLS sessions are reused across turns and client instances. Every request
+    and every newly opened connection is counted, the difference is the number of reused connections.
+    """
+
+    _instances: Dict[Tuple[Any, ...], "HttpPool"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, config: HttpPoolConfig):
+        self.config = config
+        http2 = config.http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            print(
+                "[WARNING] http2 requires the h2 package (pip install httpx[http2]), "
+                "falling back to HTTP/1.1."
+            )
+            http2 = False
+        limits = httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(
+            config.read_timeout, connect=config.connect_timeout
+        )
+        self.transport = httpx.HTTPTransport(limits=limits, http2=http2)
+        self.async_transport = httpx.AsyncHTTPTransport(limits=limits, http2=http2)
+        self.requests = 0
+        self.connections = 0
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_config(cls, config: HttpPoolConfig) -> "HttpPool":
+        """
+        Returns the process-wide pool for the given settings, creating it on first use.
+
+        :param config: The pool settings.
+        :return: The shared HttpPool instance.
+        """
+        key = tuple(sorted(config.model_dump().items()))
+        with cls._instances_lock:
+            pool = cls._instances.get(key)
+            if pool is None:
+                pool = cls(config)
+                cls._instances[key] = pool
+            return pool
+
+    @property
+    def reused(self) -> int:
+        """
+        The number of requests sent over an already open connection.
+        """
+        return max(0, self.requests - self.connections)
+
+    def client_args(self) -> Dict[str, Any]:
+        """
+        :return: Keyword arguments for an `httpx.Client` using the shared transport and counters.
+        """
+        return {
+            "transport": self.transport,
+            "timeout": self.timeout,
+            "event_hooks": {"request": [self._on_request]},
+        }
+
+    def async_client_args(self) -> Dict[str, Any]:
+        """
+        :return: Keyword arguments for an `httpx.AsyncClient` using the shared transport and counters.
+        """
+        return {
+            "transport": self.async_transport,
+            "timeout": self.timeout,
+            "event_hooks": {"request": [self._on_async_request]},
+        }
+
+    @property
+    def client(self) -> httpx.Client:
+        """
+        The shared sync client, created on first use.
+        """
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(**self.client_args())
+            return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        """
+        The shared async client, created on first use.
+        """
+        with self._lock:
+            if self._async_client is None:
+                self._async_client = httpx.AsyncClient(**self.async_client_args())
+            return self._async_client
+
+    def report(self) -> str:
+        """
+        :return: A human-readable summary of the connection reuse.
+        """
+        return (
+            f"{self.requests} requests over {self.connections} connections "
+            f"({self.reused} reused)"
+        )
+
+    def _count_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def _count_connection(self, event_name: str) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connections += 1
+
+    def _on_request(self, request: httpx.Request) -> None:
+        self._count_request()
+
+        def trace(event_name: str, info: Dict[str, Any]) -> None:
+            self._count_connection(event_name)
+
+        request.extensions["trace"] = trace
+
+    async def _on_async_request(self, request: httpx.Request) -> None:
+        self._count_request()
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            self._count_connection(event_name)
+
+        request.extensions["trace"] = trace
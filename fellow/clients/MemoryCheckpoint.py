@@ -0,0 +1,200 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import IO, Any, Dict, List, Mapping, Optional, Sequence, TypedDict
+
+
+class CheckpointData(TypedDict):
+    lists: Dict[str, List[Dict[str, Any]]]
+    """
+    The messages of every memory list, in order.
+    """
+
+    loop: Optional[Dict[str, Any]]
+    """
+    The last loop state (`step`, `done` and the `pending` input of the next request), if one was recorded.
+    `pending` is None if memory records follow it, i.e. the input already reached the memory.
+    """
+
+
+class MemoryCheckpoint:
+    """
+    Crash-safe, append-only JSONL checkpoint of a client's memory.
+
+    Every record is one line: `{"list": <name>, "message": {...}}` appends a message to a memory list,
+    `{"list": <name>, "drop": n}` removes its first n messages (they were summarized). Records are written as
+    they are produced and flushed to the OS at once, so a crash or Ctrl-C loses nothing that was written.
+    `fsync` is batched: the file is synced to disk after every `fsync_batch` records and on `sync()`/`close()`.
+
+    `sync_lists()` diffs the memory lists against what was already written, so a step costs O(new messages)
+    instead of serializing the whole history. `record_loop()` adds `{"loop": {...}}` with the state of the agent
+    loop, so a run can be resumed. `compact()` rewrites the file with only the current messages and loop state;
+    `superseded` counts the records it would remove (`drop` records and the messages they drop).
+    """
+
+    def __init__(self, path: Path, fsync_batch: int = 10):
+        self.path = Path(path)
+        self.fsync_batch = max(1, fsync_batch)
+        self.records = 0
+        self.superseded = 0
+        self._unsynced = 0
+        self._written: Dict[str, List[Any]] = {}
+        self.loop: Optional[Dict[str, Any]] = None
+        self._file: Optional[IO[str]] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def load(path: Path) -> CheckpointData:
+        """
+        Rebuilds the memory lists and the loop state from a checkpoint. A last line that was cut off by a
+        crash is ignored.
+
+        :param path: The checkpoint file.
+        :return: The memory lists and the last loop state.
+        """
+        lists: Dict[str, List[Dict[str, Any]]] = {}
+        loop: Optional[Dict[str, Any]] = None
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                if "loop" in record:
+                    loop = record["loop"]
+                    continue
+                if loop and loop.get("pending"):
+                    loop = {**loop, "pending": None}
+                messages = lists.setdefault(record["list"], [])
+                if "drop" in record:
+                    del messages[: record["drop"]]
+                else:
+                    messages.append(record["message"])
+        return {"lists": lists, "loop": loop}
+
+    def record_loop(self, loop: Dict[str, Any]) -> None:
+        """
+        Appends the state of the agent loop, e.g. the step counter and the input of the next request.
+
+        :param loop: The JSON-serializable loop state.
+        """
+        with self._lock:
+            self.loop = loop
+            self._write({"loop": loop})
+            self._flush()
+
+    def sync_lists(self, lists: Mapping[str, Sequence[Any]]) -> None:
+        """
+        Appends the changes of the memory lists since the last call. Messages are compared by identity: new
+        messages at the end are appended, messages removed from the front are dropped. A list that was
+        changed in any other way is dropped and written again.
+
+        :param lists: The memory lists by name.
+        """
+        with self._lock:
+            for name, messages in lists.items():
+                written = self._written.setdefault(name, [])
+                drop = self._dropped(written, messages)
+                if drop:
+                    self._write({"list": name, "drop": drop})
+                    del written[:drop]
+                    self.superseded += drop + 1
+                new_messages = messages[len(written) :]
+                for message in new_messages:
+                    self._write({"list": name, "message": message})
+                written.extend(new_messages)
+            self._flush()
+
+    @staticmethod
+    def _dropped(written: List[Any], messages: Sequence[Any]) -> int:
+        """
+        :return: How many messages were removed from the front of `written` to get the start of `messages`;
+            all of them if `messages` doesn't continue `written`.
+        """
+        if not written:
+            return 0
+        if (
+            len(messages) >= len(written)
+            and messages[0] is written[0]
+            and messages[len(written) - 1] is written[-1]
+        ):
+            return 0
+        for drop, message in enumerate(written):
+            if messages and message is messages[0]:
+                kept = written[drop:]
+                if len(messages) >= len(kept) and all(
+                    a is b for a, b in zip(kept, messages)
+                ):
+                    return drop
+                break
+        return len(written)
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.records += 1
+        self._unsynced += 1
+
+    def _flush(self) -> None:
+        if self._file is None:
+            return
+        self._file.flush()
+        if self._unsynced >= self.fsync_batch:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def sync(self) -> None:
+        """
+        Forces all written records to disk.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._unsynced = 0
+
+    def compact(self, lists: Mapping[str, Sequence[Any]]) -> None:
+        """
+        Atomically replaces the checkpoint with one record per current message, without the dropped ones, and
+        the last loop state.
+
+        :param lists: The memory lists by name.
+        """
+        with self._lock:
+            self._close()
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for name, messages in lists.items():
+                    for message in messages:
+                        f.write(
+                            json.dumps(
+                                {"list": name, "message": message}, ensure_ascii=False
+                            )
+                            + "\n"
+                        )
+                if self.loop is not None:
+                    f.write(json.dumps({"loop": self.loop}, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self._written = {name: list(messages) for name, messages in lists.items()}
+            self.superseded = 0
+
+    def close(self) -> None:
+        """
+        Syncs and closes the checkpoint file. Writing again reopens it.
+        """
+        with self._lock:
+            self._close()
+
+    def _close(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+            self._unsynced = 0
@@ -1,35 +1,189 @@
+import asyncio
 import json
 import os
-from typing import TYPE_CHECKING, Dict, List, Literal, Optional, Tuple, TypedDict
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Tuple,
+    TypedDict,
+    cast,
+)
 
 import openai
-import tiktoken
 from openai import NOT_GIVEN
+from openai.types import CompletionUsage
 from openai.types.chat import (
+    ChatCompletion,
     ChatCompletionAssistantMessageParam,
+    ChatCompletionChunk,
+    ChatCompletionMessage,
     ChatCompletionMessageParam,
+    ChatCompletionMessageToolCall,
+    ChatCompletionMessageToolCallParam,
+    ChatCompletionToolParam,
 )
+from openai.types.chat.chat_completion import Choice
 from openai.types.chat.chat_completion_assistant_message_param import FunctionCall
+from openai.types.shared_params import FunctionDefinition
 from typing_extensions import Required, Self
 
 from fellow.clients.Client import (
     ChatResult,
+    ChatUsage,
     Client,
     ClientConfig,
     Function,
     FunctionResult,
+    ToolCall,
 )
+from fellow.clients.HttpPool import HttpPool, HttpPoolConfig
+from fellow.clients.MemoryCheckpoint import MemoryCheckpoint
+from fellow.clients.RequestScheduler import RequestScheduler
+from fellow.clients.ResponseCache import ResponseCache
+from fellow.clients.RetrievalIndex import RetrievalIndex, Snippet
+from fellow.clients.TokenCounter import TokenCounter
+from fellow.clients.TokenHistory import TokenHistory
+from fellow.clients.UsageTracker import UsageTracker
 
 if TYPE_CHECKING:  # pragma: no cover
     from fellow.commands.Command import Command  # pragma: no cover
 
+SUMMARY_INSTRUCTION = "Summarize the following conversation for context retention."
+RETRIEVAL_HEADER = (
+    "Possibly relevant details from earlier in the conversation "
+    "(no longer in your context, retrieved for this turn):"
+)
+
+# evicted messages are indexed in snippets of at most this many characters
+RETRIEVAL_SNIPPET_CHARS = 1500
+
+MERGE_INSTRUCTION = (
+    "Merge the following summaries of consecutive parts of a conversation into one summary "
+    "for context retention. Keep the facts that are needed to continue the task."
+)
+
 
 class OpenAIClientMessage(TypedDict, total=False):
-    role: Required[Literal["user", "assistant", "function", "system"]]
+    role: Required[Literal["user", "assistant", "function", "tool", "system"]]
     tokens: Required[int]
     content: str
     name: str
     function_call: FunctionCall
+    tool_calls: List[ChatCompletionMessageToolCallParam]
+    tool_call_id: str
+    tier: Literal["window", "epoch", "global"]
+    summarized: int
+    # set on the reasoning of a response whose tool calls follow in the next message
+    continued: bool
+
+
+class _StreamAccumulator:
+    """
+    Assembles the chunks of a streamed completion (content and tool call ids, names and arguments) into a
+    regular ChatCompletion and prints the reasoning as it arrives. Used for sync and async streams alike.
+    """
+
+    def __init__(self, model: str):
+        self.start = time.perf_counter()
+        self.time_to_first_token: Optional[float] = None
+        self.content_parts: List[str] = []
+        self.tool_calls: Dict[int, Dict[str, str]] = {}
+        self.finish_reason = "stop"
+        self.usage: Optional[CompletionUsage] = None
+        self.completion_id, self.created, self.model = "", int(time.time()), model
+
+    def add(self, chunk: ChatCompletionChunk) -> None:
+        """
+        Adds one chunk of the stream.
+
+        :param chunk: The streamed chunk.
+        """
+        self.completion_id, self.created, self.model = (
+            chunk.id,
+            chunk.created,
+            chunk.model,
+        )
+        if chunk.usage:
+            self.usage = chunk.usage
+        if not chunk.choices:
+            return
+        choice = chunk.choices[0]
+        if choice.finish_reason:
+            self.finish_reason = choice.finish_reason
+        delta = choice.delta
+        if self.time_to_first_token is None and (delta.content or delta.tool_calls):
+            self.time_to_first_token = time.perf_counter() - self.start
+        if delta.content:
+            if not self.content_parts:
+                print("AI: ", end="", flush=True)
+            print(delta.content, end="", flush=True)
+            self.content_parts.append(delta.content)
+        for tool_call_delta in delta.tool_calls or []:
+            tool_call = self.tool_calls.setdefault(
+                tool_call_delta.index, {"id": "", "name": "", "arguments": ""}
+            )
+            if tool_call_delta.id:
+                tool_call["id"] = tool_call_delta.id
+            if tool_call_delta.function and tool_call_delta.function.name:
+                tool_call["name"] += tool_call_delta.function.name
+            if tool_call_delta.function and tool_call_delta.function.arguments:
+                tool_call["arguments"] += tool_call_delta.function.arguments
+
+    def completion(self) -> ChatCompletion:
+        """
+        Finishes the printed reasoning and returns the assembled completion.
+
+        :return: The completion as if it had been requested without streaming.
+        """
+        if self.content_parts:
+            print()
+        message = ChatCompletionMessage(
+            role="assistant",
+            content="".join(self.content_parts) if self.content_parts else None,
+            tool_calls=(
+                [
+                    ChatCompletionMessageToolCall.model_validate(
+                        {
+                            "id": tool_call["id"],
+                            "type": "function",
+                            "function": {
+                                "name": tool_call["name"],
+                                "arguments": tool_call["arguments"],
+                            },
+                        }
+                    )
+                    for _, tool_call in sorted(self.tool_calls.items())
+                ]
+                if self.tool_calls
+                else None
+            ),
+        )
+        return ChatCompletion(
+            id=self.completion_id,
+            choices=[
+                Choice.model_validate(
+                    {
+                        "finish_reason": self.finish_reason,
+                        "index": 0,
+                        "message": message,
+                    }
+                )
+            ],
+            created=self.created,
+            model=self.model,
+            object="chat.completion",
+            usage=self.usage,
+        )
 
 
 class OpenAIClientConfig(ClientConfig):
@@ -41,6 +195,77 @@ class OpenAIClientConfig(ClientConfig):
     memory_max_tokens: int
     summary_memory_max_tokens: int
     model: str
+    stream: bool = False
+    """
+    Stream completions, print the reasoning as it arrives and record the time to first token.
+    """
+    parallel_tool_calls: bool = True
+    """
+    Allow the model to request several tool calls in a single turn.
+    """
+    summary_model: Optional[str] = None
+    """
+    Model used for memory summaries and the `summarize_file` command. Defaults to `model`; summarization
+    usually works well with a cheaper, faster model.
+    """
+    summary_max_output_tokens: Optional[int] = None
+    """
+    Upper bound for the tokens of a single summary. Unbounded if not set.
+    """
+    prompt_cache_layout: bool = False
+    """
+    Keep the request prefix (tool schemas, system prompt, first plan) byte-stable for provider-side prompt
+    caching: later plan updates are appended to the end of the conversation instead of the system content.
+    """
+    summary_epoch_size: int = 4
+    """
+    Number of window summaries (one per memory compaction) that are merged into one epoch summary once there
+    are more of them.
+    """
+    summary_global_size: int = 4
+    """
+    Number of epoch summaries that are merged into the global summary once there are more of them.
+    """
+    summary_soft_limit_ratio: float = 0.8
+    """
+    Fraction of `memory_max_tokens` (and `summary_memory_max_tokens`) at which summarization starts in the
+    background. Memory is only summarized synchronously if the hard limit is reached before the background
+    summary is ready. A value of 1.0 disables background summarization.
+    """
+    cache_dir: Optional[str] = None
+    """
+    Directory of the on-disk response cache. Requests with identical model, messages and tools (including
+    summarization requests) are answered from it instead of the API. Disabled if not set.
+    """
+    cache_max_bytes: int = 256 * 1024 * 1024
+    """
+    Maximum size of the response cache in bytes, least recently used responses are evicted first.
+    """
+    requests_per_minute: Optional[int] = None
+    """
+    Requests per minute allowed per model, shared by all clients in the process. Unlimited if not set.
+    """
+    tokens_per_minute: Optional[int] = None
+    """
+    Prompt tokens per minute allowed per model, shared by all clients in the process. Unlimited if not set.
+    """
+    max_retries: int = 5
+    """
+    Retries of a request failing with a rate limit (429), server (5xx) or connection error.
+    """
+    retry_backoff: float = 1.0
+    """
+    Backoff of the first retry in seconds, doubled (with jitter) on every further retry. A `Retry-After`
+    header sent by the API takes precedence.
+    """
+    retry_backoff_max: float = 60.0
+    """
+    Upper bound of a single retry delay in seconds.
+    """
+    http: HttpPoolConfig = HttpPoolConfig()
+    """
+    Connection pool (keep-alive, pool size, HTTP/2) and timeouts of the HTTP transport shared per process.
+    """
 
 
 class OpenAIClient(Client[OpenAIClientConfig]):
@@ -52,6 +277,22 @@ class OpenAIClient(Client[OpenAIClientConfig]):
         self.memory_max_tokens = config.memory_max_tokens
         self.summary_memory_max_tokens = config.summary_memory_max_tokens
         self.model = config.model
+        self.stream = config.stream
+        self.parallel_tool_calls = config.parallel_tool_calls
+        self.summary_model = config.summary_model or self.model
+        self.summary_max_output_tokens = config.summary_max_output_tokens
+        self.usage = UsageTracker()
+        # prompt tokens of the last request as estimated by the client, see `TokenCounter.count_request`
+        self.estimated_prompt_tokens = 0
+        self.scheduler = self._scheduler_for(self.model, config)
+        self.summary_scheduler = self._scheduler_for(self.summary_model, config)
+        self.http_pool = HttpPool.for_config(config.http)
+        self.token_counter = TokenCounter.for_model(self.model)
+        self.response_cache: Optional[ResponseCache] = (
+            ResponseCache.for_directory(Path(config.cache_dir), config.cache_max_bytes)
+            if config.cache_dir
+            else None
+        )
         self.system_content: List[OpenAIClientMessage] = [
             {
                 "role": "system",
@@ -61,50 +302,151 @@ class OpenAIClient(Client[OpenAIClientConfig]):
                 ),
             }
         ]
-        self.summary_memory: List[OpenAIClientMessage] = []
-        self.memory: List[OpenAIClientMessage] = []
+        self._summary_memory: TokenHistory[OpenAIClientMessage] = TokenHistory()
+        self._memory: TokenHistory[OpenAIClientMessage] = TokenHistory()
+        self._params: List[ChatCompletionMessageParam] = []
+        self._params_sources: Optional[
+            Tuple[
+                List[OpenAIClientMessage],
+                List[OpenAIClientMessage],
+                List[OpenAIClientMessage],
+            ]
+        ] = None
+        self._params_lengths: Tuple[int, int, int] = (0, 0, 0)
+        self._sync_client: Optional[openai.OpenAI] = None
+        self._async_client: Optional[openai.AsyncOpenAI] = None
+        self.summary_soft_limit_ratio = config.summary_soft_limit_ratio
+        self.summary_epoch_size = max(2, config.summary_epoch_size)
+        self.summary_global_size = max(1, config.summary_global_size)
+        self.prompt_cache_layout = config.prompt_cache_layout
+        self._plan_set = False
+        # with `prompt_cache_layout`: the latest plan update, sent after the memory (at most one message)
+        self.plan_update: List[OpenAIClientMessage] = []
+        self._summary_executor: Optional[ThreadPoolExecutor] = None
+        self._pending_summary: Optional[Tuple[str, List[Any], "Future[str]"]] = None
+        self.checkpoint: Optional[MemoryCheckpoint] = None
+        self.retrieval: Optional[RetrievalIndex] = None
 
     @classmethod
     def create(cls, config: OpenAIClientConfig) -> Self:
         return cls(config)
 
+    @staticmethod
+    def _scheduler_for(model: str, config: OpenAIClientConfig) -> RequestScheduler:
+        return RequestScheduler.for_key(
+            f"openai:{model}",
+            requests_per_minute=config.requests_per_minute,
+            tokens_per_minute=config.tokens_per_minute,
+            max_retries=config.max_retries,
+            backoff_base=config.retry_backoff,
+            backoff_max=config.retry_backoff_max,
+        )
+
     def message_to_params(self) -> List[ChatCompletionMessageParam]:
         """
         Converts internal message history into OpenAI-compatible ChatCompletionMessageParams.
-        Handles 'user', 'assistant', and 'function' roles with the appropriate fields.
+        Handles 'user', 'assistant', 'tool' and 'function' roles with the appropriate fields.
+
+        The converted list is kept between turns: if only new messages were appended to `memory`, just
+        those are converted. It is rebuilt when `system_content`, `summary_memory` or `memory` was
+        replaced or shrunk (summarization) or `system_content`/`summary_memory` grew (plan change).
+        Messages are expected not to be modified in place once they are part of the history.
 
-        :return: A list of ChatCompletionMessageParam dicts for API input.
+        :return: A list of ChatCompletionMessageParam dicts for API input. Do not modify it.
         """
-        messages = self.messages()
-        output: List[ChatCompletionMessageParam] = []
+        sources = self._params_sources
+        lengths = self._params_lengths
+        if (
+            sources is None
+            or sources[0] is not self.system_content
+            or sources[1] is not self.summary_memory
+            or sources[2] is not self.memory
+            or lengths[0] != len(self.system_content)
+            or lengths[1] != len(self.summary_memory)
+            or lengths[2] > len(self.memory)
+        ):
+            self._params = [
+                param
+                for message in self.messages()
+                if (param := self._message_to_param(message)) is not None
+            ]
+        else:
+            for message in self.memory[lengths[2] :]:
+                param = self._message_to_param(message)
+                if param is not None:
+                    self._params.append(param)
+        self._params_sources = (self.system_content, self.summary_memory, self.memory)
+        self._params_lengths = (
+            len(self.system_content),
+            len(self.summary_memory),
+            len(self.memory),
+        )
+        return self._params
 
-        for message in messages:
-            if message["role"] == "function":
-                output.append(
-                    {
-                        "role": message["role"],
-                        "name": message["name"],
-                        "content": message["content"],
-                    }
-                )
-            if message["role"] == "user":
-                output.append({"role": message["role"], "content": message["content"]})
-            if message["role"] == "assistant":
-                assistant_message: ChatCompletionAssistantMessageParam = {
-                    "role": "assistant",
-                }
-                if "content" in message:
-                    assistant_message["content"] = message["content"]
-                if "function_call" in message:
-                    assistant_message["function_call"] = message["function_call"]
-                output.append(assistant_message)
-            if message["role"] == "system":
-                system_message: ChatCompletionMessageParam = {
-                    "role": message["role"],
-                    "content": message["content"],
-                }
-                output.append(system_message)
-        return output
+    @staticmethod
+    def _message_to_param(
+        message: OpenAIClientMessage,
+    ) -> Optional[ChatCompletionMessageParam]:
+        """
+        Converts a single internal message into a ChatCompletionMessageParam.
+
+        :param message: The internal message.
+        :return: The API message, or None for unknown roles.
+        """
+        if message["role"] == "function":
+            return {
+                "role": message["role"],
+                "name": message["name"],
+                "content": message["content"],
+            }
+        if message["role"] == "tool":
+            return {
+                "role": "tool",
+                "tool_call_id": message["tool_call_id"],
+                "content": message["content"],
+            }
+        if message["role"] == "user":
+            return {"role": message["role"], "content": message["content"]}
+        if message["role"] == "assistant":
+            assistant_message: ChatCompletionAssistantMessageParam = {
+                "role": "assistant",
+            }
+            if "content" in message:
+                assistant_message["content"] = message["content"]
+            if "function_call" in message:
+                assistant_message["function_call"] = message["function_call"]
+            if "tool_calls" in message:
+                assistant_message["tool_calls"] = message["tool_calls"]
+            return assistant_message
+        if message["role"] == "system":
+            return {"role": message["role"], "content": message["content"]}
+        return None
+
+    @property
+    def memory(self) -> TokenHistory[OpenAIClientMessage]:
+        """
+        The recent conversation. Assigned lists are wrapped in a TokenHistory, which keeps their token sum.
+        """
+        return self._memory
+
+    @memory.setter
+    def memory(self, messages: List[OpenAIClientMessage]) -> None:
+        self._memory = (
+            messages if isinstance(messages, TokenHistory) else TokenHistory(messages)
+        )
+
+    @property
+    def summary_memory(self) -> TokenHistory[OpenAIClientMessage]:
+        """
+        The summaries of older parts of the conversation, kept as a TokenHistory like `memory`.
+        """
+        return self._summary_memory
+
+    @summary_memory.setter
+    def summary_memory(self, messages: List[OpenAIClientMessage]) -> None:
+        self._summary_memory = (
+            messages if isinstance(messages, TokenHistory) else TokenHistory(messages)
+        )
 
     def messages(self) -> List[OpenAIClientMessage]:
         """
@@ -119,91 +461,481 @@ class OpenAIClient(Client[OpenAIClientConfig]):
         functions: List[Function],
         message: str = "",
         function_result: Optional[FunctionResult] = None,
+        function_results: Optional[List[FunctionResult]] = None,
     ) -> ChatResult:
         """
-        Sends a message or a function result to the model, can also handle function calls.
+        Sends a message or function results to the model, can also handle (several) tool calls.
         Updates memory, and handles summarization if token limits are exceeded.
 
         :param message: User input message.
-        :param function_result: Tuple of function name and output if a function was called.
+        :param function_result: Result of a single function call, if a function was called.
+        :param function_results: Results of all tool calls of the previous turn.
         :param functions: List of function schemas for the model to call.
 
-        :return: Tuple containing the assistant's response, function name, and function arguments.
+        :return: ChatResult with the assistant's response and all requested tool calls.
         """
-        new_msg: OpenAIClientMessage
-        if function_result:
-            fn_name, fn_output = function_result["name"], function_result["output"]
-            new_msg = {
-                "role": "function",
-                "name": fn_name,
-                "content": fn_output,
-                "tokens": self._count_tokens(
-                    {"role": "function", "content": fn_output}
-                ),
-            }
-            self.memory.append(new_msg)
+        params = self._prepare_request(
+            functions, message, function_result, function_results
+        )
+        start = time.perf_counter()
+        time_to_first_token: Optional[float] = None
+        cache_key, response = self._cache_lookup(params)
+        cache_hit = response is not None
+        if response is None:
+            prompt_tokens = self._prompt_tokens()
+            if self.stream:
+                accumulator = _StreamAccumulator(self.model)
+                stream = self.scheduler.call(
+                    lambda: self.sync_client.chat.completions.create(
+                        **params, stream=True, stream_options={"include_usage": True}
+                    ),
+                    prompt_tokens,
+                )
+                for chunk in stream:
+                    accumulator.add(chunk)
+                response = accumulator.completion()
+                time_to_first_token = accumulator.time_to_first_token
+            else:
+                response = self.scheduler.call(
+                    lambda: self.sync_client.chat.completions.create(**params),
+                    prompt_tokens,
+                )
+            self._cache_store(cache_key, response)
+        result = self._handle_response(
+            response, time.perf_counter() - start, time_to_first_token, cache_hit
+        )
+
+        # Perform summarization if needed
+        self._maybe_summarize_memory()
+        self.checkpoint_memory()
+        return result
+
+    async def achat(
+        self,
+        functions: List[Function],
+        message: str = "",
+        function_result: Optional[FunctionResult] = None,
+        function_results: Optional[List[FunctionResult]] = None,
+    ) -> ChatResult:
+        """
+        Async variant of `chat`. The completion request is awaited on a shared `openai.AsyncOpenAI` client,
+        so many sessions can wait for the model concurrently in one event loop.
+
+        Memory is updated exactly like in `chat`. Summarization, which is rare and needs its own completion,
+        runs in a worker thread so it does not block the event loop.
+
+        :param message: User input message.
+        :param function_result: Result of a single function call, if a function was called.
+        :param function_results: Results of all tool calls of the previous turn.
+        :param functions: List of function schemas for the model to call.
+
+        :return: ChatResult with the assistant's response and all requested tool calls.
+        """
+        params = self._prepare_request(
+            functions, message, function_result, function_results
+        )
+        start = time.perf_counter()
+        time_to_first_token: Optional[float] = None
+        cache_key, response = self._cache_lookup(params)
+        cache_hit = response is not None
+        if response is None:
+            prompt_tokens = self._prompt_tokens()
+            if self.stream:
+                accumulator = _StreamAccumulator(self.model)
+                stream = await self.scheduler.acall(
+                    lambda: self.async_client.chat.completions.create(
+                        **params, stream=True, stream_options={"include_usage": True}
+                    ),
+                    prompt_tokens,
+                )
+                async for chunk in stream:
+                    accumulator.add(chunk)
+                response = accumulator.completion()
+                time_to_first_token = accumulator.time_to_first_token
+            else:
+                response = cast(
+                    ChatCompletion,
+                    await self.scheduler.acall(
+                        lambda: self.async_client.chat.completions.create(**params),
+                        prompt_tokens,
+                    ),
+                )
+            self._cache_store(cache_key, response)
+        result = self._handle_response(
+            response, time.perf_counter() - start, time_to_first_token, cache_hit
+        )
+
+        # Perform summarization if needed
+        await asyncio.to_thread(self._maybe_summarize_memory)
+        self.checkpoint_memory()
+        return result
+
+    @property
+    def sync_client(self) -> openai.OpenAI:
+        """
+        The OpenAI client of `chat` and the summaries, created on first use from the environment
+        (OPENAI_API_KEY, OPENAI_BASE_URL) on the shared connection pool. Retries are left to the scheduler,
+        so they are counted against the rate limits. The module-level `openai` client is not touched.
+        """
+        if self._sync_client is None:
+            self._sync_client = openai.OpenAI(
+                max_retries=0,
+                http_client=self.http_pool.client,
+                timeout=self.http_pool.timeout,
+            )
+        return self._sync_client
+
+    @property
+    def async_client(self) -> openai.AsyncOpenAI:
+        """
+        The async OpenAI client used by `achat`, created on first use like `sync_client` on the async
+        transport of the shared connection pool.
+        """
+        if self._async_client is None:
+            self._async_client = openai.AsyncOpenAI(
+                max_retries=0,
+                http_client=self.http_pool.async_client,
+                timeout=self.http_pool.timeout,
+            )
+        return self._async_client
+
+    def _prepare_request(
+        self,
+        functions: List[Function],
+        message: str,
+        function_result: Optional[FunctionResult],
+        function_results: Optional[List[FunctionResult]],
+    ) -> Dict[str, Any]:
+        """
+        Appends the new user message or function results to the memory and builds the parameters for
+        `chat.completions.create`. Shared by `chat` and `achat`.
+
+        :return: The request parameters.
+        """
+        results = ([function_result] if function_result else []) + (
+            function_results or []
+        )
+        memory_length = len(self.memory)
+        if results:
+            self._append_function_results(results)
         else:
             if message.strip():
-                new_msg = {
+                new_msg: OpenAIClientMessage = {
                     "role": "user",
                     "content": message,
                     "tokens": self._count_tokens({"role": "user", "content": message}),
                 }
                 self.memory.append(new_msg)
 
-        response = openai.chat.completions.create(
-            model=self.model,
-            messages=self.message_to_params(),
-            functions=functions,
-            function_call="auto" if functions else NOT_GIVEN,
+        tools: List[ChatCompletionToolParam] = [
+            {"type": "function", "function": cast(FunctionDefinition, function)}
+            for function in functions
+        ]
+        messages = self.message_to_params()
+        message_tokens = (
+            sum(message["tokens"] for message in self.system_content)
+            + self.summary_memory.tokens
+            + self.memory.tokens
         )
+        if self.plan_update:
+            messages = [
+                *messages,
+                {"role": "system", "content": self.plan_update[-1]["content"]},
+            ]
+            message_tokens += self.plan_update[-1]["tokens"]
+        retrieved = self._retrieve(self.memory[max(0, memory_length - 1) :])
+        if retrieved is not None:
+            messages = [*messages, retrieved]
+            message_tokens += self._count_tokens(cast(Dict, retrieved))
+        self.estimated_prompt_tokens = self.token_counter.count_request(
+            message_tokens, functions
+        )
+        return {
+            "model": self.model,
+            "messages": messages,
+            "tools": tools or NOT_GIVEN,
+            "tool_choice": "auto" if tools else NOT_GIVEN,
+            "parallel_tool_calls": self.parallel_tool_calls if tools else NOT_GIVEN,
+        }
+
+    def _handle_response(
+        self,
+        response: ChatCompletion,
+        latency: float,
+        time_to_first_token: Optional[float],
+        cache_hit: bool = False,
+    ) -> ChatResult:
+        """
+        Stores the assistant's answer in the memory and converts the completion into a ChatResult.
+        Shared by `chat` and `achat`.
+
+        :param response: The (possibly assembled) completion.
+        :param latency: Wall time of the request in seconds.
+        :param time_to_first_token: Seconds until the first streamed token arrived, if streamed.
+        :param cache_hit: True if the completion was served from the response cache.
+        :return: ChatResult with the assistant's response and all requested tool calls.
+        """
+        usage: ChatUsage = {
+            "model": self.model,
+            "latency": latency,
+            "time_to_first_token": time_to_first_token,
+        }
+        if cache_hit:
+            usage["cache_hit"] = True
+        elif response.usage:
+            usage["prompt_tokens"] = response.usage.prompt_tokens
+            usage["estimated_prompt_tokens"] = self.estimated_prompt_tokens
+            usage["completion_tokens"] = response.usage.completion_tokens
+            if response.usage.prompt_tokens_details:
+                usage["cached_tokens"] = (
+                    response.usage.prompt_tokens_details.cached_tokens or 0
+                )
+        self._record_usage(self.model, latency, response, cache_hit)
 
         msg = response.choices[0].message
-        function_call: Optional[FunctionCall] = (
-            {"name": msg.function_call.name, "arguments": msg.function_call.arguments}
-            if msg.function_call
-            else None
+        tool_calls: List[ToolCall] = [
+            {
+                "id": tool_call.id,
+                "name": tool_call.function.name,
+                "arguments": tool_call.function.arguments,
+            }
+            for tool_call in msg.tool_calls or []
+        ]
+        self._append_input_to_memory(msg.content, tool_calls)
+
+        result: ChatResult = {
+            "message": msg.content,
+            "function_name": tool_calls[0]["name"] if tool_calls else None,
+            "function_args": tool_calls[0]["arguments"] if tool_calls else None,
+            "function_calls": tool_calls,
+            "usage": usage,
+        }
+        if self.stream and not cache_hit:
+            result["streamed"] = True
+        return result
+
+    def _record_usage(
+        self, model: str, latency: float, response: ChatCompletion, cache_hit: bool
+    ) -> None:
+        completion_usage = (
+            response.usage if isinstance(response.usage, CompletionUsage) else None
+        )
+        self.usage.record(
+            model,
+            latency,
+            prompt_tokens=completion_usage.prompt_tokens if completion_usage else 0,
+            completion_tokens=(
+                completion_usage.completion_tokens if completion_usage else 0
+            ),
+            cached_tokens=(
+                completion_usage.prompt_tokens_details.cached_tokens or 0
+                if completion_usage and completion_usage.prompt_tokens_details
+                else 0
+            ),
+            cache_hit=cache_hit,
         )
-        self._append_input_to_memory(msg.content, function_call)
 
-        # Perform summarization if needed
-        self._maybe_summarize_memory()
+    def _prompt_tokens(self) -> int:
+        """
+        :return: The estimated prompt tokens of the next request, used for the tokens-per-minute limit.
+        """
+        if self.scheduler.token_bucket is None:
+            return 0
+        return self.estimated_prompt_tokens
 
-        if msg.function_call:
-            return {
-                "message": msg.content,
-                "function_name": msg.function_call.name,
-                "function_args": msg.function_call.arguments,
-            }
-        else:
-            return {
-                "message": msg.content,
-                "function_name": None,
-                "function_args": None,
-            }
+    def _cache_lookup(
+        self, params: Dict[str, Any]
+    ) -> Tuple[Optional[str], Optional[ChatCompletion]]:
+        """
+        Looks up a request in the response cache, if it is enabled.
+
+        :param params: The request parameters.
+        :return: The cache key (None if caching is disabled) and the cached completion, if any.
+        """
+        if self.response_cache is None:
+            return None, None
+        cache_key = self.response_cache.key(params)
+        cached = self.response_cache.get(cache_key)
+        if cached is None:
+            return cache_key, None
+        return cache_key, ChatCompletion.model_validate_json(cached)
+
+    def _cache_store(self, cache_key: Optional[str], response: ChatCompletion) -> None:
+        """
+        Stores a completion in the response cache, if it is enabled.
+
+        :param cache_key: The key returned by `_cache_lookup`.
+        :param response: The completion to store.
+        """
+        if self.response_cache is not None and cache_key is not None:
+            self.response_cache.put(cache_key, response.model_dump_json())
 
     def store_memory(self, filename: str):
         """
-        Saves the full message history (including token counts) to a JSON file.
+        Saves the full message history (including token counts and the latest plan update) to a JSON file.
 
         :param filename: Path to the file where the memory will be stored.
         """
         with open(filename, "w") as f:  # noinspection PyTypeChecker
-            json.dump(self.messages(), f, indent=2)
+            json.dump(self.messages() + self.plan_update, f, indent=2)
 
     def set_plan(self, plan: str) -> None:
         """
         Adds a system message to the memory with the specified plan.
 
+        With `prompt_cache_layout`, only the first plan becomes part of `system_content`, so the request
+        prefix stays byte-stable. Later plans replace `plan_update`, which is sent after the memory with
+        every request. By then the memory ends with the user message or the tool results of the turn, so a
+        plan set by a `make_plan` call never comes between the tool calls and their results. It is not part
+        of `memory`, so summarization never evicts it.
+
         :param plan: The plan to be set.
         """
-        self.system_content.append(
-            {
-                "role": "system",
-                "content": plan,
-                "tokens": self._count_tokens({"role": "system", "content": plan}),
-            }
+        plan_message: OpenAIClientMessage = {
+            "role": "system",
+            "content": plan,
+            "tokens": self._count_tokens({"role": "system", "content": plan}),
+        }
+        if self.prompt_cache_layout and self._plan_set:
+            self.plan_update = [plan_message]
+        else:
+            self.system_content.append(plan_message)
+        self._plan_set = True
+        self.checkpoint_memory()
+
+    def memory_lists(self) -> Dict[str, List[OpenAIClientMessage]]:
+        """
+        :return: The memory lists by name, in request order.
+        """
+        return {
+            "system_content": self.system_content,
+            "summary_memory": self.summary_memory,
+            "memory": self.memory,
+            "plan_update": self.plan_update,
+        }
+
+    def restore_memory(self, lists: Mapping[str, List[OpenAIClientMessage]]) -> None:
+        """
+        Replaces the memory with lists rebuilt from a checkpoint, e.g. to resume a task. The stored token
+        counts are reused, nothing is tokenized again.
+
+        :param lists: The memory lists by name, as returned by `memory_lists()`.
+        """
+        self.system_content = list(lists.get("system_content") or self.system_content)
+        self.summary_memory = TokenHistory(lists.get("summary_memory") or [])
+        self.memory = TokenHistory(lists.get("memory") or [])
+        self.plan_update = list(lists.get("plan_update") or [])[-1:]
+        self._plan_set = len(self.system_content) > 1
+
+    def attach_retrieval(self, retrieval: RetrievalIndex) -> None:
+        """
+        Indexes the messages evicted from the memory in `retrieval` from now on and adds the best matching
+        snippets to every request.
+
+        :param retrieval: The retrieval index of this run.
+        """
+        self.retrieval = retrieval
+
+    def _retrieve(
+        self, messages: List[OpenAIClientMessage]
+    ) -> Optional[ChatCompletionMessageParam]:
+        """
+        Searches the retrieval index with the latest messages (the previous answer and the new input).
+
+        :return: A system message with the retrieved snippets for this request only, or None.
+        """
+        if self.retrieval is None or not self.retrieval.snippets:
+            return None
+        snippets = self.retrieval.search(
+            "\n".join(self._message_text(message) for message in messages)
         )
+        if not snippets:
+            return None
+        return {
+            "role": "system",
+            "content": "\n\n".join(
+                [RETRIEVAL_HEADER] + [snippet["text"] for snippet in snippets]
+            ),
+        }
+
+    def _index_evicted(self, messages: List[OpenAIClientMessage]) -> None:
+        """
+        Adds messages that were evicted from the memory to the retrieval index, split into snippets. Tool
+        results are labeled with the call that produced them.
+        """
+        if self.retrieval is None or not messages:
+            return
+        calls: Dict[str, str] = {}
+        for message in messages:
+            for tool_call in message.get("tool_calls", []):
+                calls[tool_call["id"]] = (
+                    f"{tool_call['function']['name']}({tool_call['function']['arguments']})"
+                )
+        texts: List[str] = []
+        for message in messages:
+            if message["role"] == "system":
+                continue
+            label = message["role"].capitalize()
+            if message["role"] in ("tool", "function"):
+                label = calls.get(
+                    message.get("tool_call_id", ""), message.get("name", label)
+                )
+            text = self._message_text(message)
+            lines: List[str] = []
+            size = 0
+            for line in text.splitlines() or [text]:
+                line = line[:RETRIEVAL_SNIPPET_CHARS]
+                if lines and size + len(line) > RETRIEVAL_SNIPPET_CHARS:
+                    texts.append(f"[{label}]\n" + "\n".join(lines))
+                    lines, size = [], 0
+                lines.append(line)
+                size += len(line) + 1
+            if lines:
+                texts.append(f"[{label}]\n" + "\n".join(lines))
+        snippets: List[Snippet] = [
+            {"text": text, "tokens": tokens}
+            for text, tokens in zip(texts, self.token_counter.count_batch(texts))
+        ]
+        self.retrieval.add(snippets)
+
+    @staticmethod
+    def _message_text(message: OpenAIClientMessage) -> str:
+        parts = [message.get("content") or ""]
+        if "function_call" in message:
+            function_call = message["function_call"]
+            parts.append(
+                f"[Function call] {function_call['name']}({function_call['arguments']})"
+            )
+        for tool_call in message.get("tool_calls", []):
+            function = tool_call["function"]
+            parts.append(f"[Function call] {function['name']}({function['arguments']})")
+        return "\n".join(part for part in parts if part)
+
+    def attach_checkpoint(self, checkpoint: MemoryCheckpoint) -> None:
+        """
+        Writes every memory change to `checkpoint` from now on, starting with a compacted copy of the
+        current memory.
+
+        :param checkpoint: The checkpoint of this run.
+        """
+        self.checkpoint = checkpoint
+        checkpoint.compact(self.memory_lists())
+
+    def checkpoint_memory(self, compact: bool = False) -> None:
+        """
+        Appends the memory changes since the last call to the checkpoint, if one is attached. Called after
+        every response and plan change, so a crash loses at most the current request, whose input is
+        part of the loop state in the checkpoint.
+
+        :param compact: Rewrite the checkpoint with only the current messages instead, e.g. at the end of
+            the run. Skipped if no messages were dropped from it, since it then has no records to remove.
+        """
+        if self.checkpoint is None:
+            return
+        if compact and self.checkpoint.superseded:
+            self.checkpoint.compact(self.memory_lists())
+        else:
+            self.checkpoint.sync_lists(self.memory_lists())
 
     def get_function_schema(self, command: "Command") -> Function:
         if not hasattr(command.command_handler, "__name__"):
@@ -220,119 +952,334 @@ class OpenAIClient(Client[OpenAIClientConfig]):
         """
         Estimates the number of tokens a single message will consume when sent to the OpenAI API.
 
-        This method uses the tiktoken encoder for the specified model to calculate the token count of the message's content.
-        It also includes a fixed overhead to account for message formatting according to the ChatML format used by OpenAI.
-
-        Token accounting:
-        - 4 tokens are added for structural elements: role, name, delimiters.
-        - The actual content tokens are computed using the tokenizer.
-        - 2 additional tokens are added to account for priming tokens (<|start|> and <|end|>) commonly applied in ChatML.
+        The message is counted in the chat format of the client's model (see `TokenCounter.count_messages`
+        and the per-model `TOKEN_ACCOUNTING` table): the per-message overhead, the role, the content, the
+        name and the name and arguments of every function or tool call.
 
-        :param message: A dictionary representing a chat message with at least a 'content' field.
+        :param message: A chat message in the API format, e.g. with a 'role' and a 'content' field.
         :return: Estimated total number of tokens used by the message.
+        """
+        return self._count_tokens_batch([message])[0]
+
+    def _count_tokens_batch(self, messages: List[Dict]) -> List[int]:
+        """
+        Estimates the token count for several messages at once, see `_count_tokens`.
+
+        Text that has not been counted before is tokenized in a single `encode_batch` call.
 
-        # todo: do model aware priming
+        :param messages: Chat messages in the API format.
+        :return: Estimated number of tokens per message, in the same order.
         """
-        encoding = tiktoken.encoding_for_model(self.model)
-        num_tokens = 4
-        num_tokens += len(encoding.encode(message.get("content", "")))
-        return num_tokens + 2
+        return self.token_counter.count_messages(messages)
 
     def _append_input_to_memory(
         self,
         message: Optional[str] = None,
-        function_call: Optional[FunctionCall] = None,
+        tool_calls: Optional[List[ToolCall]] = None,
     ):
         """
-        Appends an assistant message or function call to the memory with token count.
+        Appends an assistant message and/or its tool calls to the memory with token count.
 
         - If `message` is provided, it is stored as an assistant's textual response.
-        - If `function_call` is provided, it is stored as an assistant function invocation.
+        - If `tool_calls` are provided, they are stored together as one assistant tool invocation.
+        - If both are provided, the textual response is marked `continued`, so the two messages can be
+          told apart from two separate responses (see `ReplayClient`).
 
         This ensures that all assistant outputs, whether text or tool calls, are tracked
         and contribute to token-based summarization logic.
         """
+        new_messages: List[OpenAIClientMessage] = []
+
         # Handle assistant reasoning
         if message:
-            self.memory.append(
-                {
-                    "role": "assistant",
-                    "content": message,
-                    "tokens": self._count_tokens(
-                        {"role": "assistant", "content": message}
-                    ),
-                }
-            )
+            new_messages.append({"role": "assistant", "content": message, "tokens": 0})
 
-        # Handle function call
-        if function_call:
-            arguments = function_call["arguments"]
-            self.memory.append(
+        # Handle tool calls
+        if tool_calls:
+            new_messages.append(
                 {
                     "role": "assistant",
-                    "function_call": {
-                        "name": function_call["name"],
-                        "arguments": arguments,
-                    },
-                    "tokens": self._count_tokens(
+                    "tool_calls": [
                         {
-                            "role": "assistant",
-                            "content": f"[Function call] {function_call['name']}({arguments})",
+                            "id": tool_call["id"] or "",
+                            "type": "function",
+                            "function": {
+                                "name": tool_call["name"],
+                                "arguments": tool_call["arguments"],
+                            },
                         }
-                    ),
+                        for tool_call in tool_calls
+                    ],
+                    "tokens": 0,
                 }
             )
 
+        if not new_messages:
+            return
+        if len(new_messages) == 2:
+            new_messages[0]["continued"] = True
+        for new_message, tokens in zip(
+            new_messages, self._count_tokens_batch(cast(List[Dict], new_messages))
+        ):
+            new_message["tokens"] = tokens
+            self.memory.append(new_message)
+
+    def _append_function_results(self, results: List[FunctionResult]):
+        """
+        Appends the results of the previous turn's function calls to the memory.
+
+        Results with a `call_id` are stored as 'tool' messages answering that tool call, results without
+        one as legacy 'function' messages. All outputs are token-counted in one batch.
+
+        :param results: The function results, in the order of the tool calls.
+        """
+        new_messages: List[OpenAIClientMessage] = []
+        for result in results:
+            call_id = result.get("call_id")
+            if isinstance(call_id, str) and call_id:
+                new_messages.append(
+                    {
+                        "role": "tool",
+                        "tool_call_id": call_id,
+                        "name": result["name"],
+                        "content": result["output"],
+                        "tokens": 0,
+                    }
+                )
+            else:
+                new_messages.append(
+                    {
+                        "role": "function",
+                        "name": result["name"],
+                        "content": result["output"],
+                        "tokens": 0,
+                    }
+                )
+        # count what is sent: the name of a tool message is not part of the request
+        token_counts = self._count_tokens_batch(
+            [
+                cast(Dict, self._message_to_param(new_message))
+                for new_message in new_messages
+            ]
+        )
+        for new_message, tokens in zip(new_messages, token_counts):
+            new_message["tokens"] = tokens
+            self.memory.append(new_message)
+
     def _maybe_summarize_memory(self):
         """
-        Summarizes memory or summary memory if their token limits are exceeded.
+        Compacts memory without blocking the agent loop whenever possible.
 
-        If `self.memory` exceeds `memory_max_tokens`, it is split and the older part summarized.
-        The resulting summary is appended to `summary_memory`.
+        - A finished background summary is swapped in: summarized messages are removed from the front of
+          `memory` and their summary is appended to `summary_memory`, merged summaries replace their tier.
+        - If `memory` or `summary_memory` has reached its hard token limit, a running background summary is
+          awaited and, if the list is still over the limit, summarized synchronously.
+        - Otherwise, once `memory` exceeds its soft watermark (`summary_soft_limit_ratio` of its limit), the
+          older messages beyond half the limit are summarized on a background worker. Summary tiers that
+          are due for a merge are merged on the worker as well.
 
-        If `summary_memory` exceeds `summary_memory_max_tokens`, it too is summarized recursively
+        `summary_memory` is a tree of three tiers, oldest first: one global summary, epoch summaries and
+        window summaries (one per memory compaction). When there are more than `summary_epoch_size` window
+        summaries, the oldest of them are merged into an epoch summary; when there are more than
+        `summary_global_size` epoch summaries, the oldest of them are merged into the global summary. Only
+        the affected tier is summarized again, so the tokens per compaction don't grow with the run.
         """
-        memory_tokens = sum([message["tokens"] for message in self.memory])
-        if memory_tokens > self.memory_max_tokens:
-            old_memory, self.memory = self._split_on_token_limit(
-                self.memory, self.memory_max_tokens
-            )
-            summary = self._summarize_memory(old_memory)
-            summary_content = "Summary of previous conversation: " + summary
-            self.summary_memory.append(
-                {
-                    "role": "system",
-                    "content": summary_content,
-                    "tokens": self._count_tokens(
-                        {"role": "system", "content": summary_content}
-                    ),
-                }
+        over_limit = self._over_token_limit()
+        self._collect_background_summary(wait=over_limit)
+        if self._over_token_limit():
+            self._summarize_over_limit()
+        if self.summary_soft_limit_ratio >= 1.0:
+            self._merge_summaries(force=False)
+        elif self._pending_summary is None:
+            self._start_background_summary()
+
+    def _over_token_limit(self) -> bool:
+        return (
+            self.memory.tokens > self.memory_max_tokens
+            or self.summary_memory.tokens > self.summary_memory_max_tokens
+        )
+
+    def _start_background_summary(self) -> None:
+        """
+        Submits the older part of `memory` to the summarization worker if it exceeds its soft watermark, or
+        else the summaries that are due for a merge. The messages stay in place until the summary is
+        swapped in.
+        """
+        old_messages: List[Any] = []
+        target = "memory"
+        if self.memory.tokens > self.memory_max_tokens * self.summary_soft_limit_ratio:
+            old_messages = self._split_on_token_limit(
+                self.memory, self.memory_max_tokens // 2
+            )[0]
+        if not old_messages:
+            target = "summary_memory"
+            old_messages = self._summaries_to_merge(force=False)
+        if not old_messages:
+            return
+        if self._summary_executor is None:
+            self._summary_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="fellow-summary"
             )
+        summarize: Callable[[], str] = (
+            partial(self._summarize_memory, old_messages, MERGE_INSTRUCTION)
+            if target == "summary_memory"
+            else partial(self._summarize_memory, old_messages)
+        )
+        self._pending_summary = (
+            target,
+            old_messages,
+            self._summary_executor.submit(summarize),
+        )
+
+    def _collect_background_summary(self, wait: bool = False) -> None:
+        """
+        Swaps a finished background summary into `summary_memory`.
+
+        :param wait: Block until a running summary is finished.
+        """
+        if self._pending_summary is None:
+            return
+        target, old_messages, future = self._pending_summary
+        if not wait and not future.done():
+            return
+        self._pending_summary = None
+        try:
+            summary = future.result()
+        except Exception as e:
+            print(f"[WARNING] Background summarization failed: {e}")
+            return
+        if target == "summary_memory":
+            self._replace_summaries(old_messages, summary)
+            return
+        if len(self.memory) < len(old_messages) or any(
+            message is not old_message
+            for message, old_message in zip(self.memory, old_messages)
+        ):
+            # the memory was changed in the meantime, the summary no longer matches its head
+            return
+        self.memory = self.memory[len(old_messages) :]
+        self._append_summary(summary, len(old_messages))
+        self._index_evicted(old_messages)
+
+    def _summary_message(
+        self, summary: str, tier: Literal["window", "epoch", "global"], summarized: int
+    ) -> OpenAIClientMessage:
+        summary_content = "Summary of previous conversation: " + summary
+        return {
+            "role": "system",
+            "content": summary_content,
+            "tokens": self._count_tokens(
+                {"role": "system", "content": summary_content}
+            ),
+            "tier": tier,
+            "summarized": summarized,
+        }
+
+    def _append_summary(self, summary: str, summarized: int) -> None:
+        self.summary_memory.append(self._summary_message(summary, "window", summarized))
+
+    def _summaries_to_merge(self, force: bool) -> List[OpenAIClientMessage]:
+        """
+        Picks the summaries that are merged next: the oldest window summaries if there are more than
+        `summary_epoch_size`, otherwise the global summary and the oldest epoch summaries if there are more
+        than `summary_global_size` epoch summaries.
+
+        :param force: `summary_memory` is over its token limit: merge all but the latest window summary, or
+            else the global and all epoch summaries, even if no tier is full yet.
+        :return: A run of consecutive summaries, or an empty list if nothing is merged.
+        """
+        windows = [
+            m for m in self.summary_memory if m.get("tier", "window") == "window"
+        ]
+        older = [m for m in self.summary_memory if m.get("tier", "window") != "window"]
+        epochs = [m for m in older if m.get("tier") == "epoch"]
+        if len(windows) > self.summary_epoch_size:
+            return windows[: self.summary_epoch_size]
+        if len(epochs) > self.summary_global_size:
+            return older[: len(older) - len(epochs) + self.summary_global_size]
+        if force:
+            if len(windows) > 1:
+                return windows[:-1]
+            if len(older) > 1:
+                return older
+        return []
 
-        summary_memory_tokens = sum(
-            [message["tokens"] for message in self.summary_memory]
+    def _replace_summaries(
+        self, old_summaries: List[OpenAIClientMessage], summary: str
+    ) -> None:
+        """
+        Replaces a run of consecutive summaries with their merged summary: window summaries become an epoch
+        summary, anything else becomes the global summary.
+        """
+        start = next(
+            (
+                i
+                for i, message in enumerate(self.summary_memory)
+                if message is old_summaries[0]
+            ),
+            None,
         )
-        if summary_memory_tokens > self.summary_memory_max_tokens:
-            old_summary_memory, self.summary_memory = self._split_on_token_limit(
-                self.summary_memory, self.summary_memory_max_tokens
+        end = start + len(old_summaries) if start is not None else 0
+        if start is None or any(
+            message is not old_summary
+            for message, old_summary in zip(
+                self.summary_memory[start:end], old_summaries
             )
-            summary = self._summarize_memory(old_summary_memory)
-            summary_content = "Summary of previous conversation: " + summary
-            self.summary_memory.append(
-                {
-                    "role": "system",
-                    "content": summary_content,
-                    "tokens": self._count_tokens(
-                        {"role": "system", "content": summary_content}
-                    ),
-                }
+        ):
+            # the summaries were changed in the meantime
+            return
+        tier: Literal["window", "epoch", "global"] = (
+            "epoch"
+            if all(m.get("tier", "window") == "window" for m in old_summaries)
+            else "global"
+        )
+        merged = self._summary_message(
+            summary, tier, sum(m.get("summarized", 0) for m in old_summaries)
+        )
+        self.summary_memory = (
+            self.summary_memory[:start] + [merged] + self.summary_memory[end:]
+        )
+
+    def _merge_summaries(self, force: bool) -> None:
+        """
+        Synchronously merges summary tiers, see `_summaries_to_merge`, until none is due.
+        """
+        while old_summaries := self._summaries_to_merge(force):
+            self._replace_summaries(
+                old_summaries, self._summarize_memory(old_summaries, MERGE_INSTRUCTION)
             )
+            if force and self.summary_memory.tokens <= self.summary_memory_max_tokens:
+                return
+
+    def _summarize_over_limit(self):
+        """
+        Summarizes memory or summary memory synchronously if their token limits are exceeded.
+
+        If `self.memory` exceeds `memory_max_tokens`, it is split and the older part summarized.
+        The resulting summary is appended to `summary_memory` as a window summary.
 
-    def _summarize_memory(self, messages: List[OpenAIClientMessage]) -> str:
+        If `summary_memory` exceeds `summary_memory_max_tokens`, its tiers are merged until it fits.
         """
-        Uses the OpenAI API to summarize a list of chat messages for context compression.
+        if self.memory.tokens > self.memory_max_tokens:
+            old_memory, self.memory = self._split_on_token_limit(
+                self.memory, self.memory_max_tokens
+            )
+            self._append_summary(self._summarize_memory(old_memory), len(old_memory))
+            self._index_evicted(old_memory)
+
+        if self.summary_memory.tokens > self.summary_memory_max_tokens:
+            self._merge_summaries(force=True)
+
+    def _summarize_memory(
+        self,
+        messages: List[OpenAIClientMessage],
+        instruction: str = SUMMARY_INSTRUCTION,
+    ) -> str:
+        """
+        Uses the OpenAI API to summarize a list of chat messages (or summaries) for context compression.
 
         :param messages: List of messages to summarize.
+        :param instruction: The system instruction of the summary request.
         :return: Summary string generated by the model.
         """
 
@@ -347,38 +1294,77 @@ class OpenAIClient(Client[OpenAIClientConfig]):
                 fc = msg["function_call"]
                 parts.append(f"[Function call] {fc['name']}({fc['arguments']})")
 
+            for tool_call in msg.get("tool_calls", []):
+                fc = tool_call["function"]
+                parts.append(f"[Function call] {fc['name']}({fc['arguments']})")
+
             return f"{role}: {' | '.join(parts) if parts else '[No content]'}"
 
+        return self.summarize(
+            "\n".join(stringify(m) for m in messages), instruction=instruction
+        )
+
+    def summarize(self, content: str, instruction: str) -> str:
+        """
+        Summarizes `content` in a one-shot request with `summary_model`, limited to
+        `summary_max_output_tokens`. The request does not touch the conversation memory.
+
+        :param content: The text to summarize.
+        :param instruction: The system instruction describing what to summarize.
+        :return: Summary string generated by the model.
+        """
         summary_prompt: List[ChatCompletionMessageParam] = [
-            {
-                "role": "system",
-                "content": "Summarize the following conversation for context retention.",
-            },
-            {"role": "user", "content": "\n".join(stringify(m) for m in messages)},
+            {"role": "system", "content": instruction},
+            {"role": "user", "content": content},
         ]
-
-        response = openai.chat.completions.create(
-            model=self.model,
-            messages=summary_prompt,
-            # todo: this could optionally use a different less expensive model, because summarization is not as difficult
+        params: Dict[str, Any] = {
+            "model": self.summary_model,
+            "messages": summary_prompt,
+        }
+        if self.summary_max_output_tokens:
+            params["max_completion_tokens"] = self.summary_max_output_tokens
+        start = time.perf_counter()
+        cache_key, response = self._cache_lookup(params)
+        cache_hit = response is not None
+        if response is None:
+            prompt_tokens = (
+                self.token_counter.count(instruction)
+                + self.token_counter.count(content)
+                if self.summary_scheduler.token_bucket
+                else 0
+            )
+            response = self.summary_scheduler.call(
+                lambda: self.sync_client.chat.completions.create(**params),
+                prompt_tokens,
+            )
+            self._cache_store(cache_key, response)
+        self._record_usage(
+            self.summary_model, time.perf_counter() - start, response, cache_hit
         )
         return response.choices[0].message.content or ""
 
     @staticmethod
     def _split_on_token_limit(
-        messages: List[Dict], token_limit: int
-    ) -> Tuple[List[Dict], List[Dict]]:
+        messages: List[Any], token_limit: int
+    ) -> Tuple[TokenHistory, TokenHistory]:
         """
         Splits the messages into two lists based on the token limit. `second` will contain the *last* messages
-        that fit into the token limit. `first` will contain all earlier messages.
+        that fit into the token limit. `first` will contain all earlier messages. The split point is found by
+        binary search on the prefix token sums of the TokenHistory.
+
+        Tool results are never separated from the assistant message that requested them: if `second` would
+        start with 'tool' messages, they are moved to `first` as well.
 
         :param messages: List of messages to split
         :param token_limit: token limit for the split
         :return: (first, second)
         """
-        token_count = 0
-        for i in range(len(messages) - 1, -1, -1):
-            token_count += messages[i]["tokens"]
-            if token_count > token_limit:
-                return messages[: i + 1], messages[i + 1 :]
-        return [], messages
+        history = (
+            messages if isinstance(messages, TokenHistory) else TokenHistory(messages)
+        )
+        split = history.split_index(token_limit)
+        if split == 0:
+            return history[:0], history
+        while split < len(history) and history[split]["role"] == "tool":
+            split += 1
+        return history[:split], history[split:]
@@ -0,0 +1,443 @@
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from typing_extensions import Self
+
+from fellow.clients.Client import (
+    ChatResult,
+    ChatUsage,
+    Client,
+    ClientConfig,
+    Function,
+    FunctionResult,
+    ToolCall,
+)
+from fellow.clients.UsageTracker import UsageTracker
+
+if TYPE_CHECKING:  # pragma: no cover
+    from fellow.commands.Command import Command  # pragma: no cover
+
+
+class ReplayClientConfig(ClientConfig):
+    """
+    Configuration for ReplayClient.
+    """
+
+    fixture: str
+    """
+    File the responses are replayed from (or recorded to, see `record_client`). Either a fixture of the e2e mock
+    server (`{"responses": [<chat completion>, ...]}`) or a `memory.json` written by the OpenAIClient, whose
+    assistant messages are replayed in order (one response per turn, see `_merge_turns`).
+    """
+    model: str = "replay"
+    """
+    Model name the replayed responses are reported under.
+    """
+    latency: float = 0.0
+    """
+    Synthetic latency of every response in seconds.
+    """
+    latency_per_token: float = 0.0
+    """
+    Additional synthetic latency per completion token in seconds, to mimic slower long answers.
+    """
+    record_client: Optional[str] = None
+    """
+    Record instead of replaying: every turn is sent to this built-in client (e.g. `openai`) and its response is
+    appended to `fixture`.
+    """
+    record_config: Dict[str, Any] = {}
+    """
+    Config of `record_client`, e.g. `{"model": "gpt-4o", "memory_max_tokens": 15000, ...}`.
+    """
+
+
+class ReplayClient(Client[ReplayClientConfig]):
+    """
+    Offline client that answers from recorded responses in-process, without network, API keys or a mock server.
+    Useful to benchmark the agent loop, commands and logging, and for deterministic CI runs.
+
+    With `record_client`, a real client answers instead and every response is written to the fixture, so a real
+    run becomes a fixture that can be replayed (also by the e2e mock server).
+    """
+
+    config_class = ReplayClientConfig
+
+    def __init__(self, config: ReplayClientConfig):
+        self.fixture = Path(config.fixture)
+        self.model = config.model
+        self.latency = config.latency
+        self.latency_per_token = config.latency_per_token
+        self.usage = UsageTracker()
+        self.memory: List[Dict[str, Any]] = [
+            {"role": "system", "content": config.system_content}
+        ]
+        self.recorder: Optional[Client] = None
+        self.recorded: List[Dict[str, Any]] = []
+        if config.record_client:
+            # imported here, the client registry imports this module
+            from fellow.clients import ALL_CLIENTS
+
+            client_class = ALL_CLIENTS.get(config.record_client)
+            if client_class is None or client_class is ReplayClient:
+                raise ValueError(
+                    f"[ERROR] Client '{config.record_client}' can't be recorded"
+                )
+            self.recorder = client_class.create(
+                client_class.config_class(
+                    system_content=config.system_content, **config.record_config
+                )
+            )
+            # usage and connection reuse are reported for the recorded client
+            self.usage = getattr(self.recorder, "usage", self.usage)
+            self.http_pool = getattr(self.recorder, "http_pool", None)
+            self.responses: List[ChatResult] = []
+        else:
+            self.responses = self.load_responses(self.fixture)
+        self.index = 0
+
+    @classmethod
+    def create(cls, config: ReplayClientConfig) -> Self:
+        return cls(config)
+
+    @staticmethod
+    def load_responses(path: Path) -> List[ChatResult]:
+        """
+        Reads the responses of a fixture or memory file.
+
+        :param path: The fixture (`{"responses": [...]}`) or memory (list of messages) file.
+        :return: The recorded responses in order.
+        """
+        if not path.is_file():
+            raise ValueError(f"[ERROR] Replay fixture not found: {path}")
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if isinstance(data, dict):
+            messages = [
+                {**response["choices"][0]["message"], "usage": response.get("usage")}
+                for response in data.get("responses", [])
+                # error responses only exist to test retries against the mock server
+                if "error_status" not in response
+            ]
+        else:
+            messages = ReplayClient._merge_turns(data)
+        return [ReplayClient._to_chat_result(message) for message in messages]
+
+    @staticmethod
+    def _merge_turns(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Collects the assistant messages of a memory file, one per response. The OpenAIClient memory stores a
+        response with reasoning and function calls as two assistant messages, the reasoning marked
+        `continued`; these are merged.
+
+        :param messages: The messages of a memory file, in order.
+        :return: One assistant message per recorded response.
+        :raises ValueError: If the memory was summarized, the summarized responses can't be replayed.
+        """
+        if any(
+            "tier" in message
+            or str(message.get("content") or "").startswith(
+                "Summary of previous conversation: "
+            )
+            for message in messages
+            if message.get("role") == "system"
+        ):
+            raise ValueError(
+                "[ERROR] The memory was summarized, its responses can't be replayed. "
+                "Record a fixture with `record_client` instead."
+            )
+        merged: List[Dict[str, Any]] = []
+        continued = False
+        for message in messages:
+            if message.get("role") != "assistant":
+                continued = False
+                continue
+            if continued and (
+                message.get("tool_calls") or message.get("function_call")
+            ):
+                merged[-1] = {**message, "content": merged[-1].get("content")}
+            else:
+                merged.append(message)
+            continued = bool(message.get("continued"))
+        return merged
+
+    @staticmethod
+    def _to_chat_result(message: Dict[str, Any]) -> ChatResult:
+        tool_calls: List[ToolCall] = [
+            {
+                "id": tool_call.get("id"),
+                "name": tool_call["function"]["name"],
+                "arguments": tool_call["function"]["arguments"],
+            }
+            for tool_call in message.get("tool_calls") or []
+        ]
+        if not tool_calls and message.get("function_call"):
+            tool_calls = [
+                {
+                    "id": None,
+                    "name": message["function_call"]["name"],
+                    "arguments": message["function_call"]["arguments"],
+                }
+            ]
+        result: ChatResult = {
+            "message": message.get("content"),
+            "function_name": tool_calls[0]["name"] if tool_calls else None,
+            "function_args": tool_calls[0]["arguments"] if tool_calls else None,
+            "function_calls": tool_calls,
+        }
+        usage = message.get("usage") or {}
+        result["usage"] = {
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+        }
+        if "estimated_prompt_tokens" in usage:
+            result["usage"]["estimated_prompt_tokens"] = usage[
+                "estimated_prompt_tokens"
+            ]
+        return result
+
+    def chat(
+        self,
+        functions: List[Function],
+        message: str = "",
+        function_result: Optional[FunctionResult] = None,
+        function_results: Optional[List[FunctionResult]] = None,
+    ) -> ChatResult:
+        """
+        Answers with the next recorded response after the synthetic latency, or records the response of
+        `record_client`.
+
+        :return: The recorded ChatResult.
+        """
+        start = time.perf_counter()
+        if self.recorder is not None:
+            result = self.recorder.chat(
+                functions, message, function_result, function_results
+            )
+            self._record(result)
+            return result
+        self._append_input(message, function_result, function_results)
+        result = self._next_response()
+        time.sleep(self._synthetic_latency(result))
+        return self._handle_response(result, time.perf_counter() - start)
+
+    async def achat(
+        self,
+        functions: List[Function],
+        message: str = "",
+        function_result: Optional[FunctionResult] = None,
+        function_results: Optional[List[FunctionResult]] = None,
+    ) -> ChatResult:
+        """
+        Async variant of `chat`, the synthetic latency is awaited without blocking the event loop.
+        """
+        start = time.perf_counter()
+        if self.recorder is not None:
+            result = await self.recorder.achat(
+                functions, message, function_result, function_results
+            )
+            self._record(result)
+            return result
+        self._append_input(message, function_result, function_results)
+        result = self._next_response()
+        await asyncio.sleep(self._synthetic_latency(result))
+        return self._handle_response(result, time.perf_counter() - start)
+
+    def _next_response(self) -> ChatResult:
+        if self.index >= len(self.responses):
+            raise ValueError(
+                f"[ERROR] No more recorded responses in {self.fixture} "
+                f"({len(self.responses)} replayed)"
+            )
+        result = self.responses[self.index]
+        self.index += 1
+        return result
+
+    def _synthetic_latency(self, result: ChatResult) -> float:
+        return self.latency + self.latency_per_token * self._completion_tokens(result)
+
+    @staticmethod
+    def _completion_tokens(result: ChatResult) -> int:
+        completion_tokens = result.get("usage", {}).get("completion_tokens")
+        if completion_tokens:
+            return completion_tokens
+        # estimate with 4 characters per token if the recording has no usage
+        characters = len(result["message"] or "") + sum(
+            len(call["arguments"]) for call in result.get("function_calls", [])
+        )
+        return characters // 4
+
+    def _handle_response(self, result: ChatResult, latency: float) -> ChatResult:
+        recorded_usage = result.get("usage", {})
+        usage: ChatUsage = {
+            "model": self.model,
+            "latency": latency,
+            "time_to_first_token": None,
+            "prompt_tokens": recorded_usage.get("prompt_tokens", 0),
+            "completion_tokens": recorded_usage.get("completion_tokens", 0),
+        }
+        if "estimated_prompt_tokens" in recorded_usage:
+            usage["estimated_prompt_tokens"] = recorded_usage["estimated_prompt_tokens"]
+        self.usage.record(
+            self.model,
+            latency,
+            prompt_tokens=usage["prompt_tokens"],
+            completion_tokens=usage["completion_tokens"],
+        )
+        function_calls = self._function_calls(result)
+        assistant_message: Dict[str, Any] = {
+            "role": "assistant",
+            "content": result["message"],
+        }
+        if function_calls:
+            assistant_message["tool_calls"] = [
+                {
+                    "id": call["id"],
+                    "type": "function",
+                    "function": {"name": call["name"], "arguments": call["arguments"]},
+                }
+                for call in function_calls
+            ]
+        self.memory.append(assistant_message)
+        return {
+            "message": result["message"],
+            "function_name": result["function_name"],
+            "function_args": result["function_args"],
+            "function_calls": function_calls,
+            "usage": usage,
+        }
+
+    @staticmethod
+    def _function_calls(result: ChatResult) -> List[ToolCall]:
+        function_calls = result.get("function_calls")
+        if function_calls is not None:
+            return function_calls
+        if result["function_name"] and result["function_args"]:
+            return [
+                {
+                    "id": None,
+                    "name": result["function_name"],
+                    "arguments": result["function_args"],
+                }
+            ]
+        return []
+
+    def _append_input(
+        self,
+        message: str,
+        function_result: Optional[FunctionResult],
+        function_results: Optional[List[FunctionResult]],
+    ) -> None:
+        if message:
+            self.memory.append({"role": "user", "content": message})
+        for result in ([function_result] if function_result else []) + (
+            function_results or []
+        ):
+            self.memory.append(
+                {
+                    "role": "tool",
+                    "tool_call_id": result.get("call_id"),
+                    "name": result["name"],
+                    "content": result["output"],
+                }
+            )
+
+    def _record(self, result: ChatResult) -> None:
+        """
+        Appends the response as a chat completion to the fixture. The fixture is rewritten after every turn,
+        so an aborted run still leaves a usable recording.
+        """
+        function_calls = self._function_calls(result)
+        usage = result.get("usage", {})
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        recorded_usage: Dict[str, int] = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        if "estimated_prompt_tokens" in usage:
+            # kept next to the provider's count to validate the token accounting of the recorded client
+            recorded_usage["estimated_prompt_tokens"] = usage["estimated_prompt_tokens"]
+        index = len(self.recorded)
+        self.recorded.append(
+            {
+                "id": f"replay-{index}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": usage.get("model", self.model),
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "tool_calls" if function_calls else "stop",
+                        "message": {
+                            "role": "assistant",
+                            "content": result["message"],
+                            "tool_calls": [
+                                {
+                                    "id": call["id"] or f"call_{index}_{number}",
+                                    "type": "function",
+                                    "function": {
+                                        "name": call["name"],
+                                        "arguments": call["arguments"],
+                                    },
+                                }
+                                for number, call in enumerate(function_calls)
+                            ]
+                            or None,
+                        },
+                    }
+                ],
+                "usage": recorded_usage,
+            }
+        )
+        self.fixture.parent.mkdir(parents=True, exist_ok=True)
+        self.fixture.write_text(
+            json.dumps({"responses": self.recorded}, indent=2), encoding="utf-8"
+        )
+
+    def summarize(self, content: str, instruction: str) -> str:
+        """
+        Summaries are not part of the recording: the recorded client summarizes while recording, during
+        replay the beginning of the content stands in for the summary.
+
+        :param content: The text to summarize.
+        :param instruction: The system instruction describing what to summarize.
+        :return: The summary.
+        """
+        summarize = getattr(self.recorder, "summarize", None)
+        if summarize is not None:
+            return summarize(content, instruction)
+        return content[:500]
+
+    def store_memory(self, filename: str) -> None:
+        """
+        Saves the replayed conversation in the format of the OpenAIClient memory, so it can be replayed again.
+
+        :param filename: Path to the file where the memory will be stored.
+        """
+        if self.recorder is not None:
+            self.recorder.store_memory(filename)
+            return
+        with open(filename, "w") as f:  # noinspection PyTypeChecker
+            json.dump(self.memory, f, indent=2)
+
+    def set_plan(self, plan: str) -> None:
+        if self.recorder is not None:
+            self.recorder.set_plan(plan)
+        self.memory.append({"role": "system", "content": plan})
+
+    def get_function_schema(self, command: "Command") -> Function:
+        if self.recorder is not None:
+            return self.recorder.get_function_schema(command)
+        if not hasattr(command.command_handler, "__name__"):
+            raise ValueError("[ERROR] Command handler is not callable with __name__.")
+        if command.command_handler.__doc__ is None:
+            raise ValueError("[ERROR] Command handler docstring is empty")
+        return {
+            "name": command.command_handler.__name__,
+            "description": command.command_handler.__doc__.strip(),
+            "parameters": command.input_type.model_json_schema(),
+        }
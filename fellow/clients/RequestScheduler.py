@@ -0,0 +1,272 @@
+import asyncio
+import email.utils
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+import httpx
+import openai
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+
+class TokenBucket:
+    """
+    A token bucket that refills continuously at `capacity` tokens per minute.
+
+    Reservations may overdraw the bucket: the caller is told how long to wait until its reservation is
+    covered, so concurrent callers are queued fairly instead of polling.
+    """
+
+    def __init__(self, capacity: int, clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.rate = capacity / 60.0
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """
+        Takes `amount` tokens from the bucket.
+
+        :param amount: The number of tokens, capped at the capacity so a single large request can't block
+            forever.
+        :return: Seconds to wait until the reserved tokens are available.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= min(amount, self.capacity)
+            return max(0.0, -self._tokens / self.rate)
+
+
+class RequestScheduler:
+    """
+    Schedules requests to a model provider within its rate limits.
+
+    Requests and (estimated) prompt tokens are limited by token buckets for `requests_per_minute` and
+    `tokens_per_minute`. Rate limit errors (429), timeouts, conflicts and server errors (5xx) as well as
+    connection errors are retried up to `max_retries` times. The delay is taken from the `Retry-After` /
+    `retry-after-ms` header of the response if present, otherwise it is an exponential backoff with full
+    jitter. While a `Retry-After` delay is pending, all requests sharing the scheduler wait as well.
+
+    Clients sharing a quota should share a scheduler via `RequestScheduler.for_key()`, so several tasks in
+    one process don't exceed the quota together.
+    """
+
+    _instances: Dict[Tuple[Any, ...], "RequestScheduler"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.request_bucket = (
+            TokenBucket(requests_per_minute, clock) if requests_per_minute else None
+        )
+        self.token_bucket = (
+            TokenBucket(tokens_per_minute, clock) if tokens_per_minute else None
+        )
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retries = 0
+        self.throttled_seconds = 0.0
+        self._clock = clock
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_key(
+        cls,
+        key: str,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+    ) -> "RequestScheduler":
+        """
+        Returns the process-wide scheduler for the given quota key and settings, creating it on first use.
+
+        :param key: Identifies the quota, e.g. "openai:gpt-4o".
+        :param requests_per_minute: Maximum requests per minute, unlimited if not set.
+        :param tokens_per_minute: Maximum prompt tokens per minute, unlimited if not set.
+        :param max_retries: Maximum number of retries per request.
+        :param backoff_base: Backoff of the first retry in seconds, doubled on every further retry.
+        :param backoff_max: Upper bound of a single backoff or `Retry-After` delay in seconds.
+        :return: The shared RequestScheduler instance.
+        """
+        instance_key = (
+            key,
+            requests_per_minute,
+            tokens_per_minute,
+            max_retries,
+            backoff_base,
+            backoff_max,
+        )
+        with cls._instances_lock:
+            scheduler = cls._instances.get(instance_key)
+            if scheduler is None:
+                scheduler = cls(
+                    requests_per_minute,
+                    tokens_per_minute,
+                    max_retries,
+                    backoff_base,
+                    backoff_max,
+                )
+                cls._instances[instance_key] = scheduler
+            return scheduler
+
+    def call(self, request: Callable[[], T], tokens: int = 0) -> T:
+        """
+        Runs `request` once its rate limit allows it, retrying it on retryable errors.
+
+        :param request: Sends the request and returns its response.
+        :param tokens: Estimated prompt tokens of the request.
+        :return: The response of the first successful attempt.
+        """
+        attempt = 0
+        while True:
+            time.sleep(self._acquire(tokens))
+            try:
+                return request()
+            except Exception as error:
+                delay = self._retry_delay(error, attempt)
+                if delay is None:
+                    raise
+            attempt += 1
+            time.sleep(delay)
+
+    async def acall(self, request: Callable[[], Awaitable[T]], tokens: int = 0) -> T:
+        """
+        Async variant of `call`, waiting with `asyncio.sleep` so other requests can proceed meanwhile.
+
+        :param request: Creates the awaitable sending the request, called once per attempt.
+        :param tokens: Estimated prompt tokens of the request.
+        :return: The response of the first successful attempt.
+        """
+        attempt = 0
+        while True:
+            await asyncio.sleep(self._acquire(tokens))
+            try:
+                return await request()
+            except Exception as error:
+                delay = self._retry_delay(error, attempt)
+                if delay is None:
+                    raise
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def _acquire(self, tokens: int) -> float:
+        """
+        Reserves one request and `tokens` tokens.
+
+        :return: Seconds to wait before sending the request.
+        """
+        wait = 0.0
+        if self.request_bucket:
+            wait = max(wait, self.request_bucket.reserve(1))
+        if self.token_bucket and tokens:
+            wait = max(wait, self.token_bucket.reserve(tokens))
+        with self._lock:
+            wait = max(wait, self._paused_until - self._clock())
+            self.throttled_seconds += wait
+        return wait
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """
+        Decides whether a failed attempt is retried.
+
+        :param error: The error raised by the attempt.
+        :param attempt: The number of retries so far.
+        :return: Seconds to wait before the next attempt, or None if the error is not retried.
+        """
+        if attempt >= self.max_retries or not self.is_retryable(error):
+            return None
+        retry_after = self.retry_after(error)
+        if retry_after is not None:
+            delay = min(retry_after, self.backoff_max)
+            with self._lock:
+                self._paused_until = max(self._paused_until, self._clock() + delay)
+        else:
+            delay = random.uniform(
+                0, min(self.backoff_max, self.backoff_base * 2**attempt)
+            )
+        with self._lock:
+            self.retries += 1
+        print(
+            f"[WARNING] Request failed ({self._describe(error)}), "
+            f"retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})"
+        )
+        return delay
+
+    @staticmethod
+    def status_code(error: Exception) -> Optional[int]:
+        """
+        :return: The HTTP status code of a provider error (openai `status_code`, google-genai `code`).
+        """
+        for attribute in ("status_code", "code"):
+            status = getattr(error, attribute, None)
+            if isinstance(status, int):
+                return status
+        return None
+
+    @classmethod
+    def is_retryable(cls, error: Exception) -> bool:
+        """
+        :return: True for rate limit, timeout, conflict, server and connection errors.
+        """
+        if isinstance(error, (openai.APIConnectionError, httpx.TransportError)):
+            return True
+        status = cls.status_code(error)
+        return status is not None and (
+            status in RETRYABLE_STATUS_CODES or status >= 500
+        )
+
+    @staticmethod
+    def retry_after(error: Exception) -> Optional[float]:
+        """
+        Reads the delay requested by the provider from the `retry-after-ms` or `retry-after` header
+        (seconds or HTTP date) of the error response.
+
+        :return: The delay in seconds, or None if the response has no valid header.
+        """
+        headers = getattr(getattr(error, "response", None), "headers", None)
+        if not headers:
+            return None
+        try:
+            retry_after_ms = headers.get("retry-after-ms")
+            if retry_after_ms is not None:
+                return max(0.0, float(retry_after_ms) / 1000)
+        except (TypeError, ValueError):
+            pass
+        retry_after = headers.get("retry-after")
+        if retry_after is None:
+            return None
+        try:
+            return max(0.0, float(retry_after))
+        except (TypeError, ValueError):
+            pass
+        try:
+            retry_at = email.utils.parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, retry_at.timestamp() - time.time())
+
+    @classmethod
+    def _describe(cls, error: Exception) -> str:
+        status = cls.status_code(error)
+        return f"{status}" if status is not None else type(error).__name__
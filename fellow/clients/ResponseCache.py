@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from openai import NotGiven
+
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache for model responses.
+
+    Responses are stored as one JSON file per request, named by a SHA-256 hash of the canonical JSON of the
+    request parameters (model, messages, tools, ...). Rerunning a task with an identical conversation prefix
+    therefore serves every request from disk. The cache is bounded by `max_bytes`: the least recently used
+    entries are evicted first. Instances are shared per directory via `ResponseCache.for_directory()`.
+    """
+
+    _instances: Dict[Tuple[Path, int], "ResponseCache"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, directory: Path, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._load_index()
+
+    @classmethod
+    def for_directory(
+        cls, directory: Path, max_bytes: int = 256 * 1024 * 1024
+    ) -> "ResponseCache":
+        """
+        Returns the process-wide cache for the given directory and size bound, creating it on first use.
+
+        :param directory: The cache directory.
+        :param max_bytes: Maximum total size of all cached responses.
+        :return: The shared ResponseCache instance.
+        """
+        key = (Path(directory).resolve(), max_bytes)
+        with cls._instances_lock:
+            cache = cls._instances.get(key)
+            if cache is None:
+                cache = cls(directory, max_bytes)
+                cls._instances[key] = cache
+            return cache
+
+    @staticmethod
+    def key(params: Mapping[str, Any]) -> str:
+        """
+        Computes the stable cache key of a request. Parameters that are not given are ignored and dict keys
+        are sorted, so the key only depends on what is actually sent to the model.
+
+        :param params: The request parameters.
+        :return: The hex digest identifying the request.
+        """
+        payload = {
+            name: value
+            for name, value in params.items()
+            if not isinstance(value, NotGiven)
+        }
+        canonical = json.dumps(
+            payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+        )
+        return hashlib.sha256(canonical.encode("utf-8", "surrogatepass")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Returns the cached response for `key` and marks it as recently used.
+
+        :param key: The cache key.
+        :return: The stored response, or None on a cache miss.
+        """
+        path = self._path(key)
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            try:
+                content = path.read_text(encoding="utf-8")
+                os.utime(path)
+            except OSError:
+                self._size -= self._entries.pop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return content
+
+    def put(self, key: str, content: str) -> None:
+        """
+        Stores a response and evicts the least recently used entries if the cache exceeds `max_bytes`.
+        The file is written atomically, so concurrent readers never see a partial response.
+
+        :param key: The cache key.
+        :param content: The response to store.
+        """
+        path = self._path(key)
+        data = content.encode("utf-8")
+        with self._lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self._size += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                old_key, old_size = self._entries.popitem(last=False)
+                self._size -= old_size
+                self._path(old_key).unlink(missing_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _load_index(self) -> None:
+        """
+        Reads the existing entries, oldest access first, so the LRU order survives restarts.
+        """
+        if not self.directory.is_dir():
+            return
+        entries = []
+        for path in self.directory.glob("*/*.json"):
+            stat = path.stat()
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._size += size
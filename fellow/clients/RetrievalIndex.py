@@ -0,0 +1,179 @@
+import heapq
+import json
+import math
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import IO, Dict, List, Optional, Set, Tuple, TypedDict
+
+_WORD = re.compile(r"[a-z_][a-z0-9_]*|[0-9]+")
+
+
+class Snippet(TypedDict):
+    text: str
+    """
+    The text of the snippet.
+    """
+
+    tokens: int
+    """
+    Token count of the text.
+    """
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits a text into lowercase terms. Identifiers are kept whole and also split at underscores, so
+    `view_file` matches `view_file`, `view` and `file`.
+
+    :param text: The text.
+    :return: The terms, in order and with repetitions.
+    """
+    terms: List[str] = []
+    for word in _WORD.findall(text.lower()):
+        if len(word) > 1:
+            terms.append(word)
+        if "_" in word:
+            terms.extend(part for part in word.split("_") if len(part) > 1)
+    return terms
+
+
+class RetrievalIndex:
+    """
+    Local BM25 index over the messages evicted from a client's memory, so their details can be retrieved
+    again instead of surviving only in a summary. Pure Python: an inverted index of term frequencies, no
+    extra dependencies.
+
+    Snippets are appended to a JSONL file (`{"text": ..., "tokens": n}` per line) as they are indexed and the
+    index is rebuilt from it on creation, so a resumed run keeps its index. Identical snippets (e.g. the same
+    file viewed twice) are indexed once.
+    """
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, path: Optional[Path], top_k: int = 3, max_tokens: int = 500):
+        self.path = Path(path) if path else None
+        self.top_k = top_k
+        self.max_tokens = max_tokens
+        self.snippets: List[Snippet] = []
+        self.retrieved = 0
+        self.retrieved_tokens = 0
+        self._lengths: List[int] = []
+        self._total_length = 0
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._texts: Set[str] = set()
+        self._file: Optional[IO[str]] = None
+        self._lock = threading.Lock()
+        if self.path is not None and self.path.is_file():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        snippet = json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+                    self._index(snippet)
+
+    def _index(self, snippet: Snippet) -> bool:
+        if snippet["text"] in self._texts:
+            return False
+        self._texts.add(snippet["text"])
+        doc_id = len(self.snippets)
+        self.snippets.append(snippet)
+        terms = Counter(tokenize(snippet["text"]))
+        length = sum(terms.values())
+        self._lengths.append(length)
+        self._total_length += length
+        for term, frequency in terms.items():
+            self._postings.setdefault(term, []).append((doc_id, frequency))
+        return True
+
+    def add(self, snippets: List[Snippet]) -> int:
+        """
+        Indexes snippets and appends them to the index file.
+
+        :param snippets: The snippets to index.
+        :return: The number of new snippets (duplicates are skipped).
+        """
+        added = 0
+        with self._lock:
+            for snippet in snippets:
+                if not snippet["text"].strip() or not self._index(snippet):
+                    continue
+                added += 1
+                if self.path is not None:
+                    if self._file is None:
+                        self.path.parent.mkdir(parents=True, exist_ok=True)
+                        self._file = open(self.path, "a", encoding="utf-8")
+                    self._file.write(json.dumps(snippet, ensure_ascii=False) + "\n")
+            if self._file is not None:
+                self._file.flush()
+        return added
+
+    def search(self, query: str) -> List[Snippet]:
+        """
+        Ranks the snippets by BM25 against the query and returns the best ones that fit into the budget:
+        at most `top_k` snippets with at most `max_tokens` tokens together. Snippets whose text is part of
+        the query are skipped, the model sees them anyway.
+
+        :param query: The query text.
+        :return: The snippets, best first.
+        """
+        with self._lock:
+            if not self.snippets:
+                return []
+            scores: Dict[int, float] = {}
+            count = len(self.snippets)
+            average_length = self._total_length / count or 1.0
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(
+                    1 + (count - len(postings) + 0.5) / (len(postings) + 0.5)
+                )
+                for doc_id, frequency in postings:
+                    norm = self.k1 * (
+                        1 - self.b + self.b * self._lengths[doc_id] / average_length
+                    )
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (
+                        self.k1 + 1
+                    ) / (frequency + norm)
+
+            results: List[Snippet] = []
+            budget = self.max_tokens
+            for doc_id in heapq.nlargest(
+                self.top_k * 4, scores, key=scores.__getitem__
+            ):
+                snippet = self.snippets[doc_id]
+                if (
+                    snippet["tokens"] > budget
+                    or snippet["text"].split("\n", 1)[-1] in query
+                ):
+                    continue
+                results.append(snippet)
+                budget -= snippet["tokens"]
+                if len(results) >= self.top_k:
+                    break
+            self.retrieved += len(results)
+            self.retrieved_tokens += self.max_tokens - budget
+            return results
+
+    def report(self) -> str:
+        """
+        :return: A one-line summary of the indexed and retrieved snippets.
+        """
+        return (
+            f"{len(self.snippets)} snippets indexed, {self.retrieved} retrieved "
+            f"({self.retrieved_tokens} tokens)"
+        )
+
+    def close(self) -> None:
+        """
+        Closes the index file. Adding snippets again reopens it.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,301 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Sequence, TypedDict
+
+import tiktoken
+
+
+class TokenAccounting(TypedDict):
+    tokens_per_message: int
+    """
+    Tokens every message costs besides its fields (`<|start|>`, separators, `<|end|>`).
+    """
+
+    tokens_per_name: int
+    """
+    Additional tokens of a message with a `name`.
+    """
+
+    tokens_per_tool_call: int
+    """
+    Additional tokens of every function call in an assistant message.
+    """
+
+    reply_priming: int
+    """
+    Tokens every request costs for priming the reply (`<|start|>assistant<|message|>`).
+    """
+
+    function_init: int
+    """
+    Tokens at the start of every function definition.
+    """
+
+    function_end: int
+    """
+    Tokens at the end of the function definitions of a request.
+    """
+
+    property_init: int
+    """
+    Tokens at the start of the properties of a function.
+    """
+
+    property_key: int
+    """
+    Tokens of every property.
+    """
+
+    enum_init: int
+    """
+    Tokens of a property with an enum.
+    """
+
+    enum_item: int
+    """
+    Tokens of every enum value besides the value.
+    """
+
+
+_CHAT_ACCOUNTING: TokenAccounting = {
+    "tokens_per_message": 3,
+    "tokens_per_name": 1,
+    "tokens_per_tool_call": 3,
+    "reply_priming": 3,
+    "function_init": 10,
+    "function_end": 12,
+    "property_init": 3,
+    "property_key": 3,
+    "enum_init": -3,
+    "enum_item": 3,
+}
+
+# token accounting of the OpenAI chat format per model family, matched by the longest model name prefix;
+# validated against the prompt_tokens reported by the API (see tests/clients/test_TokenCounter.py)
+TOKEN_ACCOUNTING: Dict[str, TokenAccounting] = {
+    "gpt-3.5-turbo": _CHAT_ACCOUNTING,
+    "gpt-3.5-turbo-0301": {
+        **_CHAT_ACCOUNTING,
+        "tokens_per_message": 4,
+        "tokens_per_name": -1,
+    },
+    "gpt-4": _CHAT_ACCOUNTING,
+    "gpt-4o": {**_CHAT_ACCOUNTING, "function_init": 7},
+}
+
+# newer models (gpt-4.1, o-series, ...) use the chat format of gpt-4o
+DEFAULT_TOKEN_ACCOUNTING = TOKEN_ACCOUNTING["gpt-4o"]
+
+
+def accounting_for_model(model: str) -> TokenAccounting:
+    """
+    :return: The token accounting of the longest model name prefix in `TOKEN_ACCOUNTING` that matches `model`.
+    """
+    prefixes = [prefix for prefix in TOKEN_ACCOUNTING if model.startswith(prefix)]
+    if not prefixes:
+        return DEFAULT_TOKEN_ACCOUNTING
+    return TOKEN_ACCOUNTING[max(prefixes, key=len)]
+
+
+@lru_cache(maxsize=None)
+def encoding_for_model(model: str) -> tiktoken.Encoding:
+    """
+    Resolves the tiktoken encoding for a model exactly once per process.
+
+    :param model: The model name (e.g. "gpt-4o").
+    :return: The tiktoken encoding used by that model.
+    """
+    return tiktoken.encoding_for_model(model)
+
+
+class TokenCounter:
+    """
+    Counts content tokens for a single model, and the tokens of messages and function definitions in the
+    OpenAI chat format with the model's `TokenAccounting`.
+
+    The encoder is resolved once per model and token counts are memoized by content hash in a bounded LRU,
+    so identical content (e.g. the same file viewed twice) is only tokenized once. Instances are shared per
+    model via `TokenCounter.for_model()`.
+    """
+
+    _instances: Dict[str, "TokenCounter"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, model: str, max_cache_size: int = 4096):
+        self.model = model
+        self.encoding = encoding_for_model(model)
+        self.accounting = accounting_for_model(model)
+        self.max_cache_size = max_cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[bytes, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_model(cls, model: str) -> "TokenCounter":
+        """
+        Returns the process-wide token counter for the given model, creating it on first use.
+
+        :param model: The model name.
+        :return: The shared TokenCounter instance.
+        """
+        with cls._instances_lock:
+            counter = cls._instances.get(model)
+            if counter is None:
+                counter = cls(model)
+                cls._instances[model] = counter
+            return counter
+
+    def count(self, text: str) -> int:
+        """
+        Returns the number of tokens in `text`.
+
+        :param text: The text to tokenize.
+        :return: Number of tokens.
+        """
+        return self.count_batch([text])[0]
+
+    def count_batch(self, texts: List[str]) -> List[int]:
+        """
+        Returns the number of tokens for each text. Texts that are not cached are tokenized together with
+        `encode_batch`, using up to one thread per CPU.
+
+        :param texts: The texts to tokenize.
+        :return: Number of tokens per text, in the same order.
+        """
+        keys = [self._key(text) for text in texts]
+        counts: List[int] = [0] * len(texts)
+        missing: Dict[bytes, List[int]] = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is None:
+                    missing.setdefault(key, []).append(i)
+                    continue
+                self._cache.move_to_end(key)
+                counts[i] = cached
+                self.hits += 1
+
+        if not missing:
+            return counts
+
+        missing_texts = [texts[indices[0]] for indices in missing.values()]
+        num_threads = min(len(missing_texts), os.cpu_count() or 1)
+        if num_threads > 1:
+            encoded = self.encoding.encode_batch(
+                missing_texts, num_threads=num_threads, disallowed_special=()
+            )
+        else:
+            encoded = [
+                self.encoding.encode(text, disallowed_special=())
+                for text in missing_texts
+            ]
+
+        with self._lock:
+            for (key, indices), tokens in zip(missing.items(), encoded):
+                for i in indices:
+                    counts[i] = len(tokens)
+                self.misses += len(indices)
+                self._cache[key] = len(tokens)
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.max_cache_size:
+                self._cache.popitem(last=False)
+        return counts
+
+    def count_messages(self, messages: Sequence[Mapping[str, Any]]) -> List[int]:
+        """
+        Returns the prompt tokens of each message in the chat format: the message overhead, the role, the
+        content, the name and the name and arguments of every function call. Ids are not counted.
+
+        :param messages: Messages in the API format (`role`, `content`, `name`, `function_call`, `tool_calls`).
+        :return: Number of tokens per message, in the same order.
+        """
+        accounting = self.accounting
+        texts: List[str] = []
+        overheads: List[int] = []
+        sizes: List[int] = []
+        for message in messages:
+            fields = [message.get("role") or "", message.get("content") or ""]
+            overhead = accounting["tokens_per_message"]
+            if message.get("name"):
+                fields.append(message["name"])
+                overhead += accounting["tokens_per_name"]
+            function_calls = [
+                tool_call["function"] for tool_call in message.get("tool_calls") or []
+            ]
+            if message.get("function_call"):
+                function_calls.append(message["function_call"])
+            for function_call in function_calls:
+                fields.extend([function_call["name"], function_call["arguments"]])
+                overhead += accounting["tokens_per_tool_call"]
+            fields = [field for field in fields if isinstance(field, str) and field]
+            texts.extend(fields)
+            sizes.append(len(fields))
+            overheads.append(overhead)
+
+        counts = self.count_batch(texts)
+        tokens: List[int] = []
+        start = 0
+        for size, overhead in zip(sizes, overheads):
+            tokens.append(overhead + sum(counts[start : start + size]))
+            start += size
+        return tokens
+
+    def count_functions(self, functions: Sequence[Mapping[str, Any]]) -> int:
+        """
+        Returns the prompt tokens of function definitions as they are rendered for the model: name and
+        description of every function and name, type, description and enum values of its properties.
+
+        :param functions: The function schemas (`name`, `description`, `parameters`).
+        :return: Number of tokens, 0 without functions.
+        """
+        if not functions:
+            return 0
+        accounting = self.accounting
+        tokens = accounting["function_end"]
+        lines: List[str] = []
+        for function in functions:
+            tokens += accounting["function_init"]
+            lines.append(
+                f"{function['name']}:{(function.get('description') or '').removesuffix('.')}"
+            )
+            properties = (function.get("parameters") or {}).get("properties") or {}
+            if properties:
+                tokens += accounting["property_init"]
+            for name, schema in properties.items():
+                tokens += accounting["property_key"]
+                enum = schema.get("enum")
+                if enum:
+                    tokens += accounting["enum_init"] + accounting["enum_item"] * len(
+                        enum
+                    )
+                    lines.extend(str(item) for item in enum)
+                description = (schema.get("description") or "").removesuffix(".")
+                lines.append(f"{name}:{schema.get('type', 'any')}:{description}")
+        return tokens + sum(self.count_batch(lines))
+
+    def count_request(
+        self, message_tokens: int, functions: Sequence[Mapping[str, Any]]
+    ) -> int:
+        """
+        Returns the prompt tokens of a request, e.g. to compare them with the `prompt_tokens` of the response.
+
+        :param message_tokens: The sum of the message tokens, see `count_messages`.
+        :param functions: The function schemas sent with the request.
+        :return: Number of prompt tokens.
+        """
+        return (
+            message_tokens
+            + self.accounting["reply_priming"]
+            + self.count_functions(functions)
+        )
+
+    @staticmethod
+    def _key(text: str) -> bytes:
+        return hashlib.blake2b(
+            text.encode("utf-8", "surrogatepass"), digest_size=16
+        ).digest()
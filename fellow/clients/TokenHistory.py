@@ -0,0 +1,125 @@
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Any, Iterable, List, Mapping, SupportsIndex, TypeVar, Union, overload
+
+M = TypeVar("M", bound=Mapping[str, Any])
+
+
+class TokenHistory(List[M]):
+    """
+    A list of messages with a `tokens` count each (0 if missing), that keeps a prefix-sum index of the token
+    counts.
+
+    The total is O(1) and the split point for a token limit is found by binary search, instead of summing
+    the whole history on every turn. `_prefix[i]` is the sum of the tokens before message i plus a base
+    offset, so slicing off the front (what summarization does) reuses the index without adding it up again.
+
+    Appending and slicing keep the index up to date, other mutations rebuild it. Token counts must not be
+    changed in place once a message is part of the history.
+    """
+
+    def __init__(self, messages: Iterable[M] = ()):
+        super().__init__(messages)
+        self._prefix: List[int] = []
+        self._reindex()
+
+    def _reindex(self) -> None:
+        self._prefix = [0]
+        self._prefix.extend(accumulate(message.get("tokens", 0) for message in self))
+
+    @classmethod
+    def _from_slice(cls, messages: List[M], prefix: List[int]) -> "TokenHistory[M]":
+        history: TokenHistory[M] = cls.__new__(cls)
+        list.__init__(history, messages)
+        history._prefix = prefix
+        return history
+
+    @property
+    def tokens(self) -> int:
+        """
+        The sum of the token counts of all messages.
+        """
+        return self._prefix[-1] - self._prefix[0]
+
+    def split_index(self, token_limit: int) -> int:
+        """
+        :return: The smallest index from which the remaining messages fit into `token_limit` tokens.
+        """
+        return bisect_left(self._prefix, self._prefix[-1] - token_limit)
+
+    def append(self, message: M) -> None:
+        super().append(message)
+        self._prefix.append(self._prefix[-1] + message.get("tokens", 0))
+
+    def extend(self, messages: Iterable[M]) -> None:
+        messages = list(messages)
+        super().extend(messages)
+        total = self._prefix[-1]
+        for message in messages:
+            total += message.get("tokens", 0)
+            self._prefix.append(total)
+
+    def __reduce__(self) -> Any:
+        # copies and pickles are rebuilt from the messages, not from the index
+        return self.__class__, (list(self),)
+
+    def __iadd__(self, messages: Iterable[M]) -> "TokenHistory[M]":  # type: ignore[override, misc]
+        self.extend(messages)
+        return self
+
+    def __add__(self, messages: List[M]) -> "TokenHistory[M]":  # type: ignore[override]
+        history = TokenHistory(self)
+        history.extend(messages)
+        return history
+
+    @overload
+    def __getitem__(self, index: SupportsIndex) -> M: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "TokenHistory[M]": ...
+
+    def __getitem__(
+        self, index: Union[SupportsIndex, slice]
+    ) -> Union[M, "TokenHistory[M]"]:
+        if not isinstance(index, slice):
+            return super().__getitem__(index)
+        messages = super().__getitem__(index)
+        start, stop, step = index.indices(len(self))
+        if step == 1:
+            return self._from_slice(
+                messages, self._prefix[start : max(start, stop) + 1]
+            )
+        return TokenHistory(messages)
+
+    def __setitem__(self, index: Any, value: Any) -> None:
+        super().__setitem__(index, value)
+        self._reindex()
+
+    def __delitem__(self, index: Union[SupportsIndex, slice]) -> None:
+        super().__delitem__(index)
+        self._reindex()
+
+    def insert(self, index: SupportsIndex, message: M) -> None:
+        super().insert(index, message)
+        self._reindex()
+
+    def pop(self, index: SupportsIndex = -1) -> M:
+        message = super().pop(index)
+        self._reindex()
+        return message
+
+    def remove(self, message: M) -> None:
+        super().remove(message)
+        self._reindex()
+
+    def clear(self) -> None:
+        super().clear()
+        self._prefix = [0]
+
+    def reverse(self) -> None:
+        super().reverse()
+        self._reindex()
+
+    def sort(self, *args: Any, **kwargs: Any) -> None:
+        super().sort(*args, **kwargs)
+        self._reindex()
@@ -0,0 +1,113 @@
+import threading
+from typing import Dict, List, TypedDict
+
+
+class ModelUsage(TypedDict):
+    requests: int
+    """
+    Number of requests sent to the provider.
+    """
+
+    cache_hits: int
+    """
+    Number of requests answered from the response cache instead of the provider.
+    """
+
+    latency: float
+    """
+    Summed wall time of all requests in seconds.
+    """
+
+    prompt_tokens: int
+    """
+    Summed prompt tokens reported by the provider.
+    """
+
+    completion_tokens: int
+    """
+    Summed completion tokens reported by the provider.
+    """
+
+    cached_tokens: int
+    """
+    Summed prompt tokens the provider served from its prompt cache.
+    """
+
+
+class UsageTracker:
+    """
+    Accumulates requests, latency and token usage per model, so a run with a separate (cheaper) summary
+    model can show what each model cost. Safe to use from background workers.
+    """
+
+    def __init__(self) -> None:
+        self._usage: Dict[str, ModelUsage] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        model: str,
+        latency: float,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        cached_tokens: int = 0,
+        cache_hit: bool = False,
+    ) -> None:
+        """
+        Records one request.
+
+        :param model: The model that answered the request.
+        :param latency: Wall time of the request in seconds.
+        :param prompt_tokens: Prompt tokens reported by the provider.
+        :param completion_tokens: Completion tokens reported by the provider.
+        :param cached_tokens: Prompt tokens served from the provider's prompt cache.
+        :param cache_hit: True if the response was served from the response cache.
+        """
+        with self._lock:
+            usage = self._usage.setdefault(
+                model,
+                {
+                    "requests": 0,
+                    "cache_hits": 0,
+                    "latency": 0.0,
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                    "cached_tokens": 0,
+                },
+            )
+            if cache_hit:
+                usage["cache_hits"] += 1
+                return
+            usage["requests"] += 1
+            usage["latency"] += latency
+            usage["prompt_tokens"] += prompt_tokens
+            usage["completion_tokens"] += completion_tokens
+            usage["cached_tokens"] += cached_tokens
+
+    def by_model(self) -> Dict[str, ModelUsage]:
+        """
+        :return: A copy of the accumulated usage per model.
+        """
+        with self._lock:
+            return {model: ModelUsage(**usage) for model, usage in self._usage.items()}
+
+    @staticmethod
+    def cached_ratio(usage: ModelUsage) -> float:
+        """
+        :return: The share of prompt tokens served from the provider's prompt cache.
+        """
+        if not usage["prompt_tokens"]:
+            return 0.0
+        return usage["cached_tokens"] / usage["prompt_tokens"]
+
+    def report(self) -> List[str]:
+        """
+        :return: One human-readable line per model.
+        """
+        return [
+            f"{model}: {usage['requests']} requests ({usage['cache_hits']} cached), "
+            f"{usage['latency']:.1f}s, {usage['prompt_tokens']} prompt tokens "
+            f"({self.cached_ratio(usage):.0%} from prompt cache), "
+            f"{usage['completion_tokens']} completion tokens"
+            for model, usage in self.by_model().items()
+        ]
@@ -3,5 +3,10 @@ from typing import Dict, Type
 from fellow.clients.Client import Client
 from fellow.clients.GeminiClient import GeminiClient
 from fellow.clients.OpenAIClient import OpenAIClient
+from fellow.clients.ReplayClient import ReplayClient
 
-ALL_CLIENTS: Dict[str, Type[Client]] = {"openai": OpenAIClient, "gemini": GeminiClient}
+ALL_CLIENTS: Dict[str, Type[Client]] = {
+    "openai": OpenAIClient,
+    "gemini": GeminiClient,
+    "replay": ReplayClient,
+}
@@ -1,16 +1,21 @@
 import json
-from typing import List, Protocol, Type, TypedDict, TypeVar
+from typing import TYPE_CHECKING, List, Protocol, Type, TypedDict, TypeVar
 
 from pydantic import BaseModel, ValidationError
+from typing_extensions import NotRequired
 
 from fellow.clients.Client import Client
 from fellow.policies.Policy import Policy
 from fellow.utils.load_config import Config
 
+if TYPE_CHECKING:  # pragma: no cover
+    from fellow.commands.Prefetcher import Prefetcher
+
 
 class CommandContext(TypedDict):
     ai_client: Client
     config: Config
+    prefetcher: NotRequired["Prefetcher"]
 
 
 class CommandInput(BaseModel): ...
@@ -29,10 +34,22 @@ class Command:
         input_type: Type[CommandInput],
         command_handler: CommandHandler,
         policies: List[Policy],
+        read_only: bool = False,
     ):
         self.input_type = input_type
         self.command_handler = command_handler
         self.policies = policies
+        self.read_only = read_only
+
+    @property
+    def parallel_safe(self) -> bool:
+        """
+        Whether the command may run concurrently with other calls of the same turn: it must not modify
+        the workspace and none of its policies may interact with the user.
+        """
+        return self.read_only and not any(
+            getattr(policy, "interactive", False) for policy in self.policies
+        )
 
     def run(self, command_input_str: str, context: CommandContext) -> str:
         """
@@ -42,7 +59,9 @@ class Command:
         1. Parses and validates the input JSON string against the command's `input_type`.
         2. Ensures the command handler is a named function (not a lambda).
         3. Runs all attached policies; if any return a denial reason, the command is aborted.
-        4. If all policies pass, invokes the command handler.
+        4. If all policies pass, returns the result of the context's `prefetcher` if it ran the same call
+           speculatively, and invokes the command handler otherwise. Commands that are not read-only drop
+           the prefetched results first.
         5. Returns the handler's output or an error message if execution fails.
 
         :param command_input_str: JSON string representing command input fields.
@@ -78,6 +97,24 @@ class Command:
                     "[ERROR] Policy check did not return True but did not give a denial reason."
                 )
 
+        prefetcher = context.get("prefetcher") if context else None
+        if prefetcher is not None:
+            if self.read_only:
+                output = prefetcher.take(self.command_handler.__name__, command_input)
+                if output is not None:
+                    return output
+            else:
+                prefetcher.invalidate()
+        return self.execute(command_input, context)
+
+    def execute(self, command_input: CommandInput, context: CommandContext) -> str:
+        """
+        Invokes the command handler with validated input, without checking the policies.
+
+        :param command_input: The validated input.
+        :param context: Runtime context for the command.
+        :return: Result of the command execution as a string, or an error message.
+        """
         try:
             return self.command_handler(command_input, context=context)
         except Exception as e:
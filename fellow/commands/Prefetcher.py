@@ -0,0 +1,271 @@
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    TypedDict,
+)
+
+from pydantic import ValidationError
+
+from fellow.clients.Client import ToolCall
+
+if TYPE_CHECKING:  # pragma: no cover
+    from fellow.commands.Command import Command, CommandContext, CommandInput
+
+_PATH = re.compile(r"[\w./-]+")
+
+# follow-up reads that are likely after a call, by command: (read command, argument passed on)
+FOLLOW_UPS: Dict[str, Tuple[str, str]] = {
+    "create_file": ("view_file", "filepath"),
+    "edit_file": ("view_file", "filepath"),
+    "list_definitions": ("view_file", "filepath"),
+    "get_code": ("view_file", "filepath"),
+}
+
+
+class PrefetchReport(TypedDict):
+    prefetched: int
+    """
+    Number of commands run speculatively.
+    """
+
+    lookups: int
+    """
+    Number of calls of prefetchable commands the model made.
+    """
+
+    hits: int
+    """
+    Number of those calls answered from the prefetched results.
+    """
+
+    saved_seconds: float
+    """
+    Wall time of the hits that did not have to be waited for.
+    """
+
+
+class Prefetcher:
+    """
+    Runs likely next reads while the model is thinking, so their results are ready when it asks for them.
+
+    After every turn, `prefetch` predicts reads from the turn's function calls (e.g. viewing a file after
+    editing it, see `FOLLOW_UPS`) and from the files and directories the reasoning mentions, and runs them on
+    a thread pool while the next request is in flight. Predictions are checked against the command's
+    policies first, so a read they would deny never runs; prefetchable commands are `parallel_safe`, so
+    none of these policies interact with the user. `Command.run` still checks `take` only after the
+    policies passed for the actual call.
+
+    Only cheap read-only commands (`PREFETCHABLE`) are prefetched, and only paths inside the working
+    directory that exist. Results are dropped when the next round starts and whenever a command that is
+    not read-only runs, so a hit never returns a result from before a write.
+    """
+
+    PREFETCHABLE = ("view_file", "list_files", "list_definitions")
+
+    def __init__(
+        self,
+        commands: Dict[str, "Command"],
+        context: "CommandContext",
+        max_commands: int = 4,
+    ):
+        self.commands = {
+            name: command
+            for name, command in commands.items()
+            if name in self.PREFETCHABLE and command.parallel_safe
+        }
+        self.context = context
+        self.max_commands = max_commands
+        self.prefetched = 0
+        self.lookups = 0
+        self.hits = 0
+        self.saved_seconds = 0.0
+        self._entries: Dict[Tuple[str, str], "Future[Tuple[str, float]]"] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(name: str, command_input: "CommandInput") -> Tuple[str, str]:
+        """
+        :return: The cache key of a call: the command name and its validated input with normalized paths.
+        """
+        values = command_input.model_dump()
+        for field in ("filepath", "directory"):
+            if isinstance(values.get(field), str):
+                values[field] = os.path.normpath(values[field])
+        return name, json.dumps(values, sort_keys=True, default=str)
+
+    def predict(
+        self, function_calls: Iterable[ToolCall], text: Optional[str]
+    ) -> List[Tuple[str, "CommandInput"]]:
+        """
+        Predicts the next reads: follow-ups of the function calls first, then reads of the paths mentioned
+        in the text in order of appearance. Paths must exist and lie inside the working directory, and the
+        command's policies must allow the read.
+
+        :param function_calls: The function calls of the last turn.
+        :param text: The reasoning of the last turn (or the task, before the first request).
+        :return: At most `max_commands` distinct (command name, input) pairs.
+        """
+        candidates: List[Tuple[str, Dict[str, Any]]] = []
+        for function_call in function_calls:
+            follow_up = FOLLOW_UPS.get(function_call["name"])
+            if follow_up is None:
+                continue
+            try:
+                arguments = json.loads(function_call["arguments"])
+            except json.JSONDecodeError:
+                continue
+            value = arguments.get(follow_up[1]) if isinstance(arguments, dict) else None
+            if isinstance(value, str) and self._in_workspace(value, os.path.isfile):
+                candidates.append((follow_up[0], {follow_up[1]: value}))
+
+        for word in _PATH.findall(text or ""):
+            path = word.rstrip(".")
+            if "/" not in path and "." not in path:
+                continue
+            if self._in_workspace(path, os.path.isfile):
+                candidates.append(("view_file", {"filepath": path}))
+                if path.endswith(".py"):
+                    candidates.append(("list_definitions", {"filepath": path}))
+            elif path not in (".", "./") and self._in_workspace(path, os.path.isdir):
+                candidates.append(("list_files", {"directory": path, "max_depth": 1}))
+
+        predictions: List[Tuple[str, "CommandInput"]] = []
+        keys = set()
+        for name, arguments in candidates:
+            command = self.commands.get(name)
+            if command is None:
+                continue
+            try:
+                command_input = command.input_type(**arguments)
+            except ValidationError:
+                continue
+            key = self.key(name, command_input)
+            if key in keys:
+                continue
+            keys.add(key)
+            if not self._allowed(command, command_input):
+                continue
+            predictions.append((name, command_input))
+            if len(predictions) >= self.max_commands:
+                break
+        return predictions
+
+    def _allowed(self, command: "Command", command_input: "CommandInput") -> bool:
+        """
+        :return: Whether all policies of the command allow the call, as `Command.run` checks them.
+        """
+        name = getattr(command.command_handler, "__name__", "")
+        for policy in command.policies:
+            try:
+                if (
+                    policy.check(
+                        name, command.command_handler, command_input, self.context
+                    )
+                    is not True
+                ):
+                    return False
+            except Exception:
+                return False
+        return True
+
+    @staticmethod
+    def _in_workspace(path: str, exists: Callable[[str], bool]) -> bool:
+        if os.path.isabs(path) or ".." in path.split("/"):
+            return False
+        return exists(path)
+
+    def prefetch(self, function_calls: Iterable[ToolCall], text: Optional[str]) -> int:
+        """
+        Drops the results of the previous round and starts the predicted reads in the background.
+
+        :param function_calls: The function calls of the last turn.
+        :param text: The reasoning of the last turn (or the task, before the first request).
+        :return: The number of reads started.
+        """
+        self.invalidate()
+        predictions = self.predict(function_calls, text)
+        if not predictions:
+            return 0
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_commands, thread_name_prefix="fellow-prefetch"
+            )
+        with self._lock:
+            for name, command_input in predictions:
+                self._entries[self.key(name, command_input)] = self._executor.submit(
+                    self._run, self.commands[name], command_input
+                )
+            self.prefetched += len(predictions)
+        return len(predictions)
+
+    def _run(
+        self, command: "Command", command_input: "CommandInput"
+    ) -> Tuple[str, float]:
+        start = time.perf_counter()
+        output = command.execute(command_input, self.context)
+        return output, time.perf_counter() - start
+
+    def take(self, name: str, command_input: "CommandInput") -> Optional[str]:
+        """
+        Returns the prefetched result of a call, waiting for it if it is still running, and counts the
+        lookup for the hit rate.
+
+        :param name: The command name.
+        :param command_input: The validated input of the call.
+        :return: The output of the command, or None if it was not prefetched.
+        """
+        if name not in self.commands:
+            return None
+        with self._lock:
+            self.lookups += 1
+            future = self._entries.pop(self.key(name, command_input), None)
+        if future is None:
+            return None
+        start = time.perf_counter()
+        output, wall_time = future.result()
+        waited = time.perf_counter() - start
+        with self._lock:
+            self.hits += 1
+            self.saved_seconds += max(0.0, wall_time - waited)
+        return output
+
+    def invalidate(self) -> None:
+        """
+        Drops all prefetched results, e.g. because a command may have changed the workspace.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def report(self) -> PrefetchReport:
+        """
+        :return: The prefetched commands, lookups, hits and the latency saved so far.
+        """
+        with self._lock:
+            return {
+                "prefetched": self.prefetched,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "saved_seconds": round(self.saved_seconds, 3),
+            }
+
+    def close(self) -> None:
+        """
+        Drops the prefetched results and stops the thread pool without waiting for running reads.
+        """
+        self.invalidate()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -1,4 +1,4 @@
-from typing import Dict, Tuple, Type, TypeVar
+from typing import Dict, Set, Tuple, Type, TypeVar
 
 from fellow.commands.Command import CommandHandler, CommandInput
 from fellow.commands.create_file import CreateFileInput, create_file
@@ -11,8 +11,10 @@ from fellow.commands.make_plan import MakePlanInput, make_plan
 from fellow.commands.pip_install import PipInstallInput, pip_install
 from fellow.commands.run_pytest import RunPytestInput, run_pytest
 from fellow.commands.run_python import RunPythonInput, run_python
+from fellow.commands.search_files import SearchFilesInput, search_files
 from fellow.commands.summarize_file import SummarizeFileInput, summarize_file
 from fellow.commands.view_file import ViewFileInput, view_file
+from fellow.commands.view_output import ViewOutputInput, view_output
 
 T = TypeVar("T", bound=CommandInput)
 
@@ -31,4 +33,16 @@ ALL_COMMANDS: Dict[str, CommandTuple] = {
     "make_plan": (MakePlanInput, make_plan),
     "summarize_file": (SummarizeFileInput, summarize_file),
     "pip_install": (PipInstallInput, pip_install),
+    "search_files": (SearchFilesInput, search_files),
+    "view_output": (ViewOutputInput, view_output),
+}
+
+READ_ONLY_COMMANDS: Set[str] = {
+    "view_file",
+    "list_files",
+    "list_definitions",
+    "get_code",
+    "summarize_file",
+    "search_files",
+    "view_output",
 }
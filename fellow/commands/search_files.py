@@ -1,48 +1,373 @@
 import os
-from typing import List, Optional
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import AnyStr, Callable, Iterator, List, Optional, Pattern, Tuple
 
 from pydantic import Field
 
 from fellow.commands.Command import CommandContext, CommandInput
 
+# directories that are never searched (version control, dependencies, caches, fellow's own runs)
+SKIP_DIRS = {
+    ".git",
+    ".hg",
+    ".svn",
+    "node_modules",
+    ".venv",
+    "venv",
+    "__pycache__",
+    ".mypy_cache",
+    ".pytest_cache",
+    ".ruff_cache",
+    ".tox",
+    ".fellow",
+}
+# files with a NUL byte in their first block are treated as binary and skipped
+BINARY_SNIFF_BYTES = 8192
+# larger files (generated code, data dumps, ...) are skipped
+MAX_FILE_BYTES = 8 * 1024 * 1024
+MAX_LINE_CHARS = 300
+# files per search task of the thread pool
+CHUNK_SIZE = 256
+
+# (base directory, pattern relative to it, negated, directories only)
+IgnoreRule = Tuple[str, Pattern[str], bool, bool]
+
 
 class SearchFilesInput(CommandInput):
     directory: str = Field(..., description="The relative directory to search in.")
-    search: str = Field(..., description="The string to search for (case-insensitive).")
+    search: str = Field(
+        ...,
+        description="The string to search for (case-insensitive), or a regular expression if `regex` is set.",
+    )
     extension: Optional[str] = Field(
         None, description="Only include files with this extension (e.g., .py)."
     )
+    regex: bool = Field(
+        False, description="Treat `search` as a regular expression (Python syntax)."
+    )
+    case_sensitive: bool = Field(
+        False, description="Match upper and lower case exactly."
+    )
+    max_results: int = Field(
+        200, ge=1, description="Maximum number of matching lines to return."
+    )
+
+
+def _translate_glob(pattern: str) -> str:
+    """
+    Translates a gitignore glob into a regular expression: `*` and `?` do not match `/`, `**` matches
+    across directories.
+    """
+    result = ""
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            result += "(?:.*/)?"
+            i += 3
+        elif pattern.startswith("**", i):
+            result += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            result += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            result += "[^/]"
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 2 :]:
+            end = pattern.index("]", i + 2)
+            content = pattern[i + 1 : end]
+            if content.startswith("!"):
+                content = "^" + content[1:]
+            result += "[" + content.replace("\\", "\\\\") + "]"
+            i = end + 1
+        else:
+            if pattern[i] == "\\" and i + 1 < len(pattern):
+                i += 1
+            result += re.escape(pattern[i])
+            i += 1
+    return result
+
+
+def parse_gitignore(base: str, text: str) -> List[IgnoreRule]:
+    """
+    Parses the patterns of a `.gitignore` file: comments, negation (`!`), directory-only patterns
+    (trailing `/`), anchored patterns (leading or inner `/`) and `*`, `?`, `[...]` and `**` globs.
+
+    :param base: The directory of the `.gitignore` file, patterns are relative to it.
+    :param text: The content of the file.
+    :return: The rules in file order.
+    """
+    rules: List[IgnoreRule] = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        anchored = "/" in line
+        regex = _translate_glob(line.lstrip("/"))
+        if not anchored:
+            regex = "(?:.*/)?" + regex
+        rules.append((base, re.compile(regex), negate, dir_only))
+    return rules
+
+
+def _read_gitignore(directory: str) -> List[IgnoreRule]:
+    path = os.path.join(directory, ".gitignore")
+    if not os.path.isfile(path):
+        return []
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return parse_gitignore(directory, f.read())
+    except OSError:
+        return []
+
+
+def is_ignored(rules: List[IgnoreRule], path: str, is_dir: bool) -> bool:
+    """
+    :return: True if the last rule that matches the path ignores it (as in git, later rules win).
+    """
+    ignored = False
+    for base, regex, negate, dir_only in rules:
+        if dir_only and not is_dir:
+            continue
+        # the paths of the walk are below the base directory of every rule that applies to them
+        relative = path[len(base) + 1 :].replace(os.sep, "/")
+        if regex.fullmatch(relative):
+            ignored = not negate
+    return ignored
+
+
+def _scan_directory(
+    directory: str, rules: List[IgnoreRule], extension: Optional[str]
+) -> Tuple[List[Tuple[str, List[IgnoreRule]]], List[str]]:
+    """
+    Lists one directory: the subdirectories to walk (with the ignore rules that apply to them) and the
+    files to search.
+    """
+    rules = rules + _read_gitignore(directory)
+    subdirectories: List[Tuple[str, List[IgnoreRule]]] = []
+    files: List[str] = []
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return subdirectories, files
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in SKIP_DIRS and not is_ignored(
+                    rules, entry.path, True
+                ):
+                    subdirectories.append((entry.path, rules))
+            elif entry.is_file():
+                if extension and not entry.name.endswith(extension):
+                    continue
+                if not is_ignored(rules, entry.path, False):
+                    files.append(entry.path)
+        except OSError:
+            continue
+    return subdirectories, files
+
+
+def walk_files(
+    executor: ThreadPoolExecutor, base_dir: str, extension: Optional[str] = None
+) -> List[str]:
+    """
+    Lists the files under `base_dir` that are searched, walking all directories of one level in parallel.
+    Skips `SKIP_DIRS` and everything ignored by the `.gitignore` files of the base directory, its
+    subdirectories and its parents up to the working directory.
+
+    :return: The file paths, sorted.
+    """
+    rules: List[IgnoreRule] = []
+    cwd = os.getcwd()
+    if base_dir != cwd and os.path.commonpath([cwd, base_dir]) == cwd:
+        parent = os.path.dirname(base_dir)
+        parents = [parent]
+        while parent != cwd:
+            parent = os.path.dirname(parent)
+            parents.append(parent)
+        for parent in reversed(parents):
+            rules += _read_gitignore(parent)
+
+    files: List[str] = []
+    level = [(base_dir, rules)]
+    while level:
+        scans = executor.map(
+            lambda item: _scan_directory(item[0], item[1], extension), level
+        )
+        level = []
+        for subdirectories, directory_files in scans:
+            level.extend(subdirectories)
+            files.extend(directory_files)
+    files.sort()
+    return files
+
+
+class _Matcher:
+    """
+    Finds the matching lines of a file: `bytes.find` for literal searches (on the lowercased bytes if
+    case-insensitive), the compiled pattern for regular expressions.
+
+    `bytes.lower()` and `re.IGNORECASE` on bytes only fold ASCII letters, so case-insensitive searches for
+    non-ASCII text decode the file instead: literals are compared on `str.casefold()`ed lines, regular
+    expressions are matched on the text.
+    """
+
+    def __init__(self, search: str, regex: bool, case_sensitive: bool):
+        self.fold = not regex and not case_sensitive
+        self.decode = not case_sensitive and not search.isascii()
+        self.needle = search.encode("utf-8")
+        if self.fold:
+            self.needle = self.needle.lower()
+        self.text_needle = search.casefold()
+        self.pattern: Optional["re.Pattern[bytes]"] = None
+        self.text_pattern: Optional["re.Pattern[str]"] = None
+        if regex and self.decode:
+            self.text_pattern = re.compile(search, re.MULTILINE | re.IGNORECASE)
+        elif regex:
+            self.pattern = re.compile(
+                self.needle, re.MULTILINE | (0 if case_sensitive else re.IGNORECASE)
+            )
+
+    def lines(self, data: bytes) -> Iterator[Tuple[int, str]]:
+        """
+        :return: The line number and stripped text of every line with a match, in file order.
+        """
+        if not self.decode:
+            yield from _matching_lines(
+                data, data.lower() if self.fold else data, self._find
+            )
+            return
+        text = data.decode("utf-8", errors="replace")
+        if self.text_pattern is not None:
+            yield from _matching_lines(text, text, self._find_text)
+        elif self.text_needle in text.casefold():
+            for line_number, line in enumerate(text.split("\n"), 1):
+                if self.text_needle in line.casefold():
+                    yield line_number, line.strip()
+
+    def _find(self, haystack: bytes, start: int) -> int:
+        if self.pattern is None:
+            return haystack.find(self.needle, start)
+        match = self.pattern.search(haystack, start)
+        return -1 if match is None else match.start()
+
+    def _find_text(self, haystack: str, start: int) -> int:
+        assert self.text_pattern is not None
+        match = self.text_pattern.search(haystack, start)
+        return -1 if match is None else match.start()
+
+
+def _matching_lines(
+    data: AnyStr, haystack: AnyStr, find: Callable[[AnyStr, int], int]
+) -> Iterator[Tuple[int, str]]:
+    """
+    Yields the line number and stripped text of the lines of `data` with a match, one per line.
+
+    :param data: The file content.
+    :param haystack: The content searched, with the same offsets as `data` (e.g. lowercased).
+    :param find: Returns the offset of the first match at or after an offset, or -1.
+    """
+    newline = b"\n" if isinstance(data, bytes) else "\n"
+    position = find(haystack, 0)
+    line_number, counted = 1, 0
+    while position != -1:
+        line_start = data.rfind(newline, 0, position) + 1
+        line_end = data.find(newline, position)
+        if line_end == -1:
+            line_end = len(data)
+        line_number += data.count(newline, counted, line_start)
+        counted = line_start
+        line = data[line_start:line_end]
+        if isinstance(line, bytes):
+            yield line_number, line.decode("utf-8", errors="replace").strip()
+        else:
+            yield line_number, line.strip()
+        position = find(haystack, line_end + 1)
+
+
+def _search_chunk(paths: List[str], matcher: _Matcher, max_results: int) -> List[str]:
+    """
+    Searches files on byte level and returns at most `max_results` matching lines, one per line.
+    """
+    results: List[str] = []
+    cwd = os.getcwd()
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size > MAX_FILE_BYTES:
+                    continue
+                data = f.read()
+        except Exception as e:
+            results.append(
+                f"[ERROR] Could not read {os.path.relpath(path, start=cwd)}: {e}"
+            )
+            continue
+        if b"\0" in data[:BINARY_SNIFF_BYTES]:
+            continue
+
+        relative: Optional[str] = None
+        for line_number, line in matcher.lines(data):
+            if relative is None:
+                relative = os.path.relpath(path, start=cwd)
+            if len(line) > MAX_LINE_CHARS:
+                line = line[:MAX_LINE_CHARS] + "..."
+            results.append(f"{relative}:{line_number}: {line}")
+            if len(results) >= max_results:
+                return results
+    return results
 
 
 def search_files(args: SearchFilesInput, context: CommandContext) -> str:
     """
-    Recursively search for a string (case-insensitive) in all files under a given directory.
-    Optionally restrict to files with a given extension. Its essentially a grep command.
+    Recursively search for a string (case-insensitive) or a regular expression in all text files under a
+    given directory. Binary files, .git, node_modules, virtual environments and files ignored by
+    .gitignore are skipped. Optionally restrict to files with a given extension. Its essentially a grep
+    command.
     """
     base_dir = os.path.abspath(os.path.join(os.getcwd(), args.directory))
 
     if not os.path.isdir(base_dir):
         return f"[ERROR] Directory not found: {args.directory}"
 
+    try:
+        matcher = _Matcher(args.search, args.regex, args.case_sensitive)
+    except re.error as e:
+        return f"[ERROR] Invalid regular expression: {e}"
+
     matches: List[str] = []
-    needle = args.search.lower()
-
-    for root, _, files in os.walk(base_dir):
-        for file in files:
-            if args.extension and not file.endswith(args.extension):
-                continue
-
-            path = os.path.join(root, file)
-            try:
-                with open(path, "r", encoding="utf-8") as f:
-                    for i, line in enumerate(f, 1):
-                        if needle in line.lower():
-                            rel_path = os.path.relpath(path, start=os.getcwd())
-                            matches.append(f"{rel_path}:{i}: {line.strip()}")
-            except Exception as e:
-                matches.append(f"[ERROR] Could not read {path}: {e}")
+    with ThreadPoolExecutor(thread_name_prefix="fellow-search") as executor:
+        files = walk_files(executor, base_dir, args.extension)
+        # the chunks are collected in path order, so the first `max_results` matches are deterministic;
+        # one more match than shown tells whether the results were cut off
+        futures: List[Future[List[str]]] = [
+            executor.submit(
+                _search_chunk, files[i : i + CHUNK_SIZE], matcher, args.max_results + 1
+            )
+            for i in range(0, len(files), CHUNK_SIZE)
+        ]
+        for future in futures:
+            matches.extend(future.result())
+            if len(matches) > args.max_results:
+                for pending in futures:
+                    pending.cancel()
+                break
 
     if not matches:
         return f"[INFO] No matches found for '{args.search}' in {args.directory}"
 
+    if len(matches) > args.max_results:
+        return "\n".join(
+            matches[: args.max_results]
+            + [
+                f"[INFO] Showing the first {args.max_results} matches, narrow the search to see more."
+            ]
+        )
     return "\n".join(matches)
@@ -17,8 +17,7 @@ class SummarizeFileInput(CommandInput):
 
 def summarize_file(args: SummarizeFileInput, context: CommandContext) -> str:
     """
-    Summarizes the contents of a file using OpenAIClient.
-    # todo: optional use different model
+    Summarizes the contents of a file using the AI client's summary model.
     """
     if not os.path.isfile(args.filepath):
         return f"[ERROR] File not found: {args.filepath}"
@@ -30,15 +29,22 @@ def summarize_file(args: SummarizeFileInput, context: CommandContext) -> str:
         if not content.strip():
             return "[INFO] File is empty or only contains whitespace."
 
-        client: Client = load_client(
-            system_content="Summarize the following file content.",
-            config=context["config"],
-        )
-
-        summary = client.chat(
-            functions=[],
-            message=f"Please summarize the following file content:\n\n{content}",
-        )["message"]
+        ai_client = context["ai_client"]
+        summary: Optional[str]
+        if hasattr(ai_client, "summarize"):
+            # one-shot request with the client's (cheaper) summary model, outside the agent's memory
+            summary = ai_client.summarize(
+                content, instruction="Summarize the following file content."
+            )
+        else:
+            client: Client = load_client(
+                system_content="Summarize the following file content.",
+                config=context["config"],
+            )
+            summary = client.chat(
+                functions=[],
+                message=f"Please summarize the following file content:\n\n{content}",
+            )["message"]
         summary = summary.strip() if summary else "[INFO] No summary generated."
         return f"[OK] Summary:\n{summary}"
 
@@ -0,0 +1,42 @@
+from typing import Optional
+
+from pydantic import Field
+
+from fellow.commands.Command import CommandContext, CommandInput
+from fellow.utils.compact_output import read_output
+
+MAX_LINES = 200
+
+
+class ViewOutputInput(CommandInput):
+    output_id: str = Field(
+        ...,
+        description="The id of a stored command output, as given in its omission note.",
+    )
+    from_line: Optional[int] = Field(
+        None, description="Optional 1-based starting line number."
+    )
+    to_line: Optional[int] = Field(
+        None, description="Optional 1-based ending line number (inclusive)."
+    )
+
+
+def view_output(args: ViewOutputInput, context: CommandContext) -> str:
+    """
+    View lines of a long command output that was shortened. At most 200 lines are shown per call.
+    """
+    lines = read_output(context["config"], args.output_id)
+    if lines is None:
+        return f"[ERROR] Output not found: {args.output_id}"
+    total_lines = len(lines)
+    if total_lines == 0:
+        return "[INFO] The output is empty."
+
+    start = max(1, args.from_line or 1)
+    end = min(total_lines, args.to_line or total_lines, start + MAX_LINES - 1)
+    if start > end:
+        return f"[INFO] No lines to display, the output has {total_lines} lines."
+
+    return f"[INFO] Lines {start}-{end} of {total_lines}:\n" + "\n".join(
+        lines[start - 1 : end]
+    )
@@ -1,13 +1,24 @@
+import asyncio
 import json
+import time
 import uuid
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import ValidationError
 
-from fellow.clients.Client import Client
-from fellow.clients.OpenAIClient import FunctionResult
+from fellow.clients.Client import ChatResult, Client, Function, FunctionResult, ToolCall
+from fellow.clients.HttpPool import HttpPool
+from fellow.clients.MemoryCheckpoint import MemoryCheckpoint
+from fellow.clients.RetrievalIndex import RetrievalIndex
+from fellow.clients.UsageTracker import UsageTracker
 from fellow.commands.Command import CommandContext
+from fellow.commands.Prefetcher import Prefetcher
+from fellow.utils.build_function_schemas import (
+    build_function_schemas,
+    function_schema_report,
+)
+from fellow.utils.compact_output import compact_results
 from fellow.utils.init_client import init_client
 from fellow.utils.init_command import init_command
 from fellow.utils.init_policy import init_policy
@@ -15,7 +26,16 @@ from fellow.utils.load_client import load_client
 from fellow.utils.load_commands import load_commands
 from fellow.utils.load_config import Config, load_config
 from fellow.utils.log_message import clear_log, log_message
+from fellow.utils.log_metrics import (
+    StepMetrics,
+    clear_metrics,
+    log_metrics,
+    step_metrics,
+    summarize_metrics,
+)
 from fellow.utils.parse_args import parse_args
+from fellow.utils.resume_task import load_resume_state, resume_inputs
+from fellow.utils.run_commands import run_commands
 from fellow.utils.secrets import add_secret, clear_secrets, load_secrets, remove_secret
 
 
@@ -38,9 +58,24 @@ def main() -> None:
         dispatch_map[args.command]()
         return
 
-    # Task must be defined now!
-    if config.task is None:
-        raise ValidationError("[ERROR] Task is not defined in the configuration.")
+    asyncio.run(run_task(config))
+
+
+async def run_task(config: Config) -> None:
+    """
+    Runs one agent session for the task in `config` until the model ends it or the steps limit is reached.
+
+    Model requests are awaited via the client's `achat`, commands run in a worker thread, so several
+    sessions (each with its own config) can share one event loop, e.g.
+    `await asyncio.gather(run_task(config_a), run_task(config_b))`.
+
+    With `config.resume`, the run with `config.task_id` continues where it stopped: the memory and the loop
+    state are restored from its memory checkpoint and its log and metrics are appended to.
+
+    :param config: The loaded configuration with a task (or `resume` and the task_id of a run).
+    """
+    if config.resume and config.task_id is None:
+        raise ValueError("[ERROR] Resuming a run requires its task_id.")
 
     # Generate a new task ID if not provided
     if config.task_id is None:
@@ -64,6 +99,29 @@ def main() -> None:
             str(config.metadata.filepath).replace("{{task_id}}", config.task_id.hex)
         )
 
+    if config.metrics.filepath is not None:
+        config.metrics.filepath = Path(
+            str(config.metrics.filepath).replace("{{task_id}}", config.task_id.hex)
+        )
+
+    if config.output_compaction.dirpath is not None:
+        config.output_compaction.dirpath = Path(
+            str(config.output_compaction.dirpath).replace(
+                "{{task_id}}", config.task_id.hex
+            )
+        )
+
+    # Restore the checkpoint (and the task) of the run to resume
+    resume_state = load_resume_state(config) if config.resume else None
+
+    # Task must be defined now!
+    if config.task is None:
+        raise ValidationError("[ERROR] Task is not defined in the configuration.")
+
+    if resume_state is not None and (resume_state["loop"] or {}).get("done"):
+        print(f"[INFO] Task {config.task_id} is already finished.")
+        return
+
     # Load secrets
     load_secrets(config.secrets_path)
 
@@ -85,94 +143,322 @@ def main() -> None:
             f.write(config.model_dump_json(indent=2))
 
     # Logging
-    clear_log(config)
-    log_message(config, name="Instruction", color=0, content=config.introduction_prompt)
-    log_message(config, name="Instruction", color=0, content=first_message)
+    if resume_state is None:
+        clear_log(config)
+        clear_metrics(config)
+        log_message(
+            config, name="Instruction", color=0, content=config.introduction_prompt
+        )
+        log_message(config, name="Instruction", color=0, content=first_message)
 
     # Init AI client
     client: Client = load_client(
         system_content=config.introduction_prompt, config=config
     )
     context: CommandContext = {"ai_client": client, "config": config}
+    if resume_state is not None:
+        if not hasattr(client, "restore_memory"):
+            raise ValueError(
+                f"[ERROR] Client '{config.ai_client.client}' can't resume a run."
+            )
+        client.restore_memory(resume_state["lists"])
 
-    # Prepare OpenAI functions
-    functions_schema = [client.get_function_schema(cmd) for cmd in commands.values()]
+    # Checkpoint every memory change, so a crash or an aborted run keeps its history
+    checkpoint: Optional[MemoryCheckpoint] = None
+    if (
+        config.memory.log
+        and config.memory.checkpoint
+        and config.memory.checkpoint_path
+        and hasattr(client, "attach_checkpoint")
+    ):
+        checkpoint = MemoryCheckpoint(
+            config.memory.checkpoint_path, config.memory.fsync_batch
+        )
+        if resume_state is not None:
+            checkpoint.loop = resume_state["loop"]
+        client.attach_checkpoint(checkpoint)
+
+    # Index evicted messages and retrieve the relevant ones on every turn
+    retrieval: Optional[RetrievalIndex] = None
+    if config.memory.retrieval and hasattr(client, "attach_retrieval"):
+        if resume_state is None and config.memory.retrieval_path:
+            config.memory.retrieval_path.unlink(missing_ok=True)
+        retrieval = RetrievalIndex(
+            config.memory.retrieval_path,
+            config.memory.retrieval_top_k,
+            config.memory.retrieval_max_tokens,
+        )
+        client.attach_retrieval(retrieval)
+
+    # Run likely next reads while the model is thinking, `Command.run` answers from their results
+    prefetcher: Optional[Prefetcher] = None
+    if config.prefetch.active:
+        prefetcher = Prefetcher(commands, context, config.prefetch.max_commands)
+        context["prefetcher"] = prefetcher
+
+    # Prepare the function schemas (built once per process) and report their prompt cost
+    functions_schema = build_function_schemas(
+        client, commands.values(), compact=config.function_schemas.compact
+    )
+    schema_report = function_schema_report(client, commands.values())
+    print(
+        f"[INFO] Function schemas: {schema_report['count']} schemas, "
+        f"{schema_report['tokens']} tokens per request "
+        f"({schema_report['compact_tokens']} compact)"
+    )
 
     # === Start Loop ===
     message = first_message
     function_result: Optional[FunctionResult] = None
+    function_results: Optional[List[FunctionResult]] = None
+    # the calls and reasoning of the last turn, the reads are predicted from them (the task at first)
+    function_calls: List[ToolCall] = []
+    reasoning: Optional[str] = config.task
 
     steps = 0
-    while True:
-        # 1. Call OpenAI
-        chat_result = client.chat(
-            message=message, function_result=function_result, functions=functions_schema
-        )
-        reasoning, func_name, func_args = (
-            chat_result["message"],
-            chat_result["function_name"],
-            chat_result["function_args"],
+    if resume_state is not None:
+        steps, message, function_result, function_results = resume_inputs(resume_state)
+        print(f"[INFO] Resuming task {config.task_id} at step {steps}")
+        log_message(
+            config,
+            name="SYSTEM",
+            color=1,
+            content=f"[RESUME] Resuming at step {steps}.",
         )
+    step_records: List[StepMetrics] = []
+    try:
+        record_loop(checkpoint, steps, message, function_result, function_results)
+        while True:
+            # checked before the request, so a resumed run that already reached the limit stops as well
+            if config.steps_limit and steps >= config.steps_limit:
+                log_message(
+                    config,
+                    name="SYSTEM",
+                    color=1,
+                    content="[END] Maximum number of steps reached.",
+                )
+                break
 
-        # 2. Log assistant reasoning (if any)
-        if reasoning and reasoning.strip():
-            print("AI:", reasoning.strip())
-            log_message(config, name="AI", color=1, content=reasoning)
+            if prefetcher is not None:
+                prefetcher.prefetch(function_calls, reasoning)
 
-        if func_name and func_args:
-            print("AI:", func_name, func_args)
-            log_message(
-                config,
-                name="AI",
-                color=1,
-                content=json.dumps(
-                    {"function_name": func_name, "arguments": json.loads(func_args)}
-                ),
-                language="json",
+            # 1. Call OpenAI
+            start = time.perf_counter()
+            chat_result = await achat(
+                client, functions_schema, message, function_result, function_results
             )
+            latency = time.perf_counter() - start
+            reasoning = chat_result["message"]
+            function_calls = chat_result.get("function_calls", [])
+            if (
+                "function_calls" not in chat_result
+                and chat_result["function_name"]
+                and chat_result["function_args"]
+            ):
+                function_calls = [
+                    {
+                        "id": None,
+                        "name": chat_result["function_name"],
+                        "arguments": chat_result["function_args"],
+                    }
+                ]
+
+            # 2. Log assistant reasoning (if any)
+            if reasoning and reasoning.strip():
+                if not chat_result.get("streamed"):
+                    print("AI:", reasoning.strip())
+                log_message(config, name="AI", color=1, content=reasoning)
 
-        if reasoning and (
-            reasoning.strip() == "END" or reasoning.strip().endswith("END")
-        ):
-            if config.memory.log:
-                client.store_memory(str(config.memory.filepath))
-            break
-
-        # 3. If a function is called, run it and prepare result
-        if func_name is not None and func_args:
-            if func_name not in commands:
-                # Give error feedback to AI
-                message = f"[ERROR] Unknown function: {func_name}"
-                log_message(config, name="Output", color=2, content=message)
-            else:
-                command_output = commands[func_name].run(func_args, context)
-
-                # Log output of the command
+            for function_call in function_calls:
+                print("AI:", function_call["name"], function_call["arguments"])
                 log_message(
                     config,
-                    name="Output",
-                    color=2,
-                    content=command_output,
-                    language="txt",
+                    name="AI",
+                    color=1,
+                    content=json.dumps(
+                        {
+                            "function_name": function_call["name"],
+                            "arguments": json.loads(function_call["arguments"]),
+                        }
+                    ),
+                    language="json",
                 )
 
-                # Prepare for next loop
-                message = ""
-                function_result = {"name": func_name, "output": command_output}
-        else:
-            # No function call, continue reasoning
+            if reasoning and (
+                reasoning.strip() == "END" or reasoning.strip().endswith("END")
+            ):
+                step_records.append(step_metrics(steps, chat_result, latency, []))
+                log_metrics(config, dict(step_records[-1]))
+                record_loop(checkpoint, steps, done=True)
+                break
+
+            # 3. If functions are called, run them (read-only ones concurrently) and prepare the results
             message = ""
             function_result = None
+            function_results = None
+            results: List[FunctionResult] = []
+            if function_calls:
+                results = await asyncio.to_thread(
+                    run_commands,
+                    function_calls,
+                    commands,
+                    context,
+                    config.max_parallel_commands,
+                )
+
+                # Log output of the commands
+                for result in results:
+                    log_message(
+                        config,
+                        name="Output",
+                        color=2,
+                        content=result["output"],
+                        language="txt",
+                    )
+
+                # Fit large outputs into their token budget before they enter the memory
+                compacted_results = compact_results(results, steps, config, client)
+
+                # Prepare for next loop
+                if "function_calls" in chat_result:
+                    function_results = compacted_results
+                else:
+                    function_result = {
+                        "name": compacted_results[0]["name"],
+                        "output": compacted_results[0]["output"],
+                    }
+
+            step_records.append(step_metrics(steps, chat_result, latency, results))
+            log_metrics(config, dict(step_records[-1]))
+
+            steps += 1
+            record_loop(checkpoint, steps, message, function_result, function_results)
+    finally:
+        # Persist the memory however the loop ended (END, steps limit, error or Ctrl-C)
+        if checkpoint is not None:
+            client.checkpoint_memory(compact=True)  # type: ignore[attr-defined]
+            checkpoint.close()
+        if retrieval is not None:
+            retrieval.close()
+        if prefetcher is not None:
+            prefetcher.close()
+        # The checkpoint already holds the memory, the memory file is only exported on request
+        if config.memory.log and (checkpoint is None or config.memory.export):
+            client.store_memory(str(config.memory.filepath))
+
+    # Summarize the step metrics (p50/p95)
+    metrics_summary = summarize_metrics(step_records)
+    schema_tokens = (
+        schema_report["compact_tokens"]
+        if config.function_schemas.compact
+        else schema_report["tokens"]
+    )
+    log_metrics(
+        config,
+        {
+            "type": "summary",
+            "steps": len(step_records),
+            **metrics_summary,
+            "function_schemas": {
+                **schema_report,
+                "compact": config.function_schemas.compact,
+                "saved_tokens": (schema_report["tokens"] - schema_tokens)
+                * len(step_records),
+            },
+            **({"prefetch": prefetcher.report()} if prefetcher is not None else {}),
+        },
+    )
+    for name, values in metrics_summary.items():
+        print(
+            f"[INFO] Metrics {name}: p50={values['p50']:.3f} p95={values['p95']:.3f} "
+            f"total={values['total']:.3f} (n={values['count']:.0f})"
+        )
 
-        steps += 1
-        if config.steps_limit and steps >= config.steps_limit:
+    # Report requests, latency and tokens per model (e.g. main model vs. summary model)
+    usage = getattr(client, "usage", None)
+    if isinstance(usage, UsageTracker):
+        report = usage.report()
+        for line in report:
+            print("[INFO] Usage", line)
+        if report:
             log_message(
-                config,
-                name="SYSTEM",
-                color=1,
-                content="[END] Maximum number of steps reached.",
+                config, name="Usage", color=2, content="\n".join(report), language="txt"
             )
-            break
+
+    if retrieval is not None:
+        print("[INFO] Retrieval", retrieval.report())
+
+    if prefetcher is not None:
+        prefetch = prefetcher.report()
+        hit_rate = prefetch["hits"] / prefetch["lookups"] if prefetch["lookups"] else 0
+        print(
+            f"[INFO] Prefetch: {prefetch['prefetched']} reads prefetched, "
+            f"{prefetch['hits']}/{prefetch['lookups']} reads answered ({hit_rate:.0%}), "
+            f"{prefetch['saved_seconds']:.3f}s saved"
+        )
+
+    # Report how many requests reused a pooled connection
+    http_pool = getattr(client, "http_pool", None)
+    if isinstance(http_pool, HttpPool):
+        print("[INFO] HTTP", http_pool.report())
+
+
+def record_loop(
+    checkpoint: Optional[MemoryCheckpoint],
+    step: int,
+    message: str = "",
+    function_result: Optional[FunctionResult] = None,
+    function_results: Optional[List[FunctionResult]] = None,
+    done: bool = False,
+) -> None:
+    """
+    Records the step counter and the input of the next request in the checkpoint, so `--resume` can
+    continue the loop. Does nothing without a checkpoint.
+    """
+    if checkpoint is None:
+        return
+    checkpoint.record_loop(
+        {
+            "step": step,
+            "done": done,
+            "pending": (
+                None
+                if done
+                else {
+                    "message": message,
+                    "function_result": function_result,
+                    "function_results": function_results,
+                }
+            ),
+        }
+    )
+
+
+async def achat(
+    client: Client,
+    functions: List[Function],
+    message: str,
+    function_result: Optional[FunctionResult],
+    function_results: Optional[List[FunctionResult]],
+) -> ChatResult:
+    """
+    Sends the next turn to the client without blocking the event loop. Uses the client's `achat` if it
+    has one (subclasses of `Client` inherit one that runs `chat` in a worker thread), otherwise runs `chat`
+    in a worker thread. `function_results` is only passed if set, so custom clients that predate it keep
+    working.
+
+    :return: The ChatResult of the client.
+    """
+    kwargs: Dict[str, Any] = (
+        {"function_results": function_results}
+        if function_results is not None
+        else {"function_result": function_result}
+    )
+    if hasattr(client, "achat"):
+        return await client.achat(functions=functions, message=message, **kwargs)
+    return await asyncio.to_thread(
+        client.chat, functions=functions, message=message, **kwargs
+    )
 
 
 if __name__ == "__main__":
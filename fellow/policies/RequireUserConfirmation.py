@@ -24,6 +24,8 @@ class RequireUserConfirmation(Policy[RequireUserConfirmationConfig]):
     Policy that asks the user for confirmation before allowing the command to proceed.
     """
 
+    interactive = True
+
     def __init__(self, config: RequireUserConfirmationConfig):
         self.config = config
 
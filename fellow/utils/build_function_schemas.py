@@ -0,0 +1,150 @@
+import json
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Tuple, TypedDict
+
+from fellow.clients.Client import Client, Function
+from fellow.utils.count_tokens import count_tokens
+
+if TYPE_CHECKING:  # pragma: no cover
+    from fellow.commands.Command import Command  # pragma: no cover
+
+_SCHEMA_CACHE: Dict[Tuple[type, type, Any, bool], Function] = {}
+_SCHEMA_CACHE_LOCK = threading.Lock()
+
+# keywords whose value is a single sub-schema, a list of sub-schemas or a mapping of names to sub-schemas
+_SUBSCHEMA_KEYS = {"items", "additionalProperties", "not"}
+_SUBSCHEMA_LIST_KEYS = {"anyOf", "oneOf", "allOf", "prefixItems"}
+_SUBSCHEMA_MAP_KEYS = {"properties", "$defs", "definitions"}
+
+
+class FunctionSchemaReport(TypedDict):
+    count: int
+    """
+    Number of function schemas sent with every request.
+    """
+
+    tokens: int
+    """
+    Estimated prompt tokens of the full schemas.
+    """
+
+    compact_tokens: int
+    """
+    Estimated prompt tokens of the compacted schemas.
+    """
+
+
+def build_function_schemas(
+    client: Client, commands: Iterable["Command"], compact: bool = False
+) -> List[Function]:
+    """
+    Returns the function schemas of the commands for the client.
+
+    Schemas are built once per process and cached per client class, command input type and handler, so
+    repeated runs and sessions don't rebuild them. The returned schemas are shared; do not modify them.
+
+    :param client: The AI client that defines the schema format.
+    :param commands: The commands to describe.
+    :param compact: Strip keys that don't help the model, see `compact_function_schema`.
+    :return: One schema per command, in the same order.
+    """
+    return [_function_schema(client, command, compact) for command in commands]
+
+
+def _function_schema(client: Client, command: "Command", compact: bool) -> Function:
+    key = (type(client), command.input_type, command.command_handler, compact)
+    with _SCHEMA_CACHE_LOCK:
+        schema = _SCHEMA_CACHE.get(key)
+    if schema is None:
+        if compact:
+            schema = compact_function_schema(_function_schema(client, command, False))
+        else:
+            schema = client.get_function_schema(command)
+        with _SCHEMA_CACHE_LOCK:
+            schema = _SCHEMA_CACHE.setdefault(key, schema)
+    return schema
+
+
+def compact_function_schema(schema: Function) -> Function:
+    """
+    Removes what is resent on every turn without helping the model choose or call a function:
+
+    - pydantic `title` keywords (property names already say the same),
+    - `default: null` (an optional property that is left out is null anyway),
+    - `anyOf: [X, {"type": "null"}]`, which is reduced to X,
+    - repeated whitespace and line breaks in descriptions.
+
+    :param schema: The function schema.
+    :return: A compacted copy of the schema.
+    """
+    compacted: Function = {
+        "name": schema["name"],
+        "description": _squeeze(schema["description"]),
+        "parameters": _compact_node(schema["parameters"]),
+    }
+    return compacted
+
+
+def _squeeze(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _compact_node(node: Any) -> Any:
+    if not isinstance(node, dict):
+        return node
+    result: Dict[str, Any] = {}
+    for key, value in node.items():
+        if key == "title" or (key == "default" and value is None):
+            continue
+        if key == "description" and isinstance(value, str):
+            result[key] = _squeeze(value)
+        elif key in _SUBSCHEMA_KEYS:
+            result[key] = _compact_node(value)
+        elif key in _SUBSCHEMA_LIST_KEYS and isinstance(value, list):
+            result[key] = [_compact_node(item) for item in value]
+        elif key in _SUBSCHEMA_MAP_KEYS and isinstance(value, dict):
+            result[key] = {name: _compact_node(item) for name, item in value.items()}
+        else:
+            result[key] = value
+    any_of = result.get("anyOf")
+    if isinstance(any_of, list):
+        not_null = [item for item in any_of if item != {"type": "null"}]
+        if len(not_null) == 1 and len(any_of) == 2 and isinstance(not_null[0], dict):
+            del result["anyOf"]
+            result = {**not_null[0], **result}
+    return result
+
+
+def count_schema_tokens(client: Client, schemas: List[Function]) -> int:
+    """
+    Estimates the prompt tokens of a schema set as the model sees them, if the client's token counter
+    knows its function format (`TokenCounter.count_functions`), and from the JSON of the schemas otherwise.
+
+    :param client: The AI client the schemas are sent with.
+    :param schemas: The function schemas.
+    :return: The estimated number of tokens.
+    """
+    token_counter = getattr(client, "token_counter", None)
+    if token_counter is not None and hasattr(token_counter, "count_functions"):
+        return token_counter.count_functions(schemas)
+    return count_tokens(client, json.dumps(schemas, separators=(",", ":")))
+
+
+def function_schema_report(
+    client: Client, commands: Iterable["Command"]
+) -> FunctionSchemaReport:
+    """
+    Compares the prompt tokens of the full and the compacted schemas of the commands.
+
+    :param client: The AI client the schemas are sent with.
+    :param commands: The commands to describe.
+    :return: The number of schemas and their tokens before and after compaction.
+    """
+    commands = list(commands)
+    full = build_function_schemas(client, commands)
+    compacted = build_function_schemas(client, commands, compact=True)
+    return {
+        "count": len(full),
+        "tokens": count_schema_tokens(client, full),
+        "compact_tokens": count_schema_tokens(client, compacted),
+    }
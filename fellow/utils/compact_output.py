@@ -0,0 +1,226 @@
+import re
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from fellow.clients.Client import Client, FunctionResult
+from fellow.utils.count_tokens import count_tokens
+from fellow.utils.load_config import Config
+
+# share of the budget kept from the start of the output, the rest is kept from the end (errors, summaries)
+HEAD_SHARE = 1 / 3
+
+# a line has to repeat at least this often (including itself) to be collapsed
+MIN_REPEATS = 3
+
+# longer lines (minified code, JSON blobs) are split into lines of this many characters for paging
+MAX_LINE_CHARS = 500
+
+
+def split_long_lines(lines: List[str]) -> List[str]:
+    """
+    Splits lines longer than `MAX_LINE_CHARS` into consecutive lines of at most that many characters, so
+    every part of an output can be paged through by line number.
+
+    :param lines: The lines of the output.
+    :return: The lines with long lines split.
+    """
+    if all(len(line) <= MAX_LINE_CHARS for line in lines):
+        return lines
+    split: List[str] = []
+    for line in lines:
+        if len(line) <= MAX_LINE_CHARS:
+            split.append(line)
+        else:
+            split.extend(
+                line[i : i + MAX_LINE_CHARS]
+                for i in range(0, len(line), MAX_LINE_CHARS)
+            )
+    return split
+
+
+def dedup_lines(lines: List[str]) -> List[Tuple[int, str]]:
+    """
+    Collapses runs of identical consecutive lines into the line and a repetition note.
+
+    :param lines: The lines of the output.
+    :return: (1-based line number in the original output, text) per remaining line.
+    """
+    entries: List[Tuple[int, str]] = []
+    i = 0
+    while i < len(lines):
+        j = i
+        while j + 1 < len(lines) and lines[j + 1] == lines[i]:
+            j += 1
+        if j - i + 1 >= MIN_REPEATS:
+            entries.append((i + 1, lines[i]))
+            entries.append((i + 2, f"[... previous line repeated {j - i} more times]"))
+        else:
+            entries.extend((k + 1, lines[k]) for k in range(i, j + 1))
+        i = j + 1
+    return entries
+
+
+def compact_output(
+    output: str,
+    max_tokens: int,
+    count: Callable[[str], int],
+    output_id: Optional[str] = None,
+) -> Tuple[str, bool]:
+    """
+    Fits a command output into a token budget.
+
+    Repeated lines are collapsed first, with a note that references the stored output if it still fits. If
+    the output is still too long, only its first and last lines are kept (a third and two thirds of the
+    budget) and the omitted line range is marked. Line numbers in the marker refer to the original output
+    with long lines split (see `split_long_lines`), as `read_output` returns it, so the omitted part can be
+    paged through with `view_output`.
+
+    :param output: The command output.
+    :param max_tokens: The token budget.
+    :param count: Counts the tokens of a text.
+    :param output_id: The id under which the full output is stored, if it is stored.
+    :return: The compacted output and whether lines were omitted.
+    """
+    if count(output) <= max_tokens:
+        return output, False
+    lines = output.splitlines()
+    entries = dedup_lines(lines)
+    deduped = "\n".join(text for _, text in entries)
+    deduped_tokens = count(deduped)
+    if deduped_tokens <= max_tokens:
+        if output_id is not None:
+            noted = (
+                f'{deduped}\n[Repeated lines collapsed. The full output is stored as "{output_id}", '
+                f'page through it with view_output(output_id="{output_id}").]'
+            )
+            if count(noted) <= max_tokens:
+                return noted, False
+        return deduped, False
+
+    split = split_long_lines(lines)
+    lines_split = len(split) != len(lines)
+    if lines_split:
+        lines = split
+        entries = dedup_lines(lines)
+        deduped = "\n".join(text for _, text in entries)
+        deduped_tokens = count(deduped)
+
+    # convert the token budget into characters with the ratio of this output
+    budget = int(max_tokens * len(deduped) / max(1, deduped_tokens))
+    head_budget = int(budget * HEAD_SHARE)
+    tail_budget = budget - head_budget
+
+    head: List[Tuple[int, str]] = []
+    used = 0
+    for entry in entries:
+        if used + len(entry[1]) + 1 > head_budget:
+            break
+        head.append(entry)
+        used += len(entry[1]) + 1
+    first_omitted = entries[len(head)][0]
+    if not head:
+        # a line longer than the head budget: keep its beginning
+        head = [(entries[0][0], entries[0][1][:head_budget])]
+
+    tail: List[Tuple[int, str]] = []
+    used = 0
+    for entry in reversed(entries[len(head) :]):
+        if used + len(entry[1]) + 1 > tail_budget:
+            break
+        tail.insert(0, entry)
+        used += len(entry[1]) + 1
+
+    last_omitted = tail[0][0] - 1 if tail else len(lines)
+    omitted_tokens = deduped_tokens - count("\n".join(text for _, text in head + tail))
+    if output_id is not None:
+        split_note = (
+            f", lines over {MAX_LINE_CHARS} characters split" if lines_split else ""
+        )
+        reference = (
+            f'The full output ({len(lines)} lines{split_note}) is stored as "{output_id}", '
+            f'page through it with view_output(output_id="{output_id}", '
+            f"from_line={first_omitted}, to_line=...)."
+        )
+    else:
+        reference = "Request a smaller range to see them."
+    marker = (
+        f"[... lines {first_omitted}-{last_omitted} omitted "
+        f"(~{max(0, omitted_tokens)} tokens). {reference}]"
+    )
+    compacted = "\n".join(
+        [text for _, text in head] + [marker] + [text for _, text in tail]
+    )
+    return compacted, True
+
+
+def output_path(config: Config, output_id: str) -> Optional[Path]:
+    """
+    :return: The file the full output with `output_id` is spilled to, or None if spilling is disabled.
+    """
+    if not config.output_compaction.dirpath:
+        return None
+    return config.output_compaction.dirpath / f"{output_id}.txt"
+
+
+def compact_results(
+    results: List[FunctionResult], step: int, config: Config, client: Client
+) -> List[FunctionResult]:
+    """
+    Compacts the outputs of one step before they are sent to the model and enter its memory.
+
+    Every output is limited to the `max_output_tokens` of its command (or `output_compaction.max_tokens`).
+    If the output was changed, the full output is written to the output directory of the run and the
+    compacted output references it by id.
+
+    :param results: The command results of the step.
+    :param step: The step number, part of the output ids.
+    :param config: The configuration.
+    :param client: The AI client, used to count tokens.
+    :return: The results with compacted outputs, in the same order.
+    """
+    if not config.output_compaction.active:
+        return results
+    compacted_results: List[FunctionResult] = []
+    for index, result in enumerate(results):
+        command_config = config.commands.get(result["name"])
+        max_tokens = (
+            command_config.max_output_tokens
+            if command_config and command_config.max_output_tokens
+            else config.output_compaction.max_tokens
+        )
+        output_id = _output_id(step, index, result)
+        path = (
+            output_path(config, output_id) if result["name"] != "view_output" else None
+        )
+        output, _ = compact_output(
+            result["output"],
+            max_tokens,
+            lambda text: count_tokens(client, text),
+            output_id if path else None,
+        )
+        if path and output != result["output"]:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(result["output"], encoding="utf-8")
+        compacted_results.append({**result, "output": output})
+    return compacted_results
+
+
+def _output_id(step: int, index: int, result: FunctionResult) -> str:
+    call_id = result.get("call_id")
+    if isinstance(call_id, str) and call_id:
+        return re.sub(r"[^A-Za-z0-9_-]", "_", call_id)
+    return f"step{step}_{index}"
+
+
+def read_output(config: Config, output_id: str) -> Optional[List[str]]:
+    """
+    Reads the lines of a spilled output, with long lines split as in the markers of `compact_output`.
+
+    :return: The lines, or None if there is no output with this id.
+    """
+    if not re.fullmatch(r"[A-Za-z0-9_-]+", output_id):
+        return None
+    path = output_path(config, output_id)
+    if path is None or not path.is_file():
+        return None
+    return split_long_lines(path.read_text(encoding="utf-8").splitlines())
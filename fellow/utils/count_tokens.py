@@ -0,0 +1,16 @@
+from fellow.clients.Client import Client
+
+
+def count_tokens(client: Client, text: str) -> int:
+    """
+    Estimates the tokens of `text` with the client's token counter, if it has one, and with 4 characters
+    per token otherwise.
+
+    :param client: The AI client the text is sent with.
+    :param text: The text to count.
+    :return: The estimated number of tokens.
+    """
+    token_counter = getattr(client, "token_counter", None)
+    if token_counter is not None and hasattr(token_counter, "count"):
+        return token_counter.count(text)
+    return len(text) // 4
@@ -35,6 +35,7 @@ class {client_name}Client(Client[{client_name}ClientConfig]):
         functions: List[Function],
         message: str = "",
         function_result: Optional[FunctionResult] = None,
+        function_results: Optional[List[FunctionResult]] = None,
     ) -> ChatResult:
         # todo:
 
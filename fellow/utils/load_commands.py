@@ -6,7 +6,7 @@ from typing import Dict, Optional, Tuple, Type, TypeVar, cast
 
 from pydantic import ValidationError
 
-from fellow.commands import ALL_COMMANDS
+from fellow.commands import ALL_COMMANDS, READ_ONLY_COMMANDS
 from fellow.commands.Command import Command, CommandHandler, CommandInput
 from fellow.policies import ALL_POLICIES
 from fellow.policies.Policy import Policy, PolicyConfig
@@ -89,6 +89,15 @@ def load_commands(config: Config) -> Dict[str, Command]:
         make_plan_input, make_plan_handler = ALL_COMMANDS["make_plan"]
         config.commands["make_plan"] = CommandConfig()
 
+    # Add view_output command if large outputs are spilled to files
+    if (
+        config.output_compaction.active
+        and config.output_compaction.dirpath
+        and "view_output" in ALL_COMMANDS
+        and "view_output" not in config.commands
+    ):
+        config.commands["view_output"] = CommandConfig()
+
     # Filter only the ones listed in config.commands
     for command_name, command_config in config.commands.items():
         policies = []
@@ -115,6 +124,8 @@ def load_commands(config: Config) -> Dict[str, Command]:
                 input_type=command_input,
                 command_handler=command_handler,
                 policies=policies,
+                read_only=command_name in READ_ONLY_COMMANDS
+                and custom_commands_map[command_name] == ALL_COMMANDS[command_name],
             )
         else:
             raise ValueError(
@@ -34,6 +34,26 @@ class LogConfig(BaseModel):
 class MemoryConfig(BaseModel):
     log: bool
     filepath: Optional[Path]
+    checkpoint: bool = True
+    fsync_batch: int = 10
+    export: bool = False
+    retrieval: bool = False
+    retrieval_top_k: int = 3
+    retrieval_max_tokens: int = 500
+
+    @property
+    def checkpoint_path(self) -> Optional[Path]:
+        """
+        The JSONL checkpoint next to the memory file.
+        """
+        return self.filepath.with_suffix(".jsonl") if self.filepath else None
+
+    @property
+    def retrieval_path(self) -> Optional[Path]:
+        """
+        The retrieval index of the evicted messages, next to the memory file.
+        """
+        return self.filepath.with_name("retrieval.jsonl") if self.filepath else None
 
     @model_validator(mode="after")
     def validate_config(self) -> "MemoryConfig":
@@ -59,6 +79,35 @@ class MetadataConfig(BaseModel):
         return self
 
 
+class MetricsConfig(BaseModel):
+    log: bool
+    filepath: Optional[Path]
+
+    @model_validator(mode="after")
+    def validate_config(self) -> "MetricsConfig":
+        if self.log:
+            if not self.filepath:
+                raise ValueError("Metrics log is active but no filepath provided")
+            if not self.filepath.suffix == ".jsonl":
+                raise ValueError("Metrics filepath must end with '.jsonl'")
+        return self
+
+
+class OutputCompactionConfig(BaseModel):
+    active: bool
+    max_tokens: int
+    dirpath: Optional[Path]
+
+
+class FunctionSchemaConfig(BaseModel):
+    compact: bool
+
+
+class PrefetchConfig(BaseModel):
+    active: bool
+    max_commands: int
+
+
 class ClientConfig(BaseModel):
     client: str
     config: Optional[Dict[str, Any]] = {}
@@ -71,6 +120,7 @@ class PolicyConfig(BaseModel):
 
 class CommandConfig(BaseModel):
     policies: List[PolicyConfig] = []
+    max_output_tokens: Optional[int] = None
 
 
 class Config(BaseModel):
@@ -78,14 +128,20 @@ class Config(BaseModel):
     first_message: str
     task: Optional[str]
     task_id: Optional[UUID]
+    resume: bool = False
     log: LogConfig
     memory: MemoryConfig
     metadata: MetadataConfig
+    metrics: MetricsConfig
     ai_client: ClientConfig
     commands: Dict[str, CommandConfig]
+    function_schemas: FunctionSchemaConfig
+    output_compaction: OutputCompactionConfig
     default_policies: List[PolicyConfig]
     planning: PlanningConfig
     steps_limit: Optional[int]
+    max_parallel_commands: int
+    prefetch: PrefetchConfig
     custom_commands_paths: List[Path]
     custom_clients_paths: List[Path]
     custom_policies_paths: List[Path]
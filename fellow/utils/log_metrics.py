@@ -0,0 +1,195 @@
+import json
+import math
+from typing import Dict, List, Optional, Sequence, TypedDict
+
+from fellow.clients.Client import ChatResult, FunctionResult
+from fellow.utils.load_config import Config
+
+
+class CommandMetrics(TypedDict):
+    name: str
+    """
+    The name of the command.
+    """
+
+    wall_time: Optional[float]
+    """
+    Wall time of the command in seconds.
+    """
+
+    output_size: int
+    """
+    Number of characters of the command output.
+    """
+
+
+class StepMetrics(TypedDict):
+    type: str
+    """
+    Always "step".
+    """
+
+    step: int
+    """
+    The step number, starting at 0.
+    """
+
+    model: Optional[str]
+    """
+    The model that answered the request, if the client reports it.
+    """
+
+    latency: float
+    """
+    Wall time of the model request in seconds.
+    """
+
+    time_to_first_token: Optional[float]
+    """
+    Seconds until the first streamed token arrived, if the response was streamed.
+    """
+
+    prompt_tokens: Optional[int]
+    """
+    Number of prompt tokens reported by the provider.
+    """
+
+    estimated_prompt_tokens: Optional[int]
+    """
+    Number of prompt tokens the client estimated for the request.
+    """
+
+    completion_tokens: Optional[int]
+    """
+    Number of completion tokens reported by the provider.
+    """
+
+    cached_tokens: Optional[int]
+    """
+    Number of prompt tokens the provider served from its prompt cache.
+    """
+
+    commands: List[CommandMetrics]
+    """
+    The commands run in this step, in call order.
+    """
+
+
+def step_metrics(
+    step: int,
+    chat_result: ChatResult,
+    latency: float,
+    results: Sequence[FunctionResult],
+) -> StepMetrics:
+    """
+    Builds the metrics record of one step from the chat result and the command results.
+
+    :param step: The step number.
+    :param chat_result: The ChatResult of the model request.
+    :param latency: Wall time of the model request measured by the runner, used if the client does not
+        report its own.
+    :param results: The results of the commands run in this step.
+    :return: The metrics record.
+    """
+    usage = chat_result.get("usage", {})
+    return {
+        "type": "step",
+        "step": step,
+        "model": usage.get("model"),
+        "latency": usage.get("latency", latency),
+        "time_to_first_token": usage.get("time_to_first_token"),
+        "prompt_tokens": usage.get("prompt_tokens"),
+        "estimated_prompt_tokens": usage.get("estimated_prompt_tokens"),
+        "completion_tokens": usage.get("completion_tokens"),
+        "cached_tokens": usage.get("cached_tokens"),
+        "commands": [
+            {
+                "name": result["name"],
+                "wall_time": result.get("wall_time"),
+                "output_size": len(result["output"]),
+            }
+            for result in results
+        ],
+    }
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """
+    Returns the q-th percentile (0-100) of `values` with linear interpolation, or None if empty.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    lower, upper = math.floor(rank), math.ceil(rank)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarize_metrics(records: Sequence[StepMetrics]) -> Dict[str, Dict[str, float]]:
+    """
+    Computes count, total, p50 and p95 of the model latency, time to first token, command wall time and
+    token counts over all steps of a run. `prompt_token_error` is the estimated minus the reported prompt
+    tokens of the steps that have both.
+
+    :param records: The step records of the run.
+    :return: The summary per metric, metrics without any values are left out.
+    """
+    samples: Dict[str, List[float]] = {
+        "latency": [],
+        "time_to_first_token": [],
+        "prompt_tokens": [],
+        "completion_tokens": [],
+        "cached_tokens": [],
+        "prompt_token_error": [],
+        "command_wall_time": [],
+        "command_output_size": [],
+    }
+    for record in records:
+        for key in (
+            "latency",
+            "time_to_first_token",
+            "prompt_tokens",
+            "completion_tokens",
+            "cached_tokens",
+        ):
+            value = record.get(key)
+            if isinstance(value, (int, float)):
+                samples[key].append(value)
+        estimated, reported = record.get("estimated_prompt_tokens"), record.get(
+            "prompt_tokens"
+        )
+        if isinstance(estimated, int) and isinstance(reported, int):
+            samples["prompt_token_error"].append(estimated - reported)
+        for command in record["commands"]:
+            if command["wall_time"] is not None:
+                samples["command_wall_time"].append(command["wall_time"])
+            samples["command_output_size"].append(command["output_size"])
+
+    summary: Dict[str, Dict[str, float]] = {}
+    for key, values in samples.items():
+        if not values:
+            continue
+        summary[key] = {
+            "count": len(values),
+            "total": sum(values),
+            "p50": percentile(values, 50) or 0.0,
+            "p95": percentile(values, 95) or 0.0,
+        }
+    return summary
+
+
+def log_metrics(config: Config, record: Dict) -> None:
+    """
+    Appends one record as a JSON line to the metrics file, if metrics are enabled.
+    """
+    if config.metrics.log and config.metrics.filepath:
+        config.metrics.filepath.parent.mkdir(parents=True, exist_ok=True)
+        with open(config.metrics.filepath, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+def clear_metrics(config: Config) -> None:
+    if config.metrics.log and config.metrics.filepath:
+        config.metrics.filepath.parent.mkdir(parents=True, exist_ok=True)
+        with open(config.metrics.filepath, "w", encoding="utf-8") as f:
+            f.write("")
@@ -59,11 +59,23 @@ def parse_args() -> Namespace:
     )
     parser.add_argument("--task", help="The task fellow should perform")
     parser.add_argument("--task_id", help="The task ID (UUID4 format)", type=uuid.UUID)
+    parser.add_argument(
+        "--resume",
+        action="store_const",
+        const=True,
+        help="Resume the interrupted run with --task_id from its memory checkpoint",
+    )
     parser.add_argument("--log.filepath", help="Log file path")
     parser.add_argument("--log.active", type=str2bool, help="Enable or disable logging")
     parser.add_argument("--log.spoiler", type=str2bool, help="Wrap logs in spoilers")
     parser.add_argument(
-        "--ai_client.client", help="AI provider (e.g. openai, gemini or custom client)"
+        "--memory.export",
+        type=str2bool,
+        help="Also write the memory file at the end of a run with a memory checkpoint",
+    )
+    parser.add_argument(
+        "--ai_client.client",
+        help="AI provider (e.g. openai, gemini, replay or custom client)",
     )
     parser.add_argument(
         "--ai_client.config",
@@ -79,7 +91,27 @@ def parse_args() -> Namespace:
         type=json.loads,
         help="JSON object mapping command names to their configurations",
     )
+    parser.add_argument(
+        "--function_schemas.compact",
+        type=str2bool,
+        help="Strip titles, null defaults and extra whitespace from the function schemas",
+    )
     parser.add_argument("--steps_limit", type=int, help="Limit the number of steps")
+    parser.add_argument(
+        "--max_parallel_commands",
+        type=int,
+        help="Maximum number of read-only commands of one turn that run concurrently",
+    )
+    parser.add_argument(
+        "--prefetch.active",
+        type=str2bool,
+        help="Run likely next reads while the model is thinking",
+    )
+    parser.add_argument(
+        "--prefetch.max_commands",
+        type=int,
+        help="Maximum number of reads prefetched per turn",
+    )
     parser.add_argument(
         "--custom_commands_paths", nargs="*", help="Paths to custom commands"
     )
@@ -0,0 +1,87 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from fellow.clients.Client import FunctionResult
+from fellow.clients.MemoryCheckpoint import CheckpointData, MemoryCheckpoint
+from fellow.utils.load_config import Config
+
+# sent instead of results if the run stopped while the commands of the last response were running
+INTERRUPTED_OUTPUT = (
+    "[ERROR] The run was interrupted before this command finished. "
+    "Check its effects before running it again."
+)
+
+# sent if the run stopped between two steps without pending input
+CONTINUE_MESSAGE = "Continue with the task."
+
+
+def load_resume_state(config: Config) -> CheckpointData:
+    """
+    Loads the memory checkpoint of the run with `config.task_id`. If no task is configured, the task is read
+    from the metadata of the run.
+
+    :param config: The configuration with the placeholders of the run paths already replaced.
+    :return: The memory lists and the loop state of the run.
+    """
+    path = config.memory.checkpoint_path
+    if not (config.memory.log and config.memory.checkpoint) or path is None:
+        raise ValueError("[ERROR] Resuming a run requires the memory checkpoint.")
+    if not path.is_file():
+        raise ValueError(f"[ERROR] No memory checkpoint to resume from: {path}")
+    if config.task is None and config.metadata.filepath is not None:
+        if config.metadata.filepath.is_file():
+            with open(config.metadata.filepath) as f:
+                config.task = json.load(f).get("task")
+    return MemoryCheckpoint.load(path)
+
+
+def resume_inputs(
+    state: CheckpointData,
+) -> Tuple[int, str, Optional[FunctionResult], Optional[List[FunctionResult]]]:
+    """
+    Restores the loop of an interrupted run: the step counter and the input of the next request.
+
+    The input is the one recorded in the loop state if it never reached the model. If the run stopped while
+    the commands of the last response were running, every tool call of that response is answered with an
+    error, so the model can check what happened. Otherwise the model is asked to continue.
+
+    :param state: The checkpoint data of the run.
+    :return: The step, message, function_result and function_results of the next request.
+    """
+    loop: Dict[str, Any] = state["loop"] or {}
+    step = loop.get("step", 0)
+    pending = loop.get("pending")
+    if pending:
+        return (
+            step,
+            pending.get("message") or "",
+            pending.get("function_result"),
+            pending.get("function_results"),
+        )
+    memory = state["lists"].get("memory") or []
+    last_message = memory[-1] if memory else {}
+    if last_message.get("role") == "assistant" and last_message.get("tool_calls"):
+        return (
+            step,
+            "",
+            None,
+            [
+                {
+                    "name": tool_call["function"]["name"],
+                    "output": INTERRUPTED_OUTPUT,
+                    "call_id": tool_call["id"],
+                }
+                for tool_call in last_message["tool_calls"]
+            ],
+        )
+    if last_message.get("role") == "assistant" and last_message.get("function_call"):
+        return (
+            step,
+            "",
+            {
+                "name": last_message["function_call"]["name"],
+                "output": INTERRUPTED_OUTPUT,
+            },
+            None,
+        )
+    return step, CONTINUE_MESSAGE, None, None
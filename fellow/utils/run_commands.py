@@ -0,0 +1,65 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from fellow.clients.Client import FunctionResult, ToolCall
+from fellow.commands.Command import Command, CommandContext
+
+
+def run_commands(
+    function_calls: List[ToolCall],
+    commands: Dict[str, Command],
+    context: CommandContext,
+    max_workers: int = 1,
+) -> List[FunctionResult]:
+    """
+    Runs all function calls of one model turn and returns their results in call order.
+
+    Consecutive calls of parallel-safe commands (read-only, no interactive policies) run concurrently in a
+    thread pool. All other calls run one after another in the order the model requested them, so a write
+    never overlaps with a read of the same turn.
+
+    :param function_calls: The function calls requested by the model.
+    :param commands: The available commands by name.
+    :param context: Runtime context passed to every command.
+    :param max_workers: Maximum number of commands running at the same time.
+    :return: One FunctionResult per function call, in the same order.
+    """
+
+    def run(function_call: ToolCall) -> FunctionResult:
+        start = time.perf_counter()
+        command = commands.get(function_call["name"])
+        if command is None:
+            output = f"[ERROR] Unknown function: {function_call['name']}"
+        else:
+            output = command.run(function_call["arguments"], context)
+        return {
+            "name": function_call["name"],
+            "output": output,
+            "call_id": function_call["id"],
+            "wall_time": time.perf_counter() - start,
+        }
+
+    def parallel_safe(function_call: ToolCall) -> bool:
+        command = commands.get(function_call["name"])
+        return command is not None and command.parallel_safe
+
+    results: List[FunctionResult] = []
+    batch: List[ToolCall] = []
+
+    def flush(executor: ThreadPoolExecutor) -> None:
+        if len(batch) > 1:
+            results.extend(executor.map(run, batch))
+        else:
+            results.extend(run(function_call) for function_call in batch)
+        batch.clear()
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for function_call in function_calls:
+            if max_workers > 1 and parallel_safe(function_call):
+                batch.append(function_call)
+                continue
+            flush(executor)
+            results.append(run(function_call))
+        flush(executor)
+    return results
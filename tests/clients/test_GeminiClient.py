@@ -1,9 +1,11 @@
+import asyncio
 import importlib
 import json
 import os
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from google.genai import types  # type: ignore
 
 from fellow.clients.GeminiClient import GeminiClient, GeminiClientConfig
 
@@ -49,6 +51,17 @@ def test_create_returns_instance(config):
     assert isinstance(client, GeminiClient)
 
 
+def test_client_uses_shared_http_pool(config, mock_genai_client):
+    client = GeminiClient(config)
+    http_options = importlib.import_module(
+        "fellow.clients.GeminiClient"
+    ).genai.Client.call_args.kwargs["http_options"]
+    assert http_options.client_args["transport"] is client.http_pool.transport
+    assert (
+        http_options.async_client_args["transport"] is client.http_pool.async_transport
+    )
+
+
 def test_chat_without_function_result(config, mock_genai_client):
     mock_client, mock_chat = mock_genai_client
     mock_response = MagicMock(text="Hello!", function_calls=[])
@@ -57,10 +70,33 @@ def test_chat_without_function_result(config, mock_genai_client):
     client = GeminiClient(config)
     result = client.chat(functions=[], message="Hi")
 
-    assert result == {"message": "Hello!", "function_name": None, "function_args": None}
+    assert result.pop("usage")["model"] == "gemini-test-model"
+    assert result == {
+        "message": "Hello!",
+        "function_name": None,
+        "function_args": None,
+        "function_calls": [],
+    }
     mock_chat.send_message.assert_called_once()
 
 
+@patch("fellow.clients.RequestScheduler.time.sleep")
+def test_chat_retries_rate_limit_errors(mock_sleep, config, mock_genai_client):
+    mock_client, mock_chat = mock_genai_client
+    error = Exception("429 RESOURCE_EXHAUSTED")
+    error.code = 429  # type: ignore[attr-defined]
+    mock_chat.send_message.side_effect = [
+        error,
+        MagicMock(text="Hello!", function_calls=[]),
+    ]
+
+    client = GeminiClient(config)
+    result = client.chat(functions=[], message="Hi")
+
+    assert result["message"] == "Hello!"
+    assert mock_chat.send_message.call_count == 2
+
+
 def test_chat_with_function_result(config, mock_genai_client):
     mock_client, mock_chat = mock_genai_client
     mock_response = MagicMock(text="Processed function result!", function_calls=[])
@@ -70,10 +106,12 @@ def test_chat_with_function_result(config, mock_genai_client):
     function_result = {"name": "my_func", "output": {"key": "value"}}
     result = client.chat(functions=[], function_result=function_result)
 
+    assert result.pop("usage")["model"] == "gemini-test-model"
     assert result == {
         "message": "Processed function result!",
         "function_name": None,
         "function_args": None,
+        "function_calls": [],
     }
 
 
@@ -92,6 +130,356 @@ def test_chat_with_function_call_response(config, mock_genai_client):
 
     assert result["function_name"] == "do_something"
     assert result["function_args"] == json.dumps({"param": 42})
+    assert result["function_calls"] == [
+        {
+            "id": mock_response.function_calls[0].id,
+            "name": "do_something",
+            "arguments": json.dumps({"param": 42}),
+        }
+    ]
+
+
+def test_chat_with_several_function_results(config, mock_genai_client):
+    mock_client, mock_chat = mock_genai_client
+    mock_chat.send_message.return_value = MagicMock(text="Done", function_calls=[])
+
+    client = GeminiClient(config)
+    client.chat(
+        functions=[],
+        function_results=[
+            {"name": "view_file", "output": "content", "call_id": "call_1"},
+            {"name": "get_code", "output": "code", "call_id": None},
+        ],
+    )
+
+    parts = mock_chat.send_message.call_args[1]["message"]
+    assert [part.function_response.name for part in parts] == [
+        "view_file",
+        "get_code",
+    ]
+    assert parts[0].function_response.id == "call_1"
+    assert parts[1].function_response.response == {"output": "code"}
+
+
+def test_achat_records_turn_in_sync_history(config, mock_genai_client):
+    mock_client, mock_chat = mock_genai_client
+    old_history = [MagicMock(name="user"), MagicMock(name="model")]
+    new_input, new_output = MagicMock(name="input"), MagicMock(name="output")
+    mock_chat.get_history.return_value = old_history
+
+    mock_async_chat = MagicMock()
+    mock_async_chat.send_message = AsyncMock(
+        return_value=MagicMock(text="Hello!", function_calls=[])
+    )
+    mock_async_chat.get_history.return_value = old_history + [new_input, new_output]
+    mock_client.aio.chats.create.return_value = mock_async_chat
+
+    client = GeminiClient(config)
+    result = asyncio.run(client.achat(functions=[], message="Hi"))
+
+    assert result.pop("usage")["model"] == "gemini-test-model"
+    assert result == {
+        "message": "Hello!",
+        "function_name": None,
+        "function_args": None,
+        "function_calls": [],
+    }
+    mock_chat.get_history.assert_called_once_with(curated=True)
+    mock_client.aio.chats.create.assert_called_once_with(
+        model="gemini-test-model", history=old_history
+    )
+    assert mock_async_chat.send_message.call_args[1]["message"] == "Hi"
+    mock_chat.send_message.assert_not_called()
+    mock_chat.record_history.assert_called_once_with(
+        user_input=new_input,
+        model_output=[new_output],
+        automatic_function_calling_history=[],
+        is_valid=True,
+    )
+
+
+def _stream_chunks():
+    return [
+        types.GenerateContentResponse(
+            candidates=[types.Candidate(content=_text_content("model", "Hel"))]
+        ),
+        types.GenerateContentResponse(
+            candidates=[types.Candidate(content=_text_content("model", "lo"))]
+        ),
+        types.GenerateContentResponse(
+            candidates=[
+                types.Candidate(
+                    content=types.Content(
+                        role="model",
+                        parts=[
+                            types.Part(
+                                function_call=types.FunctionCall(
+                                    id="call_1", name="view_file", args={"path": "a"}
+                                )
+                            )
+                        ],
+                    )
+                )
+            ],
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=100, candidates_token_count=12
+            ),
+        ),
+    ]
+
+
+def _assert_streamed_result(result):
+    assert result["message"] == "Hello"
+    assert result["function_calls"] == [
+        {"id": "call_1", "name": "view_file", "arguments": '{"path": "a"}'}
+    ]
+    assert result["streamed"] is True
+    assert result["usage"]["time_to_first_token"] is not None
+    assert result["usage"]["prompt_tokens"] == 100
+    assert result["usage"]["completion_tokens"] == 12
+
+
+@pytest.fixture
+def stream_config():
+    return GeminiClientConfig(
+        system_content="system", model="gemini-test-model", stream=True
+    )
+
+
+def test_chat_stream(stream_config, mock_genai_client, capsys):
+    mock_client, mock_chat = mock_genai_client
+    mock_chat.send_message_stream.return_value = iter(_stream_chunks())
+
+    client = GeminiClient(stream_config)
+    result = client.chat(functions=[], message="Hi")
+
+    _assert_streamed_result(result)
+    assert capsys.readouterr().out == "AI: Hello\n"
+    mock_chat.send_message.assert_not_called()
+    assert client.usage.by_model()["gemini-test-model"]["prompt_tokens"] == 100
+
+
+@patch("fellow.clients.RequestScheduler.time.sleep")
+def test_chat_stream_retries_before_first_chunk(
+    mock_sleep, stream_config, mock_genai_client
+):
+    mock_client, mock_chat = mock_genai_client
+    error = Exception("503 UNAVAILABLE")
+    error.code = 503  # type: ignore[attr-defined]
+
+    def failing_stream():
+        raise error
+        yield  # pragma: no cover
+
+    mock_chat.send_message_stream.side_effect = [
+        failing_stream(),
+        iter(_stream_chunks()),
+    ]
+
+    client = GeminiClient(stream_config)
+    result = client.chat(functions=[], message="Hi")
+
+    _assert_streamed_result(result)
+    assert mock_chat.send_message_stream.call_count == 2
+
+
+def test_achat_stream(stream_config, mock_genai_client):
+    mock_client, mock_chat = mock_genai_client
+    mock_chat.get_history.return_value = []
+
+    async def chunks():
+        for chunk in _stream_chunks():
+            yield chunk
+
+    mock_async_chat = MagicMock()
+    mock_async_chat.send_message_stream = AsyncMock(return_value=chunks())
+    mock_async_chat.get_history.return_value = []
+    mock_client.aio.chats.create.return_value = mock_async_chat
+
+    client = GeminiClient(stream_config)
+    result = asyncio.run(client.achat(functions=[], message="Hi"))
+
+    _assert_streamed_result(result)
+    mock_async_chat.send_message.assert_not_called()
+
+
+def test_summarize_uses_summary_model(mock_genai_client):
+    mock_client, mock_chat = mock_genai_client
+    mock_client.models.generate_content.return_value = MagicMock(
+        text="A summary.",
+        usage_metadata=MagicMock(prompt_token_count=100, candidates_token_count=10),
+    )
+    client = GeminiClient(
+        GeminiClientConfig(
+            system_content="system",
+            model="gemini-test-model",
+            summary_model="gemini-cheap-model",
+            summary_max_output_tokens=128,
+        )
+    )
+
+    assert client.summarize("content", instruction="Summarize this.") == "A summary."
+    call_kwargs = mock_client.models.generate_content.call_args[1]
+    assert call_kwargs["model"] == "gemini-cheap-model"
+    assert call_kwargs["contents"] == "content"
+    assert call_kwargs["config"].system_instruction == "Summarize this."
+    assert call_kwargs["config"].max_output_tokens == 128
+    mock_chat.send_message.assert_not_called()
+    assert client.usage.by_model()["gemini-cheap-model"]["prompt_tokens"] == 100
+
+
+def _text_content(role, text):
+    return types.Content(role=role, parts=[types.Part(text=text)])
+
+
+def _call_content(name):
+    return types.Content(
+        role="model",
+        parts=[types.Part(function_call=types.FunctionCall(name=name, args={}))],
+    )
+
+
+def _result_content(name, output):
+    return types.Content(
+        role="user",
+        parts=[
+            types.Part(
+                function_response=types.FunctionResponse(
+                    name=name, response={"output": output}
+                )
+            )
+        ],
+    )
+
+
+@pytest.fixture
+def memory_client(mock_genai_client):
+    mock_client, mock_chat = mock_genai_client
+    # every content (and summary) counts as 10 tokens
+    mock_client.models.count_tokens.return_value = MagicMock(total_tokens=10)
+    mock_client.models.generate_content.return_value = MagicMock(
+        text="summary", usage_metadata=None
+    )
+    mock_chat.send_message.return_value = MagicMock(
+        text="", function_calls=[], usage_metadata=None
+    )
+    client = GeminiClient(
+        GeminiClientConfig(
+            system_content="system",
+            model="gemini-test-model",
+            memory_max_tokens=50,
+            summary_memory_max_tokens=25,
+        )
+    )
+    return client, mock_client, mock_chat
+
+
+def test_history_within_limit_is_kept(memory_client):
+    client, mock_client, mock_chat = memory_client
+    mock_chat.get_history.return_value = [
+        _text_content("user", "task"),
+        _call_content("view_file"),
+    ]
+    client.chat(functions=[], message="task")
+    client.chat(functions=[], message="task")
+
+    # contents are counted once
+    assert mock_client.models.count_tokens.call_count == 2
+    mock_client.models.generate_content.assert_not_called()
+    assert mock_client.chats.create.call_count == 1
+
+
+def test_history_tokens_are_taken_from_usage_metadata(memory_client):
+    client, mock_client, mock_chat = memory_client
+    history = [_text_content("user", "task"), _call_content("f0")]
+    mock_chat.get_history.return_value = history
+    mock_chat.send_message.return_value = MagicMock(
+        text="",
+        function_calls=[],
+        usage_metadata=MagicMock(prompt_token_count=12, candidates_token_count=5),
+    )
+    client.chat(functions=[], message="task")
+    assert mock_client.models.count_tokens.call_count == 2
+
+    history += [_result_content("f0", "out"), _call_content("f1")]
+    mock_chat.send_message.return_value = MagicMock(
+        text="",
+        function_calls=[],
+        usage_metadata=MagicMock(prompt_token_count=25, candidates_token_count=4),
+    )
+    client.chat(functions=[], message="task")
+
+    # the result grew the prompt by 25 - (12 + 5) tokens, the call is the output
+    assert mock_client.models.count_tokens.call_count == 2
+    assert client._history_tokens == [10, 10, 8, 4]
+
+
+@patch("fellow.clients.RequestScheduler.time.sleep")
+def test_count_tokens_retries_rate_limit_errors(mock_sleep, memory_client):
+    client, mock_client, mock_chat = memory_client
+    error = Exception("429 RESOURCE_EXHAUSTED")
+    error.code = 429  # type: ignore[attr-defined]
+    mock_client.models.count_tokens.side_effect = [
+        error,
+        MagicMock(total_tokens=10),
+    ]
+    mock_chat.get_history.return_value = [_text_content("user", "task")]
+
+    client.chat(functions=[], message="task")
+
+    assert mock_client.models.count_tokens.call_count == 2
+    assert client._history_tokens == [10]
+
+
+def test_history_over_limit_is_summarized(memory_client):
+    client, mock_client, mock_chat = memory_client
+    history = [_text_content("user", "task")]
+    for index in range(3):
+        history += [_call_content(f"f{index}"), _result_content(f"f{index}", "out")]
+    mock_chat.get_history.return_value = history  # 70 tokens
+
+    client.chat(functions=[], message="task")
+
+    # the recent history (at most 25 tokens) starts with the latest function call
+    summarized = mock_client.models.generate_content.call_args[1]["contents"]
+    assert summarized.splitlines() == [
+        "User: task",
+        "Model: [Function call] f0({})",
+        'User: [Function result] f0: {"output": "out"}',
+        "Model: [Function call] f1({})",
+        'User: [Function result] f1: {"output": "out"}',
+    ]
+    rebuilt = mock_client.chats.create.call_args[1]["history"]
+    assert rebuilt[0].parts[0].text == "Summary of previous conversation: summary"
+    assert rebuilt[1:] == history[5:]
+    assert client.summary_memory == [("summary", 10)]
+    assert client._history_tokens == [10, 10]
+
+
+def test_summaries_over_limit_are_summarized(memory_client):
+    client, mock_client, mock_chat = memory_client
+    client.summary_memory = [("first", 10), ("second", 10)]
+    history = [_text_content("user", "summaries")]
+    history += [_call_content("f"), _result_content("f", "out")] * 3
+    mock_chat.get_history.return_value = history
+
+    client.chat(functions=[], message="task")
+
+    # three summaries (30 tokens) exceed the limit, only the latest one fits into half of it
+    assert (
+        mock_client.models.generate_content.call_args[1]["contents"]
+        == "first\n\nsecond"
+    )
+    assert client.summary_memory == [("summary", 10), ("summary", 10)]
+
+
+def test_history_without_model_content_is_not_split(memory_client):
+    client, mock_client, mock_chat = memory_client
+    mock_chat.get_history.return_value = [_text_content("user", "task")] * 6
+
+    client.chat(functions=[], message="task")
+
+    mock_client.models.generate_content.assert_not_called()
 
 
 def test_store_memory(config, mock_genai_client, tmp_path):
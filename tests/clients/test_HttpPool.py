@@ -0,0 +1,82 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+from fellow.clients.HttpPool import HttpPool, HttpPoolConfig
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("localhost", 0), KeepAliveHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://localhost:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_for_config_returns_shared_instance():
+    config = HttpPoolConfig(max_connections=7)
+    assert HttpPool.for_config(config) is HttpPool.for_config(
+        HttpPoolConfig(max_connections=7)
+    )
+    assert HttpPool.for_config(config) is not HttpPool.for_config(
+        HttpPoolConfig(max_connections=8)
+    )
+
+
+def test_clients_are_created_once():
+    pool = HttpPool(HttpPoolConfig())
+    assert pool.client is pool.client
+    assert pool.async_client is pool.async_client
+    assert pool.client_args()["transport"] is pool.transport
+    assert pool.async_client_args()["transport"] is pool.async_transport
+
+
+def test_timeouts():
+    pool = HttpPool(HttpPoolConfig(connect_timeout=2.0, read_timeout=30.0))
+    assert pool.client.timeout.connect == 2.0
+    assert pool.client.timeout.read == 30.0
+
+
+def test_connections_are_reused(server_url):
+    pool = HttpPool(HttpPoolConfig())
+    for _ in range(3):
+        assert pool.client.get(server_url).text == "ok"
+    assert (pool.requests, pool.connections, pool.reused) == (3, 1, 2)
+    assert pool.report() == "3 requests over 1 connections (2 reused)"
+
+
+def test_async_connections_are_reused(server_url):
+    pool = HttpPool(HttpPoolConfig())
+
+    async def requests():
+        for _ in range(3):
+            await pool.async_client.get(server_url)
+        await pool.async_client.aclose()
+
+    asyncio.run(requests())
+    assert (pool.requests, pool.connections) == (3, 1)
+
+
+def test_http2_without_h2_falls_back(capsys):
+    with patch("fellow.clients.HttpPool.importlib.util.find_spec", return_value=None):
+        HttpPool(HttpPoolConfig(http2=True))
+    assert "[WARNING] http2 requires the h2 package" in capsys.readouterr().out
@@ -0,0 +1,133 @@
+import json
+from unittest.mock import patch
+
+from fellow.clients.MemoryCheckpoint import MemoryCheckpoint
+
+
+def read_records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def message(content):
+    return {"role": "user", "content": content, "tokens": 1}
+
+
+def test_sync_lists_appends_new_messages(tmp_path):
+    path = tmp_path / "memory.jsonl"
+    checkpoint = MemoryCheckpoint(path)
+    memory = [message("a")]
+    checkpoint.sync_lists({"memory": memory})
+    memory.append(message("b"))
+    checkpoint.sync_lists({"memory": memory})
+    checkpoint.sync_lists({"memory": memory})
+
+    assert read_records(path) == [
+        {"list": "memory", "message": message("a")},
+        {"list": "memory", "message": message("b")},
+    ]
+
+
+def test_sync_lists_drops_summarized_messages(tmp_path):
+    path = tmp_path / "memory.jsonl"
+    checkpoint = MemoryCheckpoint(path)
+    memory = [message(str(i)) for i in range(4)]
+    checkpoint.sync_lists({"memory": memory, "summary_memory": []})
+
+    summary = message("summary")
+    memory = memory[3:] + [message("4")]
+    checkpoint.sync_lists({"memory": memory, "summary_memory": [summary]})
+
+    assert read_records(path)[4:] == [
+        {"list": "memory", "drop": 3},
+        {"list": "memory", "message": message("4")},
+        {"list": "summary_memory", "message": summary},
+    ]
+    assert checkpoint.superseded == 4
+    assert MemoryCheckpoint.load(path)["lists"] == {
+        "memory": [message("3"), message("4")],
+        "summary_memory": [summary],
+    }
+
+
+def test_sync_lists_rewrites_replaced_list(tmp_path):
+    path = tmp_path / "memory.jsonl"
+    checkpoint = MemoryCheckpoint(path)
+    checkpoint.sync_lists({"memory": [message("a"), message("b")]})
+    checkpoint.sync_lists({"memory": [message("c")]})
+
+    assert MemoryCheckpoint.load(path)["lists"] == {"memory": [message("c")]}
+
+
+def test_load_ignores_cut_off_line(tmp_path):
+    path = tmp_path / "memory.jsonl"
+    path.write_text(
+        json.dumps({"list": "memory", "message": message("a")})
+        + '\n{"list": "memory", "mess'
+    )
+    assert MemoryCheckpoint.load(path)["lists"] == {"memory": [message("a")]}
+
+
+def test_compact(tmp_path):
+    path = tmp_path / "memory.jsonl"
+    checkpoint = MemoryCheckpoint(path)
+    memory = [message(str(i)) for i in range(3)]
+    checkpoint.sync_lists({"memory": memory})
+    memory = memory[2:]
+    checkpoint.sync_lists({"memory": memory})
+
+    assert checkpoint.superseded == 3
+
+    checkpoint.compact({"memory": memory})
+    assert read_records(path) == [{"list": "memory", "message": message("2")}]
+    assert checkpoint.superseded == 0
+
+    # appending continues after compaction
+    memory.append(message("3"))
+    checkpoint.sync_lists({"memory": memory})
+    checkpoint.close()
+    assert MemoryCheckpoint.load(path)["lists"] == {
+        "memory": [message("2"), message("3")]
+    }
+
+
+def test_fsync_is_batched(tmp_path):
+    checkpoint = MemoryCheckpoint(tmp_path / "memory.jsonl", fsync_batch=3)
+    memory = []
+    with patch("fellow.clients.MemoryCheckpoint.os.fsync") as mock_fsync:
+        for i in range(5):
+            memory.append(message(str(i)))
+            checkpoint.sync_lists({"memory": memory})
+        assert mock_fsync.call_count == 1
+        checkpoint.sync()
+        assert mock_fsync.call_count == 2
+    assert checkpoint.records == 5
+
+
+def test_loop_state(tmp_path):
+    path = tmp_path / "memory.jsonl"
+    checkpoint = MemoryCheckpoint(path)
+    memory = [message("a")]
+    checkpoint.sync_lists({"memory": memory})
+    pending = {"message": "b", "function_result": None, "function_results": None}
+    checkpoint.record_loop({"step": 1, "done": False, "pending": pending})
+
+    assert MemoryCheckpoint.load(path) == {
+        "lists": {"memory": [message("a")]},
+        "loop": {"step": 1, "done": False, "pending": pending},
+    }
+
+    # the pending input reached the memory
+    memory.append(message("b"))
+    checkpoint.sync_lists({"memory": memory})
+    assert MemoryCheckpoint.load(path)["loop"] == {
+        "step": 1,
+        "done": False,
+        "pending": None,
+    }
+
+    # compaction keeps the last loop state
+    checkpoint.record_loop({"step": 2, "done": True, "pending": None})
+    checkpoint.compact({"memory": memory})
+    assert read_records(path)[-1] == {
+        "loop": {"step": 2, "done": True, "pending": None}
+    }
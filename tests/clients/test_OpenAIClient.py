@@ -1,12 +1,21 @@
+import asyncio
 import json
 import os
+import threading
 from tempfile import NamedTemporaryFile
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
 
+import httpx
+import openai
 import pytest
+from openai import NOT_GIVEN
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
 
+from fellow.clients.MemoryCheckpoint import MemoryCheckpoint
 from fellow.clients.OpenAIClient import OpenAIClient, OpenAIClientConfig
-from fellow.commands import ViewFileInput, view_file
+from fellow.clients.RetrievalIndex import RetrievalIndex
+from fellow.commands import MakePlanInput, ViewFileInput, make_plan, view_file
 from fellow.commands.Command import Command
 
 
@@ -31,7 +40,7 @@ def mock_openai_api_key():
         os.environ["OPENAI_API_KEY"] = old_key
 
 
-@patch("openai.chat.completions.create")
+@patch("openai.resources.chat.completions.Completions.create")
 def test_messages(client, mock_openai_api_key):
     client.memory = [{"role": "user", "content": "Hi", "tokens": 5}]
     client.summary_memory = [{"role": "system", "content": "Summary", "tokens": 3}]
@@ -78,11 +87,45 @@ def test_message_to_params(client, mock_openai_api_key):
     ]
 
 
-@patch("openai.chat.completions.create")
+def test_message_to_params_is_incremental(client):
+    client.memory.append({"role": "user", "content": "Hi", "tokens": 5})
+    first = list(client.message_to_params())
+
+    with patch.object(
+        OpenAIClient, "_message_to_param", wraps=OpenAIClient._message_to_param
+    ) as mock_convert:
+        client.memory.append({"role": "assistant", "content": "Hello", "tokens": 5})
+        params = client.message_to_params()
+
+    mock_convert.assert_called_once()
+    assert params == first + [{"role": "assistant", "content": "Hello"}]
+
+
+def test_message_to_params_rebuilds_on_changes(client):
+    client.memory.append({"role": "user", "content": "Hi", "tokens": 5})
+    client.message_to_params()
+
+    client.set_plan("The plan")
+    assert client.message_to_params()[1] == {"role": "system", "content": "The plan"}
+
+    client.summary_memory = [{"role": "system", "content": "Summary", "tokens": 3}]
+    assert client.message_to_params()[2] == {"role": "system", "content": "Summary"}
+
+    client.memory = [{"role": "user", "content": "Other", "tokens": 5}]
+    assert client.message_to_params()[-1] == {"role": "user", "content": "Other"}
+
+    client.memory.clear()
+    assert len(client.message_to_params()) == 3
+
+
+@patch("openai.resources.chat.completions.Completions.create")
 def test_chat(mock_create, client, mock_openai_api_key):
     mock_choice = MagicMock()
-    mock_choice.message = MagicMock(content="Hello!", function_call=None)
-    mock_create.return_value = MagicMock(choices=[mock_choice])
+    mock_choice.message = MagicMock(content="Hello!", tool_calls=None)
+    mock_create.return_value = MagicMock(
+        choices=[mock_choice],
+        usage=CompletionUsage(prompt_tokens=10, completion_tokens=2, total_tokens=12),
+    )
 
     functions = [
         {"name": "func", "description": "func1 description", "parameters": {"arg": 1}}
@@ -95,18 +138,33 @@ def test_chat(mock_create, client, mock_openai_api_key):
         "message": "Hello!",
         "function_name": None,
         "function_args": None,
+        "function_calls": [],
+        "usage": {
+            "model": "gpt-3.5-turbo",
+            "latency": ANY,
+            "time_to_first_token": None,
+            "prompt_tokens": 10,
+            "estimated_prompt_tokens": ANY,
+            "completion_tokens": 2,
+        },
     }
     assert len(client.memory) == 2
     assert client.memory[-1]["content"] == "Hello!"
     assert "tokens" in client.memory[-1]
     mock_create.assert_called_once()
-    assert mock_create.call_args[1]["functions"] == functions
+    assert mock_create.call_args[1]["tools"] == [
+        {"type": "function", "function": functions[0]}
+    ]
+    assert mock_create.call_args[1]["tool_choice"] == "auto"
+    assert mock_create.call_args[1]["parallel_tool_calls"] is True
 
     mock_choice = MagicMock()
-    mock_function_call = MagicMock(arguments="{}")
-    mock_function_call.name = "get_code"
-    mock_choice.message = MagicMock(content=None, function_call=mock_function_call)
-    mock_create.return_value = MagicMock(choices=[mock_choice])
+    mock_function = MagicMock(arguments="{}")
+    mock_function.name = "get_code"
+    mock_choice.message = MagicMock(
+        content=None, tool_calls=[MagicMock(id="call_1", function=mock_function)]
+    )
+    mock_create.return_value = MagicMock(choices=[mock_choice], usage=None)
     response = client.chat(
         "", function_result={"name": "get_code", "output": "import os"}
     )
@@ -114,7 +172,296 @@ def test_chat(mock_create, client, mock_openai_api_key):
         "message": None,
         "function_name": "get_code",
         "function_args": "{}",
+        "function_calls": [{"id": "call_1", "name": "get_code", "arguments": "{}"}],
+        "usage": {
+            "model": "gpt-3.5-turbo",
+            "latency": ANY,
+            "time_to_first_token": None,
+        },
+    }
+    assert client.memory[-2] == {
+        "role": "function",
+        "name": "get_code",
+        "content": "import os",
+        "tokens": ANY,
+    }
+    assert client.memory[-1] == {
+        "role": "assistant",
+        "tool_calls": [
+            {
+                "id": "call_1",
+                "type": "function",
+                "function": {"name": "get_code", "arguments": "{}"},
+            }
+        ],
+        "tokens": ANY,
+    }
+
+
+@patch("openai.resources.chat.completions.Completions.create")
+def test_chat_with_parallel_tool_calls(mock_create, client):
+    client.memory = [
+        {
+            "role": "assistant",
+            "tool_calls": [
+                {
+                    "id": "call_1",
+                    "type": "function",
+                    "function": {"name": "view_file", "arguments": "{}"},
+                },
+                {
+                    "id": "call_2",
+                    "type": "function",
+                    "function": {"name": "get_code", "arguments": "{}"},
+                },
+            ],
+            "tokens": 10,
+        }
+    ]
+    mock_create.return_value = MagicMock(
+        choices=[MagicMock(message=MagicMock(content="Done", tool_calls=None))],
+        usage=None,
+    )
+    client._count_tokens_batch = MagicMock(return_value=[7, 8])
+
+    client.chat(
+        functions=[],
+        function_results=[
+            {"name": "view_file", "output": "content", "call_id": "call_1"},
+            {"name": "get_code", "output": "code", "call_id": "call_2"},
+        ],
+    )
+
+    assert client._count_tokens_batch.call_args_list[0][0][0] == [
+        {"role": "tool", "tool_call_id": "call_1", "content": "content"},
+        {"role": "tool", "tool_call_id": "call_2", "content": "code"},
+    ]
+    assert client.message_to_params()[2:4] == [
+        {"role": "tool", "tool_call_id": "call_1", "content": "content"},
+        {"role": "tool", "tool_call_id": "call_2", "content": "code"},
+    ]
+    assert mock_create.call_args[1]["tools"] is NOT_GIVEN
+    assert mock_create.call_args[1]["tool_choice"] is NOT_GIVEN
+
+
+def _chunk(delta, finish_reason=None, usage=None):
+    return ChatCompletionChunk.model_validate(
+        {
+            "id": "chatcmpl-1",
+            "created": 0,
+            "model": "gpt-3.5-turbo",
+            "object": "chat.completion.chunk",
+            "choices": (
+                [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+                if delta is not None
+                else []
+            ),
+            "usage": usage,
+        }
+    )
+
+
+@patch("openai.resources.chat.completions.Completions.create")
+def test_chat_stream(mock_create, client, capsys):
+    client.stream = True
+    mock_create.return_value = iter(
+        [
+            _chunk({"role": "assistant", "content": ""}),
+            _chunk({"content": "Let me "}),
+            _chunk({"content": "look."}),
+            _chunk(
+                {
+                    "tool_calls": [
+                        {
+                            "index": 0,
+                            "id": "call_1",
+                            "type": "function",
+                            "function": {"name": "view_file", "arguments": ""},
+                        }
+                    ]
+                }
+            ),
+            _chunk(
+                {
+                    "tool_calls": [
+                        {"index": 0, "function": {"arguments": '{"filepath": '}},
+                        {
+                            "index": 1,
+                            "id": "call_2",
+                            "type": "function",
+                            "function": {"name": "get_code", "arguments": "{}"},
+                        },
+                    ]
+                }
+            ),
+            _chunk(
+                {"tool_calls": [{"index": 0, "function": {"arguments": '"a.py"}'}}]}
+            ),
+            _chunk({}, finish_reason="tool_calls"),
+            _chunk(
+                None,
+                usage={"prompt_tokens": 20, "completion_tokens": 7, "total_tokens": 27},
+            ),
+        ]
+    )
+
+    response = client.chat(functions=[], message="Hi there")
+
+    assert response == {
+        "message": "Let me look.",
+        "function_name": "view_file",
+        "function_args": '{"filepath": "a.py"}',
+        "function_calls": [
+            {"id": "call_1", "name": "view_file", "arguments": '{"filepath": "a.py"}'},
+            {"id": "call_2", "name": "get_code", "arguments": "{}"},
+        ],
+        "streamed": True,
+        "usage": {
+            "model": "gpt-3.5-turbo",
+            "latency": ANY,
+            "time_to_first_token": ANY,
+            "prompt_tokens": 20,
+            "estimated_prompt_tokens": ANY,
+            "completion_tokens": 7,
+        },
+    }
+    assert response["usage"]["time_to_first_token"] is not None
+    assert capsys.readouterr().out == "AI: Let me look.\n"
+    assert mock_create.call_args[1]["stream"] is True
+    assert mock_create.call_args[1]["stream_options"] == {"include_usage": True}
+    assert client.memory[-2] == {
+        "role": "assistant",
+        "content": "Let me look.",
+        "tokens": ANY,
+        "continued": True,
+    }
+    assert [tool_call["id"] for tool_call in client.memory[-1]["tool_calls"]] == [
+        "call_1",
+        "call_2",
+    ]
+
+
+@patch("openai.resources.chat.completions.Completions.create")
+def test_chat_stream_without_tokens(mock_create, client, capsys):
+    client.stream = True
+    mock_create.return_value = iter([_chunk({}, finish_reason="stop")])
+
+    response = client.chat(functions=[], message="Hi there")
+
+    assert response["message"] is None
+    assert response["function_name"] is None
+    assert response["usage"]["time_to_first_token"] is None
+    assert capsys.readouterr().out == ""
+
+
+def test_async_client_is_created_once(client):
+    with patch("openai.AsyncOpenAI") as mock_async_openai:
+        assert client.async_client is client.async_client
+    mock_async_openai.assert_called_once_with(
+        max_retries=0,
+        http_client=client.http_pool.async_client,
+        timeout=client.http_pool.timeout,
+    )
+
+
+def test_achat(client):
+    mock_choice = MagicMock()
+    mock_function = MagicMock(arguments='{"filepath": "a.py"}')
+    mock_function.name = "view_file"
+    mock_choice.message = MagicMock(
+        content="Let me look.",
+        tool_calls=[MagicMock(id="call_1", function=mock_function)],
+    )
+    client._async_client = MagicMock()
+    client._async_client.chat.completions.create = AsyncMock(
+        return_value=MagicMock(choices=[mock_choice], usage=None)
+    )
+
+    with patch(
+        "openai.resources.chat.completions.Completions.create"
+    ) as mock_sync_create:
+        response = asyncio.run(client.achat(functions=[], message="Hi there"))
+
+    mock_sync_create.assert_not_called()
+    assert response == {
+        "message": "Let me look.",
+        "function_name": "view_file",
+        "function_args": '{"filepath": "a.py"}',
+        "function_calls": [
+            {"id": "call_1", "name": "view_file", "arguments": '{"filepath": "a.py"}'}
+        ],
+        "usage": {
+            "model": "gpt-3.5-turbo",
+            "latency": ANY,
+            "time_to_first_token": None,
+        },
     }
+    assert [message["role"] for message in client.memory] == [
+        "user",
+        "assistant",
+        "assistant",
+    ]
+    assert client._async_client.chat.completions.create.call_args[1]["messages"][
+        -1
+    ] == {"role": "user", "content": "Hi there"}
+
+
+def test_achat_stream(client, capsys):
+    async def stream():
+        for chunk in [
+            _chunk({"content": "Hello"}),
+            _chunk({"content": "!"}, finish_reason="stop"),
+        ]:
+            yield chunk
+
+    client.stream = True
+    client._async_client = MagicMock()
+    client._async_client.chat.completions.create = AsyncMock(return_value=stream())
+
+    response = asyncio.run(client.achat(functions=[], message="Hi there"))
+
+    assert response["message"] == "Hello!"
+    assert response["streamed"] is True
+    assert response["usage"]["time_to_first_token"] is not None
+    assert capsys.readouterr().out == "AI: Hello!\n"
+    assert client._async_client.chat.completions.create.call_args[1]["stream"] is True
+
+
+def test_achat_runs_concurrently(client, mock_openai_api_key):
+    in_flight = []
+    max_in_flight = []
+
+    async def slow_create(**params):
+        in_flight.append(params)
+        max_in_flight.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.pop()
+        mock_choice = MagicMock()
+        mock_choice.message = MagicMock(content="Hi", tool_calls=None)
+        return MagicMock(choices=[mock_choice], usage=None)
+
+    other = OpenAIClient.create(
+        OpenAIClientConfig(
+            system_content="You are a helpful assistant.",
+            memory_max_tokens=1000,
+            summary_memory_max_tokens=1000,
+            model="gpt-3.5-turbo",
+        )
+    )
+    for session in (client, other):
+        session._async_client = MagicMock()
+        session._async_client.chat.completions.create = slow_create
+
+    async def run_both():
+        await asyncio.gather(
+            client.achat(functions=[], message="a"),
+            other.achat(functions=[], message="b"),
+        )
+
+    asyncio.run(run_both())
+    assert max(max_in_flight) == 2
+    assert client.memory[0]["content"] == "a"
+    assert other.memory[0]["content"] == "b"
 
 
 @patch.object(OpenAIClient, "_summarize_memory")
@@ -127,6 +474,7 @@ def test_memory_summarization_triggered(mock_summarize, client):
     ]
     client.summary_memory = []
     client._count_tokens = lambda _: 300
+    client._count_tokens_batch = lambda messages: [300] * len(messages)
     client.memory_max_tokens = 1000
     client.summary_memory_max_tokens = 1000
 
@@ -136,8 +484,8 @@ def test_memory_summarization_triggered(mock_summarize, client):
         choices=[MagicMock(message=MagicMock(content="Hello!"))]
     )
 
-    with patch("openai.chat.completions.create", mock_create):
-        client.chat("Trigger summarization")
+    with patch("openai.resources.chat.completions.Completions.create", mock_create):
+        client.chat([], "Trigger summarization")
 
     # 1500 old tokens + new user + assistant message (~600 total) → memory must be trimmed
     assert len(client.summary_memory) == 1
@@ -152,6 +500,470 @@ def test_memory_summarization_triggered(mock_summarize, client):
     assert len(client.memory) == 3
 
 
+def _completion(content):
+    return ChatCompletion.model_validate(
+        {
+            "id": "chatcmpl-1",
+            "created": 0,
+            "model": "gpt-3.5-turbo",
+            "object": "chat.completion",
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": content},
+                }
+            ],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12},
+        }
+    )
+
+
+@patch.object(OpenAIClient, "_summarize_memory", return_value="summarized")
+@patch("openai.resources.chat.completions.Completions.create")
+def test_memory_checkpoint(
+    mock_create, mock_summarize, mock_openai_api_key, client, tmp_path
+):
+    mock_create.return_value = _completion("Hello!")
+    path = tmp_path / "memory.jsonl"
+    checkpoint = MemoryCheckpoint(path)
+    client.attach_checkpoint(checkpoint)
+    client.set_plan("The plan")
+    client.chat(functions=[], message="Hi")
+
+    assert MemoryCheckpoint.load(path)["lists"] == {
+        "system_content": client.system_content,
+        "memory": client.memory,
+    }
+
+    # summarization drops the old messages and appends the summary
+    client._count_tokens = lambda _: 300
+    client._count_tokens_batch = lambda messages: [300] * len(messages)
+    client.memory = client.memory + [
+        {"role": "user", "content": f"msg{i}", "tokens": 300} for i in range(3)
+    ]
+    client.chat(functions=[], message="Trigger summarization")
+    assert any("drop" in json.loads(line) for line in path.read_text().splitlines())
+    assert MemoryCheckpoint.load(path)["lists"] == {
+        name: messages for name, messages in client.memory_lists().items() if messages
+    }
+
+    client.checkpoint_memory(compact=True)
+    assert len(path.read_text().splitlines()) == sum(
+        len(messages) for messages in client.memory_lists().values()
+    )
+
+
+@patch("openai.resources.chat.completions.Completions.create")
+def test_checkpoint_compaction_is_skipped_without_drops(
+    mock_create, mock_openai_api_key, client, tmp_path
+):
+    mock_create.return_value = _completion("Hello!")
+    path = tmp_path / "memory.jsonl"
+    client.attach_checkpoint(MemoryCheckpoint(path))
+    client.chat(functions=[], message="Hi")
+
+    with patch.object(MemoryCheckpoint, "compact") as mock_compact:
+        client.checkpoint_memory(compact=True)
+    mock_compact.assert_not_called()
+    assert MemoryCheckpoint.load(path)["lists"] == {
+        name: messages for name, messages in client.memory_lists().items() if messages
+    }
+
+
+@patch("openai.resources.chat.completions.Completions.create")
+def test_restore_memory(mock_create, mock_openai_api_key, client, tmp_path):
+    mock_create.return_value = _completion("Hello!")
+    path = tmp_path / "memory.jsonl"
+    client.attach_checkpoint(MemoryCheckpoint(path))
+    client.set_plan("The plan")
+    client.chat(functions=[], message="Hi")
+    client.checkpoint.close()
+
+    restored = OpenAIClient.create(
+        OpenAIClientConfig(
+            system_content="You are a helpful assistant.",
+            memory_max_tokens=1000,
+            summary_memory_max_tokens=1000,
+            model="gpt-3.5-turbo",
+        )
+    )
+    restored._count_tokens = MagicMock()
+    restored.restore_memory(MemoryCheckpoint.load(path)["lists"])
+
+    assert restored.memory_lists() == client.memory_lists()
+    assert restored._plan_set
+    restored._count_tokens.assert_not_called()
+
+
+@patch("openai.resources.chat.completions.Completions.create")
+def test_retrieval_of_evicted_messages(mock_create, mock_openai_api_key, client):
+    mock_create.return_value = _completion("Hello!")
+    client.attach_retrieval(RetrievalIndex(None))
+    client._summarize_memory = MagicMock(return_value="summary")
+    evicted = [
+        {
+            "role": "assistant",
+            "tool_calls": [
+                {
+                    "id": "call_1",
+                    "type": "function",
+                    "function": {
+                        "name": "view_file",
+                        "arguments": '{"filepath": "settings.py"}',
+                    },
+                }
+            ],
+            "tokens": 10,
+        },
+        {
+            "role": "tool",
+            "tool_call_id": "call_1",
+            "name": "view_file",
+            "content": "TIMEOUT_SECONDS = 30",
+            "tokens": 10,
+        },
+    ]
+    client.memory = evicted + [{"role": "user", "content": "ok", "tokens": 990}]
+    client._summarize_over_limit()
+    assert client.memory[0]["content"] == "ok"
+    assert len(client.retrieval.snippets) == 2
+
+    client.chat(functions=[], message="Which timeout_seconds value is configured?")
+
+    messages = mock_create.call_args.kwargs["messages"]
+    assert messages[-1]["role"] == "system"
+    assert (
+        '[view_file({"filepath": "settings.py"})]\nTIMEOUT_SECONDS = 30'
+        in messages[-1]["content"]
+    )
+    # the retrieved snippets are only part of this request
+    assert all("TIMEOUT_SECONDS" not in m.get("content", "") for m in client.memory)
+
+
+def _cached_client(cache_dir):
+    return OpenAIClient.create(
+        OpenAIClientConfig(
+            system_content="You are a helpful assistant.",
+            memory_max_tokens=1000,
+            summary_memory_max_tokens=1000,
+            model="gpt-3.5-turbo",
+            cache_dir=str(cache_dir),
+        )
+    )
+
+
+@patch("openai.resources.chat.completions.Completions.create")
+def test_chat_response_cache(mock_create, tmp_path, mock_openai_api_key):
+    mock_create.return_value = _completion("Hello!")
+
+    first = _cached_client(tmp_path).chat(functions=[], message="Hi there")
+    second_client = _cached_client(tmp_path)
+    second = second_client.chat(functions=[], message="Hi there")
+
+    mock_create.assert_called_once()
+    assert first["message"] == second["message"] == "Hello!"
+    assert first["usage"]["prompt_tokens"] == 10
+    assert second["usage"]["cache_hit"] is True
+    assert "prompt_tokens" not in second["usage"]
+    assert second_client.memory[-1]["content"] == "Hello!"
+    assert second_client.response_cache.hits >= 1
+
+    # a different conversation is a cache miss
+    second_client.chat(functions=[], message="Something else")
+    assert mock_create.call_count == 2
+
+
+def test_achat_uses_response_cache(tmp_path, mock_openai_api_key):
+    with patch("openai.resources.chat.completions.Completions.create") as mock_create:
+        mock_create.return_value = _completion("Hello!")
+        _cached_client(tmp_path).chat(functions=[], message="Hi there")
+
+    client = _cached_client(tmp_path)
+    client._async_client = MagicMock()
+    client._async_client.chat.completions.create = AsyncMock()
+    response = asyncio.run(client.achat(functions=[], message="Hi there"))
+
+    client._async_client.chat.completions.create.assert_not_called()
+    assert response["message"] == "Hello!"
+
+
+@patch("openai.resources.chat.completions.Completions.create")
+def test_summarize_memory_uses_response_cache(
+    mock_create, tmp_path, mock_openai_api_key
+):
+    mock_create.return_value = _completion("A summary.")
+    messages = [{"role": "user", "content": "What is Python?", "tokens": 10}]
+
+    assert _cached_client(tmp_path)._summarize_memory(messages) == "A summary."
+    assert _cached_client(tmp_path)._summarize_memory(messages) == "A summary."
+    mock_create.assert_called_once()
+
+
+@patch("openai.resources.chat.completions.Completions.create")
+def test_summarize_uses_summary_model(mock_create, mock_openai_api_key):
+    mock_create.return_value = _completion("A summary.")
+    client = OpenAIClient.create(
+        OpenAIClientConfig(
+            system_content="You are a helpful assistant.",
+            memory_max_tokens=1000,
+            summary_memory_max_tokens=1000,
+            model="gpt-3.5-turbo",
+            summary_model="gpt-4o-mini",
+            summary_max_output_tokens=256,
+        )
+    )
+
+    assert client.summarize("content", instruction="Summarize this.") == "A summary."
+    assert mock_create.call_args[1] == {
+        "model": "gpt-4o-mini",
+        "messages": [
+            {"role": "system", "content": "Summarize this."},
+            {"role": "user", "content": "content"},
+        ],
+        "max_completion_tokens": 256,
+    }
+    assert client.memory == []
+
+    mock_create.return_value = _completion("Hello!")
+    client.chat(functions=[], message="Hi there")
+    usage = client.usage.by_model()
+    assert set(usage) == {"gpt-3.5-turbo", "gpt-4o-mini"}
+    assert usage["gpt-4o-mini"]["requests"] == 1
+    assert usage["gpt-4o-mini"]["prompt_tokens"] == 10
+    assert usage["gpt-3.5-turbo"]["completion_tokens"] == 2
+
+
+def test_summary_model_defaults_to_model(client):
+    assert client.summary_model == "gpt-3.5-turbo"
+    assert client.summary_max_output_tokens is None
+
+
+@patch("openai.resources.chat.completions.Completions.create")
+def test_chat_records_cached_tokens(mock_create, client):
+    response = _completion("Hello!")
+    response.usage = CompletionUsage.model_validate(
+        {
+            "prompt_tokens": 2048,
+            "completion_tokens": 2,
+            "total_tokens": 2050,
+            "prompt_tokens_details": {"cached_tokens": 1536},
+        }
+    )
+    mock_create.return_value = response
+
+    result = client.chat(functions=[], message="Hi there")
+
+    assert result["usage"]["cached_tokens"] == 1536
+    usage = client.usage.by_model()["gpt-3.5-turbo"]
+    assert usage["cached_tokens"] == 1536
+    assert client.usage.cached_ratio(usage) == 0.75
+
+
+@patch("openai.resources.chat.completions.Completions.create")
+def test_chat_estimates_prompt_tokens(mock_create, mock_openai_api_key):
+    # the weather example of the OpenAI cookbook, for which the API reported 105 prompt tokens
+    client = OpenAIClient.create(
+        OpenAIClientConfig(
+            system_content="You are a helpful assistant that can answer to questions about "
+            "the weather.",
+            memory_max_tokens=1000,
+            summary_memory_max_tokens=1000,
+            model="gpt-3.5-turbo",
+        )
+    )
+    functions = [
+        {
+            "name": "get_current_weather",
+            "description": "Get the current weather in a given location",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "location": {
+                        "type": "string",
+                        "description": "The city and state, e.g. San Francisco, CA",
+                    },
+                    "unit": {
+                        "type": "string",
+                        "description": "The unit of temperature to return",
+                        "enum": ["celsius", "fahrenheit"],
+                    },
+                },
+                "required": ["location"],
+            },
+        }
+    ]
+    response = _completion("Hello!")
+    response.usage = CompletionUsage(
+        prompt_tokens=105, completion_tokens=2, total_tokens=107
+    )
+    mock_create.return_value = response
+
+    result = client.chat(
+        functions=functions, message="What's the weather like in San Francisco?"
+    )
+
+    assert result["usage"]["estimated_prompt_tokens"] == 105
+    assert result["usage"]["prompt_tokens"] == 105
+
+
+def _rate_limit_error():
+    return openai.RateLimitError(
+        "rate limited",
+        response=httpx.Response(
+            429,
+            headers={"retry-after": "0"},
+            request=httpx.Request("POST", "http://localhost/v1/chat/completions"),
+        ),
+        body=None,
+    )
+
+
+@patch("fellow.clients.RequestScheduler.time.sleep")
+@patch("openai.resources.chat.completions.Completions.create")
+def test_chat_retries_rate_limit_errors(
+    mock_create, mock_sleep, mock_openai_api_key, client
+):
+    mock_create.side_effect = [_rate_limit_error(), _completion("Hello!")]
+
+    result = client.chat(functions=[], message="Hi there")
+
+    assert result["message"] == "Hello!"
+    assert mock_create.call_count == 2
+    assert client.sync_client.max_retries == 0
+
+
+def test_achat_retries_rate_limit_errors(client):
+    client._async_client = MagicMock()
+    client._async_client.chat.completions.create = AsyncMock(
+        side_effect=[_rate_limit_error(), _completion("Hello!")]
+    )
+
+    result = asyncio.run(client.achat(functions=[], message="Hi there"))
+
+    assert result["message"] == "Hello!"
+    assert client._async_client.chat.completions.create.await_count == 2
+
+
+def test_schedulers_are_shared_per_model(mock_openai_api_key):
+    config = OpenAIClientConfig(
+        system_content="",
+        memory_max_tokens=1000,
+        summary_memory_max_tokens=1000,
+        model="gpt-3.5-turbo",
+        summary_model="gpt-4o-mini",
+        requests_per_minute=100,
+    )
+    first, second = OpenAIClient(config), OpenAIClient(config)
+    assert first.scheduler is second.scheduler
+    assert first.summary_scheduler is not first.scheduler
+    assert first.scheduler.request_bucket.capacity == 100
+
+
+def test_sync_client_is_created_once(client):
+    module_client = openai._client
+    with patch("openai.OpenAI") as mock_openai:
+        assert client.sync_client is client.sync_client
+    mock_openai.assert_called_once_with(
+        max_retries=0,
+        http_client=client.http_pool.client,
+        timeout=client.http_pool.timeout,
+    )
+    # the module-level client of other openai users is left alone
+    assert openai._client is module_client
+
+
+def test_set_plan_with_prompt_cache_layout(client):
+    client.prompt_cache_layout = True
+    client.memory.append({"role": "user", "content": "Hi", "tokens": 5})
+
+    client.set_plan("First plan")
+    prefix = client.message_to_params()[:2]
+    client.set_plan("Updated plan")
+
+    assert [message["content"] for message in client.system_content] == [
+        "You are a helpful assistant.",
+        "First plan",
+    ]
+    assert client.memory[-1]["content"] == "Hi"
+    assert client.plan_update[-1]["content"] == "Updated plan"
+    params = client.message_to_params()
+    assert params[:2] == prefix
+
+    client.set_plan("Latest plan")
+    assert [message["content"] for message in client.plan_update] == ["Latest plan"]
+
+
+@patch("openai.resources.chat.completions.Completions.create")
+def test_plan_from_tool_call_follows_tool_results(
+    mock_create, mock_openai_api_key, client, tmp_path
+):
+    client.prompt_cache_layout = True
+    client.set_plan("First plan")
+    path = tmp_path / "memory.jsonl"
+    client.attach_checkpoint(MemoryCheckpoint(path))
+    response = _completion("Let me update the plan.").model_dump()
+    response["choices"][0]["message"]["tool_calls"] = [
+        {
+            "id": "call_1",
+            "type": "function",
+            "function": {"name": "make_plan", "arguments": '{"plan": "New plan"}'},
+        }
+    ]
+    mock_create.return_value = ChatCompletion.model_validate(response)
+    result = client.chat(functions=[], message="Task")
+
+    command = Command(MakePlanInput, make_plan, [])
+    output = command.run(result["function_args"], {"ai_client": client})  # type: ignore[typeddict-item]
+    # the plan is not part of the memory, which ends with the pending tool calls
+    assert client.memory[-1]["tool_calls"][0]["id"] == "call_1"
+    assert MemoryCheckpoint.load(path)["lists"]["memory"][-1] == client.memory[-1]
+
+    mock_create.return_value = _completion("Done.")
+    client.chat(
+        functions=[],
+        function_results=[{"name": "make_plan", "output": output, "call_id": "call_1"}],
+    )
+    messages = mock_create.call_args.kwargs["messages"]
+    assert [message["role"] for message in messages] == [
+        "system",
+        "system",
+        "user",
+        "assistant",
+        "assistant",
+        "tool",
+        "system",
+    ]
+    assert messages[-1]["content"] == "New plan"
+
+    # resuming from the checkpoint sends the plan after the memory as well
+    restored = OpenAIClient.create(
+        OpenAIClientConfig(
+            system_content="You are a helpful assistant.",
+            memory_max_tokens=1000,
+            summary_memory_max_tokens=1000,
+            model="gpt-3.5-turbo",
+            prompt_cache_layout=True,
+        )
+    )
+    restored.restore_memory(MemoryCheckpoint.load(path)["lists"])
+    restored.chat(functions=[], message="Continue")
+    messages = mock_create.call_args.kwargs["messages"]
+    assert [message["role"] for message in messages][-3:] == [
+        "assistant",
+        "user",
+        "system",
+    ]
+    assert messages[-1]["content"] == "New plan"
+
+
+def test_set_plan_without_prompt_cache_layout(client):
+    client.set_plan("First plan")
+    client.set_plan("Updated plan")
+    assert len(client.system_content) == 3
+    assert client.memory == []
+
+
 def test_store_memory(client):
     client.memory = [{"role": "user", "content": "Hi", "tokens": 5}]
     with NamedTemporaryFile(delete=False, mode="r+") as tmpfile:
@@ -172,6 +984,19 @@ def test_split_on_token_limit():
     assert OpenAIClient._split_on_token_limit(messages, 100) == ([], messages)
 
 
+def test_split_on_token_limit_keeps_tool_results_with_their_call():
+    messages = [
+        {"role": "user", "content": "go", "tokens": 5},
+        {"role": "assistant", "tool_calls": [], "tokens": 5},
+        {"role": "tool", "content": "a", "tokens": 5},
+        {"role": "tool", "content": "b", "tokens": 5},
+        {"role": "assistant", "content": "done", "tokens": 5},
+    ]
+    first, second = OpenAIClient._split_on_token_limit(messages, 10)
+    assert first == messages[:4]
+    assert second == messages[4:]
+
+
 def test__summarize_memory(client):
     messages = [
         {"role": "system", "content": "You are a bot."},
@@ -189,7 +1014,7 @@ def test__summarize_memory(client):
     ]
 
     # Patch the OpenAI API call
-    with patch("openai.chat.completions.create") as mock_create:
+    with patch("openai.resources.chat.completions.Completions.create") as mock_create:
         mock_response = MagicMock()
         mock_response.choices[0].message.content = (
             "The user asked about Python. Assistant explained it's a programming language."
@@ -251,7 +1076,7 @@ def test__maybe_summarize_memory(client):
     assert "Summary of previous conversation: Summary A" in summary_msg["content"]
     assert len(mock_summarize.call_args[0][0]) == 2
 
-    # Now test recursive summarization on summary_memory
+    # Now test merging the window summaries of summary_memory
     mock_summarize.return_value = "Summary B"
     # Force summary memory to exceed again
     client.summary_memory = [
@@ -260,14 +1085,158 @@ def test__maybe_summarize_memory(client):
 
     client._maybe_summarize_memory()
 
+    # all but the latest window summary are merged into an epoch summary
     assert len(client.summary_memory) == 2
     assert (
         "Summary of previous conversation: Summary B"
-        in client.summary_memory[1]["content"]
+        in client.summary_memory[0]["content"]
     )
+    assert client.summary_memory[0]["tier"] == "epoch"
     assert len(mock_summarize.call_args[0][0]) == 2
 
 
+def _fill_memory(client, count, tokens):
+    client.memory = [
+        {"role": "user", "content": f"msg{i}", "tokens": tokens} for i in range(count)
+    ]
+
+
+def test_background_summary_starts_at_soft_watermark(client):
+    client.memory_max_tokens = 100
+    client._count_tokens = lambda msg: 10
+    release = threading.Event()
+
+    def summarize(messages):
+        release.wait(5)
+        return "Summary A"
+
+    client._summarize_memory = MagicMock(side_effect=summarize)
+    _fill_memory(
+        client, 3, 30
+    )  # 90 tokens: above the soft watermark (80), below the limit
+    old_memory = list(client.memory)
+
+    client._maybe_summarize_memory()
+
+    # nothing blocks and nothing is removed while the summary is running
+    assert client.memory == old_memory
+    assert client.summary_memory == []
+    assert client._pending_summary is not None
+
+    release.set()
+    client._pending_summary[2].result(5)
+    client.memory.append({"role": "user", "content": "new", "tokens": 10})
+    client._maybe_summarize_memory()
+
+    assert client._summarize_memory.call_args[0][0] == old_memory[:2]
+    assert client.memory == [
+        old_memory[2],
+        {"role": "user", "content": "new", "tokens": 10},
+    ]
+    assert client.summary_memory == [
+        {
+            "role": "system",
+            "content": "Summary of previous conversation: Summary A",
+            "tokens": 10,
+            "tier": "window",
+            "summarized": 2,
+        }
+    ]
+    assert client._pending_summary is None
+
+
+def test_hard_limit_waits_for_background_summary(client):
+    client.memory_max_tokens = 100
+    client._count_tokens = lambda msg: 10
+    client._summarize_memory = MagicMock(return_value="Summary A")
+    _fill_memory(client, 3, 30)
+    with patch.object(client, "_collect_background_summary"):
+        client._maybe_summarize_memory()
+    assert client._pending_summary is not None
+
+    client.memory.append({"role": "user", "content": "big", "tokens": 30})  # 120 tokens
+    client._maybe_summarize_memory()
+
+    # the background summary covered enough, no synchronous summary was needed
+    client._summarize_memory.assert_called_once()
+    assert [message["content"] for message in client.memory] == ["msg2", "big"]
+    assert len(client.summary_memory) == 1
+
+
+def test_background_summary_is_dropped_if_memory_changed(client):
+    client.memory_max_tokens = 100
+    client._summarize_memory = MagicMock(return_value="Summary A")
+    _fill_memory(client, 3, 30)
+    with patch.object(client, "_collect_background_summary"):
+        client._maybe_summarize_memory()
+    client._pending_summary[2].result(5)
+
+    _fill_memory(client, 1, 10)
+    client._collect_background_summary()
+
+    assert len(client.memory) == 1
+    assert client.summary_memory == []
+
+
+def test_background_summary_can_be_disabled(client):
+    client.memory_max_tokens = 100
+    client.summary_soft_limit_ratio = 1.0
+    client._summarize_memory = MagicMock()
+    _fill_memory(client, 3, 30)
+
+    client._maybe_summarize_memory()
+
+    client._summarize_memory.assert_not_called()
+    assert client._pending_summary is None
+
+
+def test_summary_tiers_only_merge_the_affected_tier(mock_openai_api_key, client):
+    client.summary_soft_limit_ratio = 1.0
+    client.summary_epoch_size = 2
+    client.summary_global_size = 2
+    client._count_tokens = lambda msg: 10
+    merged_inputs = []
+
+    def summarize(messages, instruction=None):
+        merged_inputs.append(len(messages))
+        return f"merged {len(merged_inputs)}"
+
+    client._summarize_memory = MagicMock(side_effect=summarize)
+    for _ in range(20):
+        client._append_summary("window", 3)
+        client._maybe_summarize_memory()
+
+    tiers = [message["tier"] for message in client.summary_memory]
+    assert tiers == ["global", "epoch", "window", "window"]
+    assert sum(message["summarized"] for message in client.summary_memory) == 60
+    # every merge summarizes at most one tier, independent of the length of the run
+    assert max(merged_inputs) <= 3
+    assert len(merged_inputs) == 13
+
+
+def test_summary_tiers_merge_in_background(mock_openai_api_key, client):
+    client.summary_epoch_size = 2
+    client._count_tokens = lambda msg: 10
+    client._summarize_memory = MagicMock(return_value="Epoch")
+    for _ in range(3):
+        client._append_summary("window", 1)
+    windows = list(client.summary_memory)
+
+    client._maybe_summarize_memory()
+    target, old_summaries, future = client._pending_summary
+    assert target == "summary_memory"
+    assert old_summaries == windows[:2]
+    future.result(5)
+    client._maybe_summarize_memory()
+
+    assert [message["tier"] for message in client.summary_memory] == [
+        "epoch",
+        "window",
+    ]
+    assert client.summary_memory[0]["summarized"] == 2
+    assert client.summary_memory[1] is windows[2]
+
+
 def test_set_plan():
     # todo: ...
     pass
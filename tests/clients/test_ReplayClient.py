@@ -0,0 +1,293 @@
+import asyncio
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from fellow.clients import ALL_CLIENTS
+from fellow.clients.ReplayClient import ReplayClient, ReplayClientConfig
+
+
+def completion(content, tool_calls=None, completion_tokens=8):
+    return {
+        "id": "chatcmpl-1",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-4o",
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "tool_calls" if tool_calls else "stop",
+                "message": {
+                    "role": "assistant",
+                    "content": content,
+                    "tool_calls": tool_calls,
+                },
+            }
+        ],
+        "usage": {
+            "prompt_tokens": 100,
+            "completion_tokens": completion_tokens,
+            "total_tokens": 100 + completion_tokens,
+        },
+    }
+
+
+TOOL_CALL = {
+    "id": "call_1",
+    "type": "function",
+    "function": {"name": "view_file", "arguments": '{"filepath": "a.py"}'},
+}
+
+
+@pytest.fixture
+def fixture(tmp_path):
+    path = tmp_path / "fixture.json"
+    path.write_text(
+        json.dumps(
+            {
+                "responses": [
+                    {"error_status": 429, "retry_after": "0"},
+                    completion("Let me look.", [TOOL_CALL]),
+                    completion("Done. END"),
+                ]
+            }
+        )
+    )
+    return path
+
+
+def make_client(path, **config):
+    return ReplayClient(
+        ReplayClientConfig(system_content="system", fixture=str(path), **config)
+    )
+
+
+def test_registered_as_builtin_client():
+    assert ALL_CLIENTS["replay"] is ReplayClient
+
+
+def test_replays_fixture_in_order(fixture):
+    client = make_client(fixture)
+
+    first = client.chat(functions=[], message="Task")
+    assert first["message"] == "Let me look."
+    assert first["function_name"] == "view_file"
+    assert first["function_calls"] == [
+        {"id": "call_1", "name": "view_file", "arguments": '{"filepath": "a.py"}'}
+    ]
+    assert first["usage"]["prompt_tokens"] == 100
+
+    second = client.chat(
+        functions=[],
+        function_results=[{"name": "view_file", "output": "x", "call_id": "call_1"}],
+    )
+    assert second["message"] == "Done. END"
+    assert second["function_calls"] == []
+    assert client.usage.by_model()["replay"]["requests"] == 2
+
+    with pytest.raises(ValueError, match="No more recorded responses"):
+        client.chat(functions=[], message="more")
+
+
+def test_missing_fixture(tmp_path):
+    with pytest.raises(ValueError, match="Replay fixture not found"):
+        make_client(tmp_path / "missing.json")
+
+
+@patch("fellow.clients.ReplayClient.time.sleep")
+def test_synthetic_latency(mock_sleep, fixture):
+    client = make_client(fixture, latency=0.5, latency_per_token=0.01)
+    client.chat(functions=[], message="Task")
+    mock_sleep.assert_called_once_with(pytest.approx(0.58))
+
+
+def test_achat_awaits_latency(fixture):
+    client = make_client(fixture)
+    with patch(
+        "fellow.clients.ReplayClient.asyncio.sleep", return_value=None
+    ) as mock_sleep:
+        result = asyncio.run(client.achat(functions=[], message="Task"))
+    assert result["function_name"] == "view_file"
+    mock_sleep.assert_called_once()
+
+
+def test_store_memory_can_be_replayed(fixture, tmp_path):
+    client = make_client(fixture)
+    client.set_plan("The plan")
+    client.chat(functions=[], message="Task")
+    client.chat(
+        functions=[],
+        function_results=[{"name": "view_file", "output": "x", "call_id": "call_1"}],
+    )
+    memory_path = tmp_path / "memory.json"
+    client.store_memory(str(memory_path))
+
+    memory = json.loads(memory_path.read_text())
+    assert [message["role"] for message in memory] == [
+        "system",
+        "system",
+        "user",
+        "assistant",
+        "tool",
+        "assistant",
+    ]
+    replayed = make_client(memory_path)
+    assert replayed.chat(functions=[], message="Task")["function_calls"] == [
+        {"id": "call_1", "name": "view_file", "arguments": '{"filepath": "a.py"}'}
+    ]
+    assert replayed.chat(functions=[])["message"] == "Done. END"
+
+
+def test_openai_memory_can_be_replayed(tmp_path, monkeypatch):
+    from openai.types.chat import ChatCompletion
+
+    from fellow.clients.OpenAIClient import OpenAIClient, OpenAIClientConfig
+
+    monkeypatch.setenv("OPENAI_API_KEY", "mock_api_key")
+    client = OpenAIClient(
+        OpenAIClientConfig(
+            system_content="system",
+            model="gpt-3.5-turbo",
+            memory_max_tokens=10_000,
+            summary_memory_max_tokens=10_000,
+        )
+    )
+    with patch("openai.resources.chat.completions.Completions.create") as mock_create:
+        mock_create.side_effect = [
+            ChatCompletion.model_validate(completion("Let me look.", [TOOL_CALL])),
+            ChatCompletion.model_validate(
+                completion(None, [{**TOOL_CALL, "id": "call_2"}])
+            ),
+            ChatCompletion.model_validate(completion("Done. END")),
+        ]
+        client.chat(functions=[], message="Task")
+        for call_id in ("call_1", "call_2"):
+            client.chat(
+                functions=[],
+                function_results=[
+                    {"name": "view_file", "output": "x", "call_id": call_id}
+                ],
+            )
+    memory_path = tmp_path / "memory.json"
+    client.store_memory(str(memory_path))
+    # the reasoning and the tool calls of the first response are separate messages
+    assert [message["role"] for message in json.loads(memory_path.read_text())] == [
+        "system",
+        "user",
+        "assistant",
+        "assistant",
+        "tool",
+        "assistant",
+        "tool",
+        "assistant",
+    ]
+
+    responses = ReplayClient.load_responses(memory_path)
+    assert [
+        (response["message"], [call["id"] for call in response["function_calls"]])
+        for response in responses
+    ] == [("Let me look.", ["call_1"]), (None, ["call_2"]), ("Done. END", [])]
+
+
+def test_memory_replay_merges_only_marked_turns(tmp_path):
+    path = tmp_path / "memory.json"
+    path.write_text(
+        json.dumps(
+            [
+                {"role": "user", "content": "Task", "tokens": 1},
+                {"role": "assistant", "content": "Hmm.", "tokens": 1},
+                {"role": "assistant", "tool_calls": [TOOL_CALL], "tokens": 1},
+            ]
+        )
+    )
+    # two responses without an input between them stay two responses
+    assert [
+        (response["message"], len(response["function_calls"]))
+        for response in ReplayClient.load_responses(path)
+    ] == [("Hmm.", 0), (None, 1)]
+
+
+def test_summarized_memory_is_not_replayed(tmp_path):
+    path = tmp_path / "memory.json"
+    path.write_text(
+        json.dumps(
+            [
+                {
+                    "role": "system",
+                    "content": "Summary of previous conversation: ...",
+                    "tokens": 1,
+                    "tier": "window",
+                    "summarized": 4,
+                },
+                {"role": "assistant", "content": "Done. END", "tokens": 1},
+            ]
+        )
+    )
+    with pytest.raises(ValueError, match="The memory was summarized"):
+        ReplayClient.load_responses(path)
+
+
+def test_replays_legacy_function_calls(tmp_path):
+    path = tmp_path / "memory.json"
+    path.write_text(
+        json.dumps(
+            [
+                {"role": "user", "content": "Task"},
+                {
+                    "role": "assistant",
+                    "content": None,
+                    "function_call": {"name": "list_files", "arguments": "{}"},
+                },
+            ]
+        )
+    )
+    result = make_client(path).chat(functions=[], message="Task")
+    assert result["function_name"] == "list_files"
+    assert result["function_args"] == "{}"
+
+
+def test_records_responses_of_real_client(tmp_path):
+    recorded_client = MagicMock()
+    recorded_client.chat.return_value = {
+        "message": "Thinking",
+        "function_name": "view_file",
+        "function_args": "{}",
+        "function_calls": [{"id": None, "name": "view_file", "arguments": "{}"}],
+        "usage": {
+            "model": "gpt-4o",
+            "prompt_tokens": 10,
+            "estimated_prompt_tokens": 9,
+            "completion_tokens": 2,
+        },
+    }
+    client_class = MagicMock(config_class=MagicMock())
+    client_class.create.return_value = recorded_client
+    fixture = tmp_path / "recordings" / "run.json"
+
+    with patch.dict(ALL_CLIENTS, {"dummy": client_class}):
+        client = make_client(
+            fixture, record_client="dummy", record_config={"model": "gpt-4o"}
+        )
+    client_class.config_class.assert_called_once_with(
+        system_content="system", model="gpt-4o"
+    )
+    assert client.usage is recorded_client.usage
+
+    result = client.chat(functions=[], message="Task")
+    assert result is recorded_client.chat.return_value
+
+    recorded = json.loads(fixture.read_text())["responses"]
+    assert recorded[0]["model"] == "gpt-4o"
+    assert recorded[0]["choices"][0]["message"]["tool_calls"][0]["id"] == "call_0_0"
+    assert recorded[0]["usage"]["total_tokens"] == 12
+    assert recorded[0]["usage"]["estimated_prompt_tokens"] == 9
+    replayed = make_client(fixture).chat(functions=[], message="Task")
+    assert replayed["message"] == "Thinking"
+    assert replayed["usage"]["estimated_prompt_tokens"] == 9
+    assert replayed["function_name"] == "view_file"
+
+
+def test_record_client_must_exist(tmp_path):
+    with pytest.raises(ValueError, match="can't be recorded"):
+        make_client(tmp_path / "run.json", record_client="replay")
@@ -0,0 +1,166 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import openai
+import pytest
+
+from fellow.clients.RequestScheduler import RequestScheduler, TokenBucket
+
+
+def make_error(status: int, headers=None) -> openai.APIStatusError:
+    response = httpx.Response(
+        status,
+        headers=headers or {},
+        request=httpx.Request("POST", "http://localhost/v1/chat/completions"),
+    )
+    if status == 429:
+        return openai.RateLimitError("rate limited", response=response, body=None)
+    return openai.APIStatusError("error", response=response, body=None)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_waits_for_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock)  # one token per second
+    assert bucket.reserve(60) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+    assert bucket.reserve(1) == pytest.approx(2.0)
+    clock.now = 10.0
+    assert bucket.reserve(1) == 0.0
+
+
+def test_token_bucket_caps_large_reservations():
+    bucket = TokenBucket(60, FakeClock())
+    assert bucket.reserve(1000) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+
+
+def test_requests_per_minute_limit_delays_requests():
+    scheduler = RequestScheduler(requests_per_minute=60, clock=FakeClock())
+    with patch("fellow.clients.RequestScheduler.time.sleep") as sleep:
+        for _ in range(61):
+            scheduler.call(lambda: "ok")
+    waits = [call.args[0] for call in sleep.call_args_list]
+    assert waits[:60] == [0.0] * 60
+    assert waits[60] == pytest.approx(1.0)
+    assert scheduler.throttled_seconds == pytest.approx(1.0)
+
+
+def test_tokens_per_minute_limit_delays_requests():
+    scheduler = RequestScheduler(tokens_per_minute=600, clock=FakeClock())
+    with patch("fellow.clients.RequestScheduler.time.sleep") as sleep:
+        scheduler.call(lambda: "ok", tokens=600)
+        scheduler.call(lambda: "ok", tokens=100)
+    assert sleep.call_args_list[1].args[0] == pytest.approx(10.0)
+
+
+def test_rate_limit_error_is_retried_after_retry_after():
+    scheduler = RequestScheduler(clock=FakeClock())
+    request = MagicMock(side_effect=[make_error(429, {"retry-after": "2"}), "ok"])
+    with patch("fellow.clients.RequestScheduler.time.sleep") as sleep:
+        assert scheduler.call(request) == "ok"
+    assert request.call_count == 2
+    assert scheduler.retries == 1
+    assert 2.0 in [call.args[0] for call in sleep.call_args_list]
+
+
+def test_retry_after_pauses_other_requests():
+    clock = FakeClock()
+    scheduler = RequestScheduler(clock=clock)
+    with patch("fellow.clients.RequestScheduler.time.sleep"):
+        scheduler.call(
+            MagicMock(side_effect=[make_error(429, {"retry-after": "5"}), "ok"])
+        )
+    clock.now = 1.0
+    assert scheduler._acquire(0) == pytest.approx(4.0)
+
+
+def test_server_errors_use_exponential_backoff_with_jitter():
+    scheduler = RequestScheduler(max_retries=3, backoff_base=1.0, backoff_max=3.0)
+    request = MagicMock(side_effect=[make_error(503)] * 3 + ["ok"])
+    with (
+        patch("fellow.clients.RequestScheduler.time.sleep"),
+        patch(
+            "fellow.clients.RequestScheduler.random.uniform", side_effect=lambda a, b: b
+        ) as uniform,
+    ):
+        assert scheduler.call(request) == "ok"
+    assert [call.args for call in uniform.call_args_list] == [
+        (0, 1.0),
+        (0, 2.0),
+        (0, 3.0),
+    ]
+
+
+def test_gives_up_after_max_retries():
+    scheduler = RequestScheduler(max_retries=2, backoff_base=0)
+    request = MagicMock(side_effect=make_error(429))
+    with patch("fellow.clients.RequestScheduler.time.sleep"):
+        with pytest.raises(openai.RateLimitError):
+            scheduler.call(request)
+    assert request.call_count == 3
+
+
+def test_client_errors_are_not_retried():
+    scheduler = RequestScheduler()
+    request = MagicMock(side_effect=make_error(400))
+    with pytest.raises(openai.APIStatusError):
+        scheduler.call(request)
+    assert request.call_count == 1
+
+
+def test_is_retryable():
+    assert RequestScheduler.is_retryable(make_error(429))
+    assert RequestScheduler.is_retryable(make_error(500))
+    assert RequestScheduler.is_retryable(
+        openai.APIConnectionError(request=httpx.Request("POST", "http://localhost"))
+    )
+    assert RequestScheduler.is_retryable(httpx.ConnectError("refused"))
+    assert not RequestScheduler.is_retryable(make_error(401))
+    assert not RequestScheduler.is_retryable(ValueError("no"))
+
+    gemini_error = Exception("429 RESOURCE_EXHAUSTED")
+    gemini_error.code = 429  # type: ignore[attr-defined]
+    assert RequestScheduler.is_retryable(gemini_error)
+
+
+def test_retry_after_headers():
+    assert RequestScheduler.retry_after(make_error(429, {"retry-after": "3"})) == 3.0
+    assert (
+        RequestScheduler.retry_after(make_error(429, {"retry-after-ms": "250"})) == 0.25
+    )
+    assert (
+        RequestScheduler.retry_after(
+            make_error(429, {"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"})
+        )
+        == 0.0
+    )
+    assert (
+        RequestScheduler.retry_after(make_error(429, {"retry-after": "soon"})) is None
+    )
+    assert RequestScheduler.retry_after(make_error(429)) is None
+    assert RequestScheduler.retry_after(ValueError()) is None
+
+
+def test_acall_retries_without_blocking():
+    scheduler = RequestScheduler(backoff_base=0)
+    request = AsyncMock(side_effect=[make_error(429), "ok"])
+    assert asyncio.run(scheduler.acall(request)) == "ok"
+    assert request.await_count == 2
+
+
+def test_for_key_returns_shared_instance():
+    assert RequestScheduler.for_key(
+        "openai:test", requests_per_minute=10
+    ) is RequestScheduler.for_key("openai:test", requests_per_minute=10)
+    assert RequestScheduler.for_key(
+        "openai:test", requests_per_minute=10
+    ) is not RequestScheduler.for_key("openai:other", requests_per_minute=10)
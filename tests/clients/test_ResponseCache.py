@@ -0,0 +1,76 @@
+import os
+
+from openai import NOT_GIVEN
+
+from fellow.clients.ResponseCache import ResponseCache
+
+
+def test_key_is_stable_and_ignores_not_given():
+    params = {
+        "model": "gpt-4o",
+        "messages": [{"role": "user", "content": "Hi"}],
+        "tools": NOT_GIVEN,
+    }
+    reordered = {
+        "messages": [{"content": "Hi", "role": "user"}],
+        "model": "gpt-4o",
+    }
+    assert ResponseCache.key(params) == ResponseCache.key(reordered)
+    assert ResponseCache.key(params) != ResponseCache.key(
+        {**reordered, "model": "gpt-4o-mini"}
+    )
+
+
+def test_get_and_put(tmp_path):
+    cache = ResponseCache(tmp_path)
+    key = ResponseCache.key({"model": "m"})
+    assert cache.get(key) is None
+    cache.put(key, '{"answer": 42}')
+    assert cache.get(key) == '{"answer": 42}'
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert (tmp_path / key[:2] / f"{key}.json").exists()
+
+
+def test_entries_survive_restart(tmp_path):
+    key = ResponseCache.key({"model": "m"})
+    ResponseCache(tmp_path).put(key, "cached")
+    assert ResponseCache(tmp_path).get(key) == "cached"
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=10)
+    cache.put("aa1", "12345")
+    cache.put("bb2", "12345")
+    cache.get("aa1")
+    cache.put("cc3", "12345")
+    assert cache.get("bb2") is None
+    assert cache.get("aa1") == "12345"
+    assert cache.get("cc3") == "12345"
+    assert not (tmp_path / "bb" / "bb2.json").exists()
+
+
+def test_lru_order_is_restored_from_mtime(tmp_path):
+    cache = ResponseCache(tmp_path)
+    cache.put("aa1", "12345")
+    cache.put("bb2", "12345")
+    os.utime(tmp_path / "aa" / "aa1.json", (2_000_000_000, 2_000_000_000))
+    os.utime(tmp_path / "bb" / "bb2.json", (1_000_000_000, 1_000_000_000))
+
+    reloaded = ResponseCache(tmp_path, max_bytes=10)
+    reloaded.put("cc3", "12345")
+    assert reloaded.get("bb2") is None
+    assert reloaded.get("aa1") == "12345"
+
+
+def test_missing_file_is_a_miss(tmp_path):
+    cache = ResponseCache(tmp_path)
+    cache.put("aa1", "12345")
+    (tmp_path / "aa" / "aa1.json").unlink()
+    assert cache.get("aa1") is None
+    assert cache.misses == 1
+
+
+def test_for_directory_returns_shared_instance(tmp_path):
+    assert ResponseCache.for_directory(tmp_path) is ResponseCache.for_directory(
+        tmp_path
+    )
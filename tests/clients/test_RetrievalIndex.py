@@ -0,0 +1,65 @@
+from fellow.clients.RetrievalIndex import RetrievalIndex, tokenize
+
+
+def snippet(text, tokens=10):
+    return {"text": text, "tokens": tokens}
+
+
+def test_tokenize_splits_identifiers():
+    assert tokenize("view_file(a.py) 42 x") == [
+        "view_file",
+        "view",
+        "file",
+        "py",
+        "42",
+    ]
+
+
+def test_search_ranks_by_bm25():
+    index = RetrievalIndex(None, top_k=2)
+    index.add(
+        [
+            snippet("[view_file]\ndef parse_config(path): ..."),
+            snippet("[run_python]\nTraceback: KeyError 'timeout'"),
+            snippet("[User]\nPlease also add a timeout option"),
+        ]
+    )
+    results = index.search("Where does the KeyError timeout come from?")
+    assert [result["text"] for result in results] == [
+        "[run_python]\nTraceback: KeyError 'timeout'",
+        "[User]\nPlease also add a timeout option",
+    ]
+    assert index.search("unrelated words") == []
+
+
+def test_search_respects_token_budget_and_skips_known_text():
+    index = RetrievalIndex(None, top_k=3, max_tokens=15)
+    index.add(
+        [
+            snippet("[a]\nconfig loader", tokens=10),
+            snippet("[b]\nconfig parser", tokens=10),
+            snippet("[c]\nconfig", tokens=5),
+        ]
+    )
+    # both match, but only one fits into the budget
+    results = index.search("the loader and the parser")
+    assert len(results) == 1
+    assert results[0]["tokens"] == 10
+
+    # the query already contains the text of the first snippet
+    texts = [result["text"] for result in index.search("Output:\nconfig loader")]
+    assert "[a]\nconfig loader" not in texts
+    assert texts
+
+
+def test_index_is_persisted_and_deduplicated(tmp_path):
+    path = tmp_path / "retrieval.jsonl"
+    index = RetrievalIndex(path)
+    assert index.add([snippet("[a]\nhello world"), snippet("[a]\nhello world")]) == 1
+    index.close()
+
+    reloaded = RetrievalIndex(path)
+    assert reloaded.snippets == [snippet("[a]\nhello world")]
+    assert reloaded.add([snippet("[a]\nhello world")]) == 0
+    assert reloaded.search("hello")[0]["text"] == "[a]\nhello world"
+    assert reloaded.report() == "1 snippets indexed, 1 retrieved (10 tokens)"
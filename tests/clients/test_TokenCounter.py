@@ -0,0 +1,210 @@
+from unittest.mock import patch
+
+import pytest
+import tiktoken
+
+from fellow.clients.TokenCounter import (
+    DEFAULT_TOKEN_ACCOUNTING,
+    TOKEN_ACCOUNTING,
+    TokenCounter,
+    accounting_for_model,
+    encoding_for_model,
+)
+
+# request/usage pairs published in the OpenAI cookbook ("How to count tokens with tiktoken"), with the
+# prompt_tokens the API reported for them
+EXAMPLE_MESSAGES = [
+    {
+        "role": "system",
+        "content": "You are a helpful, pattern-following assistant that translates corporate jargon "
+        "into plain English.",
+    },
+    {
+        "role": "system",
+        "name": "example_user",
+        "content": "New synergies will help drive top-line growth.",
+    },
+    {
+        "role": "system",
+        "name": "example_assistant",
+        "content": "Things working well together will increase revenue.",
+    },
+    {
+        "role": "system",
+        "name": "example_user",
+        "content": "Let's circle back when we have more bandwidth to touch base on opportunities for "
+        "increased leverage.",
+    },
+    {
+        "role": "system",
+        "name": "example_assistant",
+        "content": "Let's talk later when we're less busy about how to do better.",
+    },
+    {
+        "role": "user",
+        "content": "This late pivot means we don't have time to boil the ocean for the client "
+        "deliverable.",
+    },
+]
+
+EXAMPLE_TOOL_MESSAGES = [
+    {
+        "role": "system",
+        "content": "You are a helpful assistant that can answer to questions about the weather.",
+    },
+    {"role": "user", "content": "What's the weather like in San Francisco?"},
+]
+
+EXAMPLE_FUNCTIONS = [
+    {
+        "name": "get_current_weather",
+        "description": "Get the current weather in a given location",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "location": {
+                    "type": "string",
+                    "description": "The city and state, e.g. San Francisco, CA",
+                },
+                "unit": {
+                    "type": "string",
+                    "description": "The unit of temperature to return",
+                    "enum": ["celsius", "fahrenheit"],
+                },
+            },
+            "required": ["location"],
+        },
+    }
+]
+
+
+def test_encoding_for_model_is_resolved_once():
+    encoding_for_model.cache_clear()
+    with patch(
+        "tiktoken.encoding_for_model", wraps=tiktoken.encoding_for_model
+    ) as mock_encoding_for_model:
+        encoding_for_model("gpt-3.5-turbo")
+        encoding_for_model("gpt-3.5-turbo")
+    mock_encoding_for_model.assert_called_once_with("gpt-3.5-turbo")
+
+
+def test_for_model_returns_shared_instance():
+    assert TokenCounter.for_model("gpt-3.5-turbo") is TokenCounter.for_model(
+        "gpt-3.5-turbo"
+    )
+
+
+def test_count_matches_encoder():
+    counter = TokenCounter("gpt-3.5-turbo")
+    text = "def foo():\n    return 'Hello, World!'\n"
+    assert counter.count(text) == len(counter.encoding.encode(text))
+
+
+def test_count_allows_special_tokens_in_content():
+    counter = TokenCounter("gpt-3.5-turbo")
+    assert counter.count("text <|endoftext|> text") > 0
+
+
+def test_count_is_memoized():
+    counter = TokenCounter("gpt-3.5-turbo")
+    with patch.object(
+        counter.encoding, "encode", wraps=counter.encoding.encode
+    ) as mock_encode:
+        first = counter.count("some content")
+        second = counter.count("some content")
+    assert first == second
+    mock_encode.assert_called_once()
+    assert counter.hits == 1
+    assert counter.misses == 1
+
+
+def test_count_batch_encodes_only_missing_texts():
+    counter = TokenCounter("gpt-3.5-turbo")
+    counter.count("cached")
+    with (
+        patch("os.cpu_count", return_value=4),
+        patch.object(
+            counter.encoding, "encode_batch", wraps=counter.encoding.encode_batch
+        ) as mock_encode_batch,
+    ):
+        counts = counter.count_batch(["cached", "new one", "another one", "new one"])
+    mock_encode_batch.assert_called_once()
+    assert mock_encode_batch.call_args[0][0] == ["new one", "another one"]
+    assert mock_encode_batch.call_args[1]["num_threads"] == 2
+    assert counts == [
+        counter.count("cached"),
+        counter.count("new one"),
+        counter.count("another one"),
+        counter.count("new one"),
+    ]
+
+
+def test_cache_is_bounded():
+    counter = TokenCounter("gpt-3.5-turbo", max_cache_size=2)
+    counter.count_batch(["a", "b", "c"])
+    assert len(counter._cache) == 2
+    assert TokenCounter._key("a") not in counter._cache
+    assert TokenCounter._key("c") in counter._cache
+
+
+def test_count_batch_without_spare_cpus_encodes_sequentially():
+    counter = TokenCounter("gpt-3.5-turbo")
+    with (
+        patch("os.cpu_count", return_value=1),
+        patch.object(counter.encoding, "encode_batch") as mock_encode_batch,
+    ):
+        counts = counter.count_batch(["one", "two words"])
+    mock_encode_batch.assert_not_called()
+    assert counts == [1, 2]
+
+
+def test_accounting_for_model_uses_longest_prefix():
+    assert (
+        accounting_for_model("gpt-3.5-turbo-0301")
+        is TOKEN_ACCOUNTING["gpt-3.5-turbo-0301"]
+    )
+    assert (
+        accounting_for_model("gpt-3.5-turbo-0125") is TOKEN_ACCOUNTING["gpt-3.5-turbo"]
+    )
+    assert accounting_for_model("gpt-4o-mini") is TOKEN_ACCOUNTING["gpt-4o"]
+    assert accounting_for_model("gpt-4-0613") is TOKEN_ACCOUNTING["gpt-4"]
+    assert accounting_for_model("o3-mini") is DEFAULT_TOKEN_ACCOUNTING
+
+
+@pytest.mark.parametrize(
+    "model, prompt_tokens",
+    [("gpt-3.5-turbo", 129), ("gpt-4", 129), ("gpt-3.5-turbo-0301", 127)],
+)
+def test_count_request_matches_api_prompt_tokens(model, prompt_tokens):
+    counter = TokenCounter(model)
+    message_tokens = sum(counter.count_messages(EXAMPLE_MESSAGES))
+    assert counter.count_request(message_tokens, []) == prompt_tokens
+
+
+@pytest.mark.parametrize("model", ["gpt-3.5-turbo", "gpt-4"])
+def test_count_request_with_functions_matches_api_prompt_tokens(model):
+    counter = TokenCounter(model)
+    message_tokens = sum(counter.count_messages(EXAMPLE_TOOL_MESSAGES))
+    assert counter.count_request(message_tokens, EXAMPLE_FUNCTIONS) == 105
+
+
+def test_count_messages_counts_names_and_function_calls():
+    counter = TokenCounter("gpt-3.5-turbo")
+    call = {"name": "view_file", "arguments": '{"filepath": "a.py"}'}
+    tool_call = {"id": "call_1", "type": "function", "function": call}
+    plain, named, tool_calls, function_call = counter.count_messages(
+        [
+            {"role": "function", "content": "output"},
+            {"role": "function", "name": "view_file", "content": "output"},
+            {"role": "assistant", "content": None, "tool_calls": [tool_call] * 2},
+            {"role": "assistant", "function_call": call, "tokens": 1000},
+        ]
+    )
+    arguments = counter.count(call["name"]) + counter.count(call["arguments"])
+    assert named == plain + counter.count("view_file") + 1
+    assert function_call == 3 + counter.count("assistant") + arguments + 3
+    assert tool_calls == function_call + arguments + 3
+
+
+def test_count_functions_without_functions():
+    assert TokenCounter("gpt-3.5-turbo").count_functions([]) == 0
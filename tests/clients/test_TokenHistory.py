@@ -0,0 +1,67 @@
+import copy
+import random
+
+from fellow.clients.TokenHistory import TokenHistory
+
+
+def message(tokens, role="user"):
+    return {"role": role, "content": "x", "tokens": tokens}
+
+
+def naive_split_index(messages, token_limit):
+    token_count = 0
+    for i in range(len(messages) - 1, -1, -1):
+        token_count += messages[i]["tokens"]
+        if token_count > token_limit:
+            return i + 1
+    return 0
+
+
+def test_tokens_follow_mutations():
+    history = TokenHistory([message(1), message(2)])
+    assert history.tokens == 3
+    history.append(message(4))
+    history.extend([message(8), message(16)])
+    assert history.tokens == 31
+    history += [message(32)]
+    assert history.tokens == 63
+    assert (history + [message(64)]).tokens == 127
+    del history[0]
+    assert history.tokens == 62
+    history.insert(0, message(1))
+    history.pop()
+    assert history.tokens == 31
+    history.clear()
+    assert history.tokens == 0
+
+
+def test_slices_keep_the_index():
+    history = TokenHistory([message(tokens) for tokens in (1, 2, 4, 8)])
+    tail = history[2:]
+    assert isinstance(tail, TokenHistory)
+    assert tail.tokens == 12
+    tail.append(message(16))
+    assert tail.tokens == 28
+    assert history.tokens == 15
+    assert history[:0].tokens == 0
+    assert history[::2].tokens == 5
+    assert history[3:1].tokens == 0
+
+
+def test_split_index_matches_backward_scan():
+    rng = random.Random(0)
+    for _ in range(200):
+        messages = [message(rng.randint(0, 20)) for _ in range(rng.randint(0, 30))]
+        history = TokenHistory(messages)
+        for token_limit in (0, 5, 20, 100, 1000):
+            assert history.split_index(token_limit) == naive_split_index(
+                messages, token_limit
+            )
+
+
+def test_copy_rebuilds_the_index():
+    history = TokenHistory([message(1), message(2)])
+    copied = copy.deepcopy(history)
+    copied.append(message(4))
+    assert copied.tokens == 7
+    assert history.tokens == 3
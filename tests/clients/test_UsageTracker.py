@@ -0,0 +1,59 @@
+import threading
+
+from fellow.clients.UsageTracker import UsageTracker
+
+
+def test_record_accumulates_per_model():
+    tracker = UsageTracker()
+    tracker.record(
+        "gpt-4o", 2.0, prompt_tokens=100, completion_tokens=10, cached_tokens=64
+    )
+    tracker.record("gpt-4o", 1.0, prompt_tokens=50, completion_tokens=5)
+    tracker.record("gpt-4o-mini", 0.5, prompt_tokens=200, completion_tokens=20)
+    tracker.record("gpt-4o-mini", 0.0, cache_hit=True)
+
+    assert tracker.by_model() == {
+        "gpt-4o": {
+            "requests": 2,
+            "cache_hits": 0,
+            "latency": 3.0,
+            "prompt_tokens": 150,
+            "completion_tokens": 15,
+            "cached_tokens": 64,
+        },
+        "gpt-4o-mini": {
+            "requests": 1,
+            "cache_hits": 1,
+            "latency": 0.5,
+            "prompt_tokens": 200,
+            "completion_tokens": 20,
+            "cached_tokens": 0,
+        },
+    }
+
+
+def test_report():
+    tracker = UsageTracker()
+    tracker.record(
+        "gpt-4o", 2.0, prompt_tokens=100, completion_tokens=10, cached_tokens=25
+    )
+    assert tracker.report() == [
+        "gpt-4o: 1 requests (0 cached), 2.0s, 100 prompt tokens "
+        "(25% from prompt cache), 10 completion tokens"
+    ]
+
+
+def test_record_is_thread_safe():
+    tracker = UsageTracker()
+
+    def record():
+        for _ in range(1000):
+            tracker.record("gpt-4o", 0.001, prompt_tokens=1)
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert tracker.by_model()["gpt-4o"]["requests"] == 4000
+    assert tracker.by_model()["gpt-4o"]["prompt_tokens"] == 4000
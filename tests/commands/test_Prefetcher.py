@@ -0,0 +1,149 @@
+import json
+
+import pytest
+
+from fellow.commands import (
+    EditFileInput,
+    ListDefinitionsInput,
+    ListFilesInput,
+    ViewFileInput,
+    edit_file,
+    list_definitions,
+    list_files,
+    view_file,
+)
+from fellow.commands.Command import Command
+from fellow.commands.Prefetcher import Prefetcher
+from fellow.policies import DenyIfFieldInBlacklist
+from fellow.policies.DenyIfFieldInBlacklist import DenyIfFieldInBlacklistConfig
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.py").write_text("def main():\n    pass\n")
+    (tmp_path / "README.md").write_text("# App\n")
+    return tmp_path
+
+
+def make_commands(view_policies=None):
+    return {
+        "view_file": Command(
+            ViewFileInput, view_file, view_policies or [], read_only=True
+        ),
+        "list_files": Command(ListFilesInput, list_files, [], read_only=True),
+        "list_definitions": Command(
+            ListDefinitionsInput, list_definitions, [], read_only=True
+        ),
+        "edit_file": Command(EditFileInput, edit_file, []),
+    }
+
+
+def call(name, **arguments):
+    return {"id": None, "name": name, "arguments": json.dumps(arguments)}
+
+
+def predicted(prefetcher, function_calls, text):
+    return [
+        (name, command_input.model_dump(exclude_none=True))
+        for name, command_input in prefetcher.predict(function_calls, text)
+    ]
+
+
+def test_predict_follow_ups_and_mentions(workspace):
+    prefetcher = Prefetcher(make_commands(), {}, max_commands=10)
+    assert predicted(
+        prefetcher,
+        [call("edit_file", filepath="src/app.py"), call("view_file", filepath="x")],
+        "Next I check `README.md`, ./src/app.py and the src/ directory. Missing.py, "
+        "/etc/passwd and ../outside.txt are skipped.",
+    ) == [
+        ("view_file", {"filepath": "src/app.py"}),
+        ("view_file", {"filepath": "README.md"}),
+        ("list_definitions", {"filepath": "./src/app.py"}),
+        ("list_files", {"directory": "src/", "max_depth": 1}),
+    ]
+
+    prefetcher.max_commands = 1
+    assert len(prefetcher.predict([], "README.md src/app.py")) == 1
+
+
+def test_run_answers_from_prefetched_results(workspace):
+    reads = []
+
+    def view_file(args: ViewFileInput, context) -> str:
+        reads.append(args.filepath)
+        return f"content of {args.filepath}"
+
+    commands = {"view_file": Command(ViewFileInput, view_file, [], read_only=True)}
+    prefetcher = Prefetcher(commands, {})
+    context = {"prefetcher": prefetcher}
+    assert prefetcher.prefetch([], "Let me look at README.md") == 1
+
+    output = commands["view_file"].run('{"filepath": "./README.md"}', context)
+    assert output == "content of README.md"
+    assert commands["view_file"].run('{"filepath": "src/app.py"}', context) == (
+        "content of src/app.py"
+    )
+    assert reads == ["README.md", "src/app.py"]
+
+    report = prefetcher.report()
+    assert report["prefetched"] == 1
+    assert report["lookups"] == 2
+    assert report["hits"] == 1
+    assert report["saved_seconds"] >= 0
+    prefetcher.close()
+
+
+def test_writes_drop_prefetched_results(workspace):
+    commands = make_commands()
+    prefetcher = Prefetcher(commands, {})
+    context = {"prefetcher": prefetcher}
+    prefetcher.prefetch([], "README.md")
+
+    commands["edit_file"].run(
+        '{"filepath": "README.md", "new_text": "# New"}',
+        context,
+    )
+    assert commands["view_file"].run('{"filepath": "README.md"}', context) == "# New"
+    assert prefetcher.report()["hits"] == 0
+    prefetcher.close()
+
+
+def test_policies_apply_to_prefetched_results(workspace):
+    policy = DenyIfFieldInBlacklist(
+        DenyIfFieldInBlacklistConfig(fields=["filepath"], blacklist=["README.md"])
+    )
+    commands = make_commands(view_policies=[policy])
+    prefetcher = Prefetcher(commands, {})
+    prefetcher.prefetch([], "README.md")
+
+    output = commands["view_file"].run(
+        '{"filepath": "README.md"}', {"prefetcher": prefetcher}
+    )
+    assert output.startswith("[ERROR] DenyIfFieldInBlacklist denied command")
+    prefetcher.close()
+
+
+def test_reads_denied_by_policies_are_not_prefetched(workspace):
+    policy = DenyIfFieldInBlacklist(
+        DenyIfFieldInBlacklistConfig(fields=["filepath"], blacklist=["README.md"])
+    )
+    read_files = []
+
+    def view_file(args, context):
+        read_files.append(args.filepath)
+        return "content"
+
+    commands = make_commands(view_policies=[policy])
+    commands["view_file"].command_handler = view_file
+    prefetcher = Prefetcher(commands, {}, max_commands=10)
+
+    assert predicted(prefetcher, [], "README.md and src/app.py") == [
+        ("view_file", {"filepath": "src/app.py"}),
+        ("list_definitions", {"filepath": "src/app.py"}),
+    ]
+    assert prefetcher.prefetch([], "README.md") == 0
+    prefetcher.close()
+    assert read_files == []
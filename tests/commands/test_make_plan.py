@@ -8,6 +8,10 @@ from fellow.commands.make_plan import MakePlanInput, make_plan
 class FakeOpenAIClient(OpenAIClient):
     def __init__(self):
         self.system_content = []
+        self.memory = []
+        self.prompt_cache_layout = False
+        self._plan_set = False
+        self.checkpoint = None
         self._count_tokens = MagicMock(return_value=42)
 
 
@@ -1,6 +1,12 @@
 from unittest.mock import MagicMock, patch
 
-from fellow.commands.search_files import SearchFilesInput, search_files
+from fellow.commands import ALL_COMMANDS, READ_ONLY_COMMANDS
+from fellow.commands.search_files import (
+    SearchFilesInput,
+    is_ignored,
+    parse_gitignore,
+    search_files,
+)
 
 
 def create_file(path, content):
@@ -70,3 +76,116 @@ def test_search_files_handles_file_read_exception(tmp_path):
     assert result.startswith("[ERROR] Could not read")
     assert "Mocked read error" in result
     assert "test.txt" in result
+
+
+def test_search_files_is_registered_read_only():
+    assert ALL_COMMANDS["search_files"] == (SearchFilesInput, search_files)
+    assert "search_files" in READ_ONLY_COMMANDS
+
+
+def test_search_skips_binaries_and_dependency_directories(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    create_file(tmp_path / "src" / "main.py", "needle = 1\n")
+    create_file(tmp_path / ".git" / "config", "needle\n")
+    create_file(tmp_path / "node_modules" / "lib" / "index.js", "needle\n")
+    create_file(tmp_path / ".venv" / "site.py", "needle\n")
+    (tmp_path / "image.bin").write_bytes(b"\x89PNG\0needle")
+
+    result = search_files(SearchFilesInput(directory=".", search="needle"), {})
+    assert result == "src/main.py:1: needle = 1"
+
+
+def test_search_respects_gitignore(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    create_file(tmp_path / ".gitignore", "build/\n*.log\n!keep.log\n/local.txt\n")
+    create_file(tmp_path / "build" / "out.py", "needle\n")
+    create_file(tmp_path / "debug.log", "needle\n")
+    create_file(tmp_path / "keep.log", "needle\n")
+    create_file(tmp_path / "local.txt", "needle\n")
+    create_file(tmp_path / "src" / "local.txt", "needle\n")
+    create_file(tmp_path / "src" / ".gitignore", "generated_*.py\n")
+    create_file(tmp_path / "src" / "generated_api.py", "needle\n")
+    create_file(tmp_path / "src" / "pkg" / "api.py", "needle\n")
+
+    result = search_files(SearchFilesInput(directory=".", search="needle"), {})
+    assert result.splitlines() == [
+        "keep.log:1: needle",
+        "src/local.txt:1: needle",
+        "src/pkg/api.py:1: needle",
+    ]
+
+    # the .gitignore of the working directory also applies when searching a subdirectory
+    create_file(tmp_path / "src" / "debug.log", "needle\n")
+    result = search_files(SearchFilesInput(directory="src", search="needle"), {})
+    assert result.splitlines() == [
+        "src/local.txt:1: needle",
+        "src/pkg/api.py:1: needle",
+    ]
+
+
+def test_parse_gitignore_globs():
+    rules = parse_gitignore("/repo", "# comment\ndocs/**/*.md\n[ab].txt\n")
+    assert is_ignored(rules, "/repo/docs/a/b/readme.md", False)
+    assert is_ignored(rules, "/repo/docs/readme.md", False)
+    assert not is_ignored(rules, "/repo/src/docs/readme.md", False)
+    assert is_ignored(rules, "/repo/src/a.txt", False)
+    assert not is_ignored(rules, "/repo/src/c.txt", False)
+
+
+def test_search_regex_and_case_sensitive(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    create_file(tmp_path / "a.py", "def Foo():\n    foo()\n\ndef bar(): foo(); foo()\n")
+
+    result = search_files(
+        SearchFilesInput(directory=".", search=r"^def \w+\(", regex=True), {}
+    )
+    assert result.splitlines() == [
+        "a.py:1: def Foo():",
+        "a.py:4: def bar(): foo(); foo()",
+    ]
+
+    result = search_files(
+        SearchFilesInput(directory=".", search="Foo", case_sensitive=True), {}
+    )
+    assert result.splitlines() == ["a.py:1: def Foo():"]
+
+    result = search_files(SearchFilesInput(directory=".", search="(", regex=True), {})
+    assert result.startswith("[ERROR] Invalid regular expression")
+
+
+def test_search_case_insensitive_non_ascii(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    create_file(tmp_path / "a.txt", "ÄPFEL\nBirnen\nDie Größe\nSTRASSE\n")
+
+    def search(**kwargs):
+        return search_files(SearchFilesInput(directory=".", **kwargs), {}).splitlines()
+
+    assert search(search="äpfel") == ["a.txt:1: ÄPFEL"]
+    assert search(search="GRÖ") == ["a.txt:3: Die Größe"]
+    assert search(search="straße") == ["a.txt:4: STRASSE"]
+    assert search(search=r"GRÖ\w+", regex=True) == ["a.txt:3: Die Größe"]
+    assert search(search="äpfel", case_sensitive=True)[0].startswith(
+        "[INFO] No matches found"
+    )
+
+
+def test_search_max_results(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for i in range(600):
+        create_file(tmp_path / f"file_{i:03}.txt", "needle\nneedle\n")
+
+    result = search_files(
+        SearchFilesInput(directory=".", search="needle", max_results=3), {}
+    ).splitlines()
+    assert result == [
+        "file_000.txt:1: needle",
+        "file_000.txt:2: needle",
+        "file_001.txt:1: needle",
+        "[INFO] Showing the first 3 matches, narrow the search to see more.",
+    ]
+
+    result = search_files(
+        SearchFilesInput(directory=".", search="needle", max_results=1200), {}
+    ).splitlines()
+    assert len(result) == 1200
+    assert result[-1] == "file_599.txt:2: needle"
@@ -39,7 +39,8 @@ def test_summary_output(tmp_path):
     summarize_module.load_client = lambda **kwargs: mock_client
 
     args = SummarizeFileInput(filepath=str(file_path))
-    context = MagicMock(ai_client=MagicMock(model="gpt-4"))
+    # a client without `summarize` falls back to a separate chat client
+    context = {"ai_client": MagicMock(spec=["chat"]), "config": MagicMock()}
     result = summarize_file(args, context)
 
     assert result == "[OK] Summary:\nThis is a summary."
@@ -77,10 +78,30 @@ def test_max_chars_truncates(tmp_path):
     summarize_module.load_client = lambda **kwargs: mock_client
 
     args = SummarizeFileInput(filepath=str(file_path), max_chars=100)
-    context = MagicMock(ai_client=MagicMock(model="gpt-4"))
+    # a client without `summarize` falls back to a separate chat client
+    context = {"ai_client": MagicMock(spec=["chat"]), "config": MagicMock()}
     result = summarize_file(args, context)
 
     assert "[OK] Summary:\nZusammenfassung für 100 Zeichen." == result
     assert (
         len(mock_client.chat.call_args.kwargs["message"]) < 200
     )  # sollte etwa 100 + prompt sein
+
+
+def test_summary_uses_client_summary_model(tmp_path):
+    file_path = tmp_path / "example.txt"
+    file_path.write_text("This is a test")
+
+    ai_client = MagicMock()
+    ai_client.summarize.return_value = " A cheap summary. "
+    summarize_module.load_client = MagicMock()
+
+    args = SummarizeFileInput(filepath=str(file_path))
+    result = summarize_file(args, {"ai_client": ai_client, "config": MagicMock()})
+
+    assert result == "[OK] Summary:\nA cheap summary."
+    ai_client.summarize.assert_called_once_with(
+        "This is a test", instruction="Summarize the following file content."
+    )
+    ai_client.chat.assert_not_called()
+    summarize_module.load_client.assert_not_called()
@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+from fellow.commands.view_output import ViewOutputInput, view_output
+
+
+def make_context(tmp_path):
+    config = SimpleNamespace(output_compaction=SimpleNamespace(dirpath=tmp_path))
+    return {"ai_client": None, "config": config}
+
+
+def test_view_output_range(tmp_path):
+    (tmp_path / "call_1.txt").write_text("a\nb\nc\nd\n")
+    result = view_output(
+        ViewOutputInput(output_id="call_1", from_line=2, to_line=3),
+        make_context(tmp_path),
+    )
+    assert result == "[INFO] Lines 2-3 of 4:\nb\nc"
+
+
+def test_view_output_is_limited_to_200_lines(tmp_path):
+    (tmp_path / "call_1.txt").write_text("\n".join(str(i) for i in range(1, 501)))
+    result = view_output(
+        ViewOutputInput(output_id="call_1", from_line=101), make_context(tmp_path)
+    )
+    lines = result.splitlines()
+    assert lines[0] == "[INFO] Lines 101-300 of 500:"
+    assert lines[1] == "101"
+    assert lines[-1] == "300"
+
+
+def test_view_output_not_found(tmp_path):
+    result = view_output(ViewOutputInput(output_id="missing"), make_context(tmp_path))
+    assert result == "[ERROR] Output not found: missing"
+
+
+def test_view_output_out_of_range(tmp_path):
+    (tmp_path / "call_1.txt").write_text("a\nb")
+    result = view_output(
+        ViewOutputInput(output_id="call_1", from_line=5), make_context(tmp_path)
+    )
+    assert result == "[INFO] No lines to display, the output has 2 lines."
+
+
+def test_view_output_empty(tmp_path):
+    (tmp_path / "call_1.txt").write_text("")
+    result = view_output(ViewOutputInput(output_id="call_1"), make_context(tmp_path))
+    assert result == "[INFO] The output is empty."
@@ -0,0 +1,135 @@
+import asyncio
+import importlib.resources as pkg_resources
+from typing import Any, Dict, List, Optional
+
+import pytest
+import yaml
+
+import fellow
+import fellow.main
+from fellow.clients.Client import (
+    ChatResult,
+    Client,
+    ClientConfig,
+    Function,
+    FunctionResult,
+)
+from fellow.clients.MemoryCheckpoint import MemoryCheckpoint
+from fellow.commands.Command import Command
+from fellow.main import run_task
+from fellow.utils.load_config import Config
+
+
+class ChatOnlyConfig(ClientConfig):
+    pass
+
+
+class ChatOnlyClient(Client[ChatOnlyConfig]):
+    """
+    A custom client as generated by `fellow init-client`: it implements `chat`, but not `achat`.
+    """
+
+    config_class = ChatOnlyConfig
+
+    def __init__(self, answers: List[str]):
+        self.answers = answers
+        self.calls: List[Optional[str]] = []
+        self.stored: List[str] = []
+
+    @classmethod
+    def create(cls, config: ChatOnlyConfig) -> "ChatOnlyClient":
+        return cls([])
+
+    def chat(
+        self,
+        functions: List[Function],
+        message: str = "",
+        function_result: Optional[FunctionResult] = None,
+        function_results: Optional[List[FunctionResult]] = None,
+    ) -> ChatResult:
+        self.calls.append(message)
+        return {
+            "message": self.answers.pop(0),
+            "function_name": None,
+            "function_args": None,
+        }
+
+    def store_memory(self, filename: str) -> None:
+        self.stored.append(filename)
+
+    def set_plan(self, plan: str) -> None:
+        pass
+
+    def get_function_schema(self, command: Command) -> Function:
+        return {
+            "name": getattr(command.command_handler, "__name__"),
+            "description": command.command_handler.__doc__ or "",
+            "parameters": command.input_type.model_json_schema(),
+        }
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with (
+        pkg_resources.files(fellow).joinpath("default_fellow_config.yml").open("r") as f
+    ):
+        config_dict = yaml.safe_load(f)
+    config_dict["task"] = "Say hello."
+    config_dict["planning"]["active"] = False
+    config_dict["commands"] = {}
+    return Config(**config_dict)
+
+
+def test_run_task_with_client_that_only_implements_chat(config, monkeypatch):
+    client = ChatOnlyClient(["Thinking.", "Hello. END"])
+    monkeypatch.setattr(fellow.main, "load_client", lambda **kwargs: client)
+
+    asyncio.run(run_task(config))
+
+    assert client.answers == []
+    assert client.calls == [config.first_message, ""]
+    assert client.stored == [str(config.memory.filepath)]
+
+
+class CheckpointedClient(ChatOnlyClient):
+    """
+    A chat-only client that keeps no memory, but supports checkpoints and resuming.
+    """
+
+    def restore_memory(self, lists: Dict[str, List[Dict[str, Any]]]) -> None:
+        pass
+
+    def attach_checkpoint(self, checkpoint: MemoryCheckpoint) -> None:
+        self.checkpoint = checkpoint
+
+    def checkpoint_memory(self, compact: bool = False) -> None:
+        pass
+
+
+def test_resume_after_steps_limit_sends_no_request(config, monkeypatch):
+    config.steps_limit = 1
+    client = CheckpointedClient(["Thinking."])
+    monkeypatch.setattr(fellow.main, "load_client", lambda **kwargs: client)
+    asyncio.run(run_task(config))
+    assert client.calls == [config.first_message]
+
+    config.resume = True
+    resumed = CheckpointedClient([])
+    monkeypatch.setattr(fellow.main, "load_client", lambda **kwargs: resumed)
+    asyncio.run(run_task(config))
+
+    assert resumed.calls == []
+
+
+@pytest.mark.parametrize("export", [False, True])
+def test_memory_file_is_exported_on_request_with_checkpoint(
+    config, monkeypatch, export
+):
+    config.memory.export = export
+    client = CheckpointedClient(["Hello. END"])
+    monkeypatch.setattr(fellow.main, "load_client", lambda **kwargs: client)
+
+    asyncio.run(run_task(config))
+
+    assert client.stored == ([str(config.memory.filepath)] if export else [])
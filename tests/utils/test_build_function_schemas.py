@@ -0,0 +1,136 @@
+from typing import Optional
+from unittest.mock import MagicMock
+
+from pydantic import Field
+
+from fellow.commands import ViewFileInput, view_file
+from fellow.commands.Command import Command, CommandContext, CommandInput
+from fellow.utils.build_function_schemas import (
+    build_function_schemas,
+    compact_function_schema,
+    count_schema_tokens,
+    function_schema_report,
+)
+
+
+class NestedInput(CommandInput):
+    title: str = Field(..., description="A property that is literally called title.")
+    tags: Optional[list[str]] = Field(
+        None,
+        description="""
+            Optional tags,
+            one per entry.
+        """,
+    )
+
+
+def nested(args: NestedInput, context: CommandContext) -> str:
+    """
+    Does something
+
+        with a verbose docstring.
+    """
+    return ""
+
+
+def make_client():
+    client = MagicMock(spec=["get_function_schema"])
+    client.get_function_schema.side_effect = lambda command: {
+        "name": command.command_handler.__name__,
+        "description": command.command_handler.__doc__,
+        "parameters": command.input_type.model_json_schema(),
+    }
+    return client
+
+
+def test_schemas_are_built_once_per_command():
+    client = make_client()
+    command = Command(ViewFileInput, view_file, [])
+    first = build_function_schemas(client, [command])
+    second = build_function_schemas(client, [Command(ViewFileInput, view_file, [])])
+    assert first == second
+    assert first[0] is second[0]
+    assert client.get_function_schema.call_count == 1
+
+
+def test_compact_function_schema():
+    schema = {
+        "name": "nested",
+        "description": nested.__doc__,
+        "parameters": NestedInput.model_json_schema(),
+    }
+    assert compact_function_schema(schema) == {
+        "name": "nested",
+        "description": "Does something with a verbose docstring.",
+        "parameters": {
+            "properties": {
+                "title": {
+                    "description": "A property that is literally called title.",
+                    "type": "string",
+                },
+                "tags": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Optional tags, one per entry.",
+                },
+            },
+            "required": ["title"],
+            "type": "object",
+        },
+    }
+
+
+def test_compact_keeps_real_unions():
+    schema = {
+        "name": "f",
+        "description": "f",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "value": {
+                    "anyOf": [{"type": "string"}, {"type": "integer"}],
+                    "default": 1,
+                    "title": "Value",
+                }
+            },
+        },
+    }
+    assert compact_function_schema(schema)["parameters"]["properties"]["value"] == {
+        "anyOf": [{"type": "string"}, {"type": "integer"}],
+        "default": 1,
+    }
+
+
+def test_compact_schemas_are_cached_separately():
+    client = make_client()
+    command = Command(NestedInput, nested, [])
+    full = build_function_schemas(client, [command])[0]
+    compacted = build_function_schemas(client, [command], compact=True)[0]
+    assert "title" in full["parameters"]
+    assert "title" not in compacted["parameters"]
+    assert client.get_function_schema.call_count == 1
+
+
+def test_count_schema_tokens_uses_token_counter():
+    client = MagicMock()
+    client.token_counter.count_functions.return_value = 42
+    assert count_schema_tokens(client, [{"name": "f"}]) == 42
+    client.token_counter.count_functions.assert_called_once_with([{"name": "f"}])
+
+
+def test_count_schema_tokens_with_plain_token_counter():
+    client = MagicMock()
+    client.token_counter = MagicMock(spec=["count"])
+    client.token_counter.count.return_value = 42
+    assert count_schema_tokens(client, [{"name": "f"}]) == 42
+
+
+def test_count_schema_tokens_without_token_counter():
+    client = MagicMock(spec=["get_function_schema"])
+    assert count_schema_tokens(client, [{"name": "abcdef"}]) == 4  # 17 characters
+
+
+def test_function_schema_report():
+    report = function_schema_report(make_client(), [Command(NestedInput, nested, [])])
+    assert report["count"] == 1
+    assert 0 < report["compact_tokens"] < report["tokens"]
@@ -0,0 +1,196 @@
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from fellow.commands.view_output import ViewOutputInput, view_output
+from fellow.utils.compact_output import (
+    compact_output,
+    compact_results,
+    dedup_lines,
+    read_output,
+)
+
+
+def count(text: str) -> int:
+    return len(text) // 4
+
+
+def make_config(tmp_path: Path, max_tokens: int = 50, commands=None):
+    return SimpleNamespace(
+        output_compaction=SimpleNamespace(
+            active=True, max_tokens=max_tokens, dirpath=tmp_path / "outputs"
+        ),
+        commands=commands or {},
+    )
+
+
+def numbered(n: int) -> str:
+    return "\n".join(f"line {i:04d}" for i in range(1, n + 1))
+
+
+def test_dedup_lines_collapses_runs():
+    lines = ["a", "b", "b", "b", "b", "c", "c"]
+    assert dedup_lines(lines) == [
+        (1, "a"),
+        (2, "b"),
+        (3, "[... previous line repeated 3 more times]"),
+        (6, "c"),
+        (7, "c"),
+    ]
+
+
+def test_short_output_is_unchanged():
+    assert compact_output("hello", 10, count) == ("hello", False)
+
+
+def test_dedup_alone_can_fit_the_budget():
+    output = "\n".join(["warning: deprecated"] * 100)
+    compacted, truncated = compact_output(output, 20, count)
+    assert not truncated
+    assert compacted == (
+        "warning: deprecated\n[... previous line repeated 99 more times]"
+    )
+
+
+def test_dedup_references_the_stored_output():
+    output = "\n".join(["warning: deprecated"] * 100)
+    compacted, truncated = compact_output(output, 60, count, "call_1")
+    assert not truncated
+    assert compacted.startswith(
+        "warning: deprecated\n[... previous line repeated 99 more times]\n"
+    )
+    assert 'view_output(output_id="call_1")' in compacted
+
+
+def test_head_and_tail_are_kept():
+    compacted, truncated = compact_output(numbered(1000), 100, count, "call_1")
+    assert truncated
+    assert count(compacted) <= 150
+    lines = compacted.splitlines()
+    assert lines[0] == "line 0001"
+    assert lines[-1] == "line 1000"
+    marker = next(line for line in lines if line.startswith("[... lines"))
+    head = lines[: lines.index(marker)]
+    tail = lines[lines.index(marker) + 1 :]
+    assert len(tail) > len(head)
+    first_omitted = len(head) + 1
+    last_omitted = 1000 - len(tail)
+    assert marker.startswith(f"[... lines {first_omitted}-{last_omitted} omitted")
+    assert f'view_output(output_id="call_1", from_line={first_omitted}' in marker
+
+
+def test_single_huge_line_is_split_into_pages():
+    output = "".join(
+        f"{i:04d}" * 125 for i in range(1, 21)
+    )  # 20 parts of 500 characters
+    compacted, truncated = compact_output(output, 1000, count, "call_1")
+    assert truncated
+    lines = compacted.splitlines()
+    assert lines[:2] == ["0001" * 125, "0002" * 125]
+    assert lines[2].startswith(
+        "[... lines 3-15 omitted (~1628 tokens). The full output (20 lines, lines over 500 "
+        'characters split) is stored as "call_1", page through it with '
+        'view_output(output_id="call_1", from_line=3'
+    )
+    assert lines[3:] == [f"{i:04d}" * 125 for i in range(16, 21)]
+
+
+def test_line_over_the_head_budget_is_cut():
+    output = "".join(f"{i:05d}" for i in range(2000))
+    compacted, truncated = compact_output(output, 100, count)
+    assert truncated
+    assert compacted.startswith(output[:100])
+    assert "[... lines 1-20 omitted" in compacted
+    assert "Request a smaller range" in compacted
+
+
+def test_compact_results_spills_full_output(tmp_path):
+    config = make_config(tmp_path)
+    output = numbered(500)
+    results = compact_results(
+        [{"name": "run_pytest", "output": output, "call_id": "call/1"}],
+        3,
+        config,
+        MagicMock(spec=[]),
+    )
+    assert 'output_id="call_1"' in results[0]["output"]
+    assert results[0]["call_id"] == "call/1"
+    assert (tmp_path / "outputs" / "call_1.txt").read_text() == output
+    assert read_output(config, "call_1") == output.splitlines()
+
+
+def test_compact_results_spills_deduplicated_output(tmp_path):
+    config = make_config(tmp_path)
+    output = "\n".join(["warning: deprecated"] * 100)
+    results = compact_results(
+        [{"name": "run_pytest", "output": output, "call_id": "call_1"}],
+        3,
+        config,
+        MagicMock(spec=[]),
+    )
+    assert "previous line repeated 99 more times" in results[0]["output"]
+    assert 'output_id="call_1"' in results[0]["output"]
+    assert (tmp_path / "outputs" / "call_1.txt").read_text() == output
+
+
+def test_compact_results_uses_step_ids_without_call_id(tmp_path):
+    config = make_config(tmp_path)
+    compact_results(
+        [{"name": "view_file", "output": numbered(500)}], 3, config, MagicMock(spec=[])
+    )
+    assert (tmp_path / "outputs" / "step3_0.txt").exists()
+
+
+def test_compact_results_uses_command_budget(tmp_path):
+    config = make_config(
+        tmp_path, commands={"view_file": SimpleNamespace(max_output_tokens=10_000)}
+    )
+    output = numbered(500)
+    results = compact_results(
+        [{"name": "view_file", "output": output}], 0, config, MagicMock(spec=[])
+    )
+    assert results[0]["output"] == output
+
+
+def test_compact_results_does_not_spill_view_output(tmp_path):
+    config = make_config(tmp_path)
+    results = compact_results(
+        [{"name": "view_output", "output": numbered(500)}],
+        0,
+        config,
+        MagicMock(spec=[]),
+    )
+    assert "Request a smaller range" in results[0]["output"]
+    assert not (tmp_path / "outputs").exists()
+
+
+def test_compact_results_inactive(tmp_path):
+    config = make_config(tmp_path)
+    config.output_compaction.active = False
+    results = [{"name": "view_file", "output": numbered(500)}]
+    assert compact_results(results, 0, config, MagicMock(spec=[])) is results
+
+
+def test_spilled_long_line_can_be_paged(tmp_path):
+    config = make_config(tmp_path, max_tokens=1000)
+    output = "".join(f"{i:04d}" * 125 for i in range(1, 21))
+    results = compact_results(
+        [{"name": "run_command", "output": output, "call_id": "call_1"}],
+        0,
+        config,
+        MagicMock(spec=[]),
+    )
+    assert "from_line=3" in results[0]["output"]
+    assert (tmp_path / "outputs" / "call_1.txt").read_text() == output
+
+    page = view_output(
+        ViewOutputInput(output_id="call_1", from_line=3, to_line=4),
+        {"ai_client": None, "config": config},
+    )
+    assert page == "[INFO] Lines 3-4 of 20:\n" + "0003" * 125 + "\n" + "0004" * 125
+
+
+def test_read_output_rejects_paths(tmp_path):
+    config = make_config(tmp_path)
+    assert read_output(config, "../secrets") is None
+    assert read_output(config, "missing") is None
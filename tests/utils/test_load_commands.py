@@ -128,10 +128,11 @@ def test_load_commands_with_custom_command(tmp_path: Path):
     commands = load_commands(config)
 
     # Assert
-    assert len(commands) == 3
+    assert len(commands) == 4
     assert "echo" in commands
     assert "view_file" in commands
     assert "make_plan" in commands
+    assert "view_output" in commands
     echo_command = commands["echo"]
 
     assert isinstance(echo_command, Command)
@@ -142,6 +143,10 @@ def test_load_commands_with_custom_command(tmp_path: Path):
     result = echo_command.run('{"text": "Hello"}', MagicMock())
     assert result == "Hello"
 
+    assert not echo_command.read_only
+    assert commands["view_file"].read_only
+    assert not commands["make_plan"].read_only
+
 
 def test_load_policy_from_file_success(tmp_path: Path):
     file_path = tmp_path / "test_policy.py"
@@ -255,6 +260,7 @@ def test_load_commands_with_custom_policy(tmp_path):
         custom_policies_paths=[str(policies_dir)],
         custom_commands_paths=[str(commands_dir)],
         planning=SimpleNamespace(active=False),
+        output_compaction=SimpleNamespace(active=False, dirpath=None),
         commands={
             "noop": SimpleNamespace(
                 policies=[
@@ -359,6 +365,7 @@ def test_load_commands_edge_cases(tmp_path, capsys):
             str(tmp_path / "not_existing"),
         ],  # non-existing
         planning=SimpleNamespace(active=False),
+        output_compaction=SimpleNamespace(active=False, dirpath=None),
         commands={
             "view_file": SimpleNamespace(
                 policies=[SimpleNamespace(name="block_all", config=invalid_config)]
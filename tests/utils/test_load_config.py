@@ -14,6 +14,7 @@ from fellow.utils.load_config import (
     LogConfig,
     MemoryConfig,
     MetadataConfig,
+    MetricsConfig,
     load_config,
 )
 
@@ -198,3 +199,15 @@ def test_metadata_config_validation():
     with pytest.raises(ValueError) as e:
         MetadataConfig(log=True, filepath=Path("memory.yml"))  # Wrong extension
     assert "Metadata filepath must end with '.json'" in str(e.value)
+
+
+def test_metrics_config_validation():
+    MetricsConfig(log=False, filepath=None)  # Should not raise an error
+
+    with pytest.raises(ValueError) as e:
+        MetricsConfig(log=True, filepath=None)
+    assert "Metrics log is active but no filepath provided" in str(e.value)
+
+    with pytest.raises(ValueError) as e:
+        MetricsConfig(log=True, filepath=Path("metrics.json"))  # Wrong extension
+    assert "Metrics filepath must end with '.jsonl'" in str(e.value)
@@ -0,0 +1,115 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from fellow.utils.log_metrics import (
+    clear_metrics,
+    log_metrics,
+    percentile,
+    step_metrics,
+    summarize_metrics,
+)
+
+
+def test_step_metrics_uses_client_usage():
+    chat_result = {
+        "message": None,
+        "function_name": "view_file",
+        "function_args": "{}",
+        "usage": {
+            "model": "gpt-4o",
+            "latency": 1.5,
+            "time_to_first_token": 0.2,
+            "prompt_tokens": 100,
+            "estimated_prompt_tokens": 98,
+            "completion_tokens": 10,
+            "cached_tokens": 64,
+        },
+    }
+    results = [
+        {"name": "view_file", "output": "hello", "call_id": "1", "wall_time": 0.01}
+    ]
+
+    assert step_metrics(3, chat_result, 2.0, results) == {
+        "type": "step",
+        "step": 3,
+        "model": "gpt-4o",
+        "latency": 1.5,
+        "time_to_first_token": 0.2,
+        "prompt_tokens": 100,
+        "estimated_prompt_tokens": 98,
+        "completion_tokens": 10,
+        "cached_tokens": 64,
+        "commands": [{"name": "view_file", "wall_time": 0.01, "output_size": 5}],
+    }
+
+
+def test_step_metrics_without_client_usage():
+    chat_result = {"message": "END", "function_name": None, "function_args": None}
+    record = step_metrics(0, chat_result, 2.0, [{"name": "x", "output": "abc"}])
+    assert record["latency"] == 2.0
+    assert record["model"] is None
+    assert record["prompt_tokens"] is None
+    assert record["commands"] == [{"name": "x", "wall_time": None, "output_size": 3}]
+
+
+def test_percentile():
+    assert percentile([], 50) is None
+    assert percentile([3.0], 95) == 3.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+    assert percentile(list(range(1, 101)), 95) == pytest.approx(95.05)
+
+
+def test_summarize_metrics():
+    records = [
+        {
+            "type": "step",
+            "step": i,
+            "model": "gpt-4o",
+            "latency": float(i + 1),
+            "time_to_first_token": None,
+            "prompt_tokens": 100,
+            "estimated_prompt_tokens": 96 + i * 2 if i else None,
+            "completion_tokens": None,
+            "cached_tokens": None,
+            "commands": [{"name": "x", "wall_time": 0.5, "output_size": 10}],
+        }
+        for i in range(4)
+    ]
+    summary = summarize_metrics(records)
+    assert summary["latency"] == {"count": 4, "total": 10.0, "p50": 2.5, "p95": 3.85}
+    assert summary["prompt_tokens"]["total"] == 400
+    assert summary["prompt_token_error"] == {
+        "count": 3,
+        "total": 0,
+        "p50": 0,
+        "p95": pytest.approx(1.8),
+    }
+    assert summary["command_wall_time"]["p95"] == 0.5
+    assert summary["command_output_size"]["count"] == 4
+    assert "time_to_first_token" not in summary
+    assert "completion_tokens" not in summary
+
+
+def test_log_metrics_writes_jsonl(tmp_path):
+    filepath = tmp_path / "runs" / "metrics.jsonl"
+    config = MagicMock(metrics=MagicMock(log=True, filepath=filepath))
+
+    clear_metrics(config)
+    log_metrics(config, {"type": "step", "step": 0})
+    log_metrics(config, {"type": "summary", "steps": 1})
+
+    lines = filepath.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"type": "step", "step": 0},
+        {"type": "summary", "steps": 1},
+    ]
+
+
+def test_log_metrics_disabled(tmp_path):
+    filepath = tmp_path / "metrics.jsonl"
+    config = MagicMock(metrics=MagicMock(log=False, filepath=filepath))
+    clear_metrics(config)
+    log_metrics(config, {"type": "step"})
+    assert not filepath.exists()
@@ -24,6 +24,8 @@ def test_str2bool_false_values():
         (["--log.filepath", "test.md"], {"log.filepath": "test.md"}),
         (["--log.active", "true"], {"log.active": True}),
         (["--log.active", "false"], {"log.active": False}),
+        (["--function_schemas.compact", "true"], {"function_schemas.compact": True}),
+        (["--memory.export", "true"], {"memory.export": True}),
         (
             ["--ai_client.config", '{"memory_max_tokens": "1234"}'],
             {"ai_client.config": {"memory_max_tokens": "1234"}},
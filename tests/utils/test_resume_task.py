@@ -0,0 +1,95 @@
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from fellow.clients.MemoryCheckpoint import MemoryCheckpoint
+from fellow.utils.resume_task import (
+    CONTINUE_MESSAGE,
+    INTERRUPTED_OUTPUT,
+    load_resume_state,
+    resume_inputs,
+)
+
+
+def make_config(tmp_path: Path, task=None):
+    return SimpleNamespace(
+        task=task,
+        memory=SimpleNamespace(
+            log=True, checkpoint=True, checkpoint_path=tmp_path / "memory.jsonl"
+        ),
+        metadata=SimpleNamespace(filepath=tmp_path / "metadata.json"),
+    )
+
+
+def tool_call(call_id, name):
+    return {
+        "id": call_id,
+        "type": "function",
+        "function": {"name": name, "arguments": "{}"},
+    }
+
+
+def test_load_resume_state_reads_task_from_metadata(tmp_path):
+    checkpoint = MemoryCheckpoint(tmp_path / "memory.jsonl")
+    checkpoint.sync_lists({"memory": [{"role": "user", "content": "Hi", "tokens": 1}]})
+    checkpoint.record_loop({"step": 3, "done": False, "pending": None})
+    checkpoint.close()
+    (tmp_path / "metadata.json").write_text(json.dumps({"task": "The task"}))
+    config = make_config(tmp_path)
+
+    state = load_resume_state(config)
+    assert config.task == "The task"
+    assert state["loop"]["step"] == 3
+    assert state["lists"]["memory"][0]["content"] == "Hi"
+
+
+def test_load_resume_state_without_checkpoint(tmp_path):
+    with pytest.raises(ValueError, match="No memory checkpoint"):
+        load_resume_state(make_config(tmp_path, task="The task"))
+
+
+def test_resume_inputs_uses_pending_input():
+    pending = {
+        "message": "",
+        "function_result": None,
+        "function_results": [{"name": "list_files", "output": "a.py"}],
+    }
+    state = {"lists": {}, "loop": {"step": 2, "done": False, "pending": pending}}
+    assert resume_inputs(state) == (2, "", None, pending["function_results"])
+
+
+def test_resume_inputs_answers_interrupted_tool_calls():
+    state = {
+        "lists": {
+            "memory": [
+                {
+                    "role": "assistant",
+                    "tool_calls": [
+                        tool_call("call_1", "run_python"),
+                        tool_call("call_2", "view_file"),
+                    ],
+                    "tokens": 10,
+                }
+            ]
+        },
+        "loop": {"step": 4, "done": False, "pending": None},
+    }
+    assert resume_inputs(state) == (
+        4,
+        "",
+        None,
+        [
+            {"name": "run_python", "output": INTERRUPTED_OUTPUT, "call_id": "call_1"},
+            {"name": "view_file", "output": INTERRUPTED_OUTPUT, "call_id": "call_2"},
+        ],
+    )
+
+
+def test_resume_inputs_continues_without_pending_input():
+    state = {
+        "lists": {"memory": [{"role": "assistant", "content": "Done?", "tokens": 2}]},
+        "loop": None,
+    }
+    assert resume_inputs(state) == (0, CONTINUE_MESSAGE, None, None)
@@ -0,0 +1,103 @@
+import threading
+import time
+from unittest.mock import ANY
+
+from fellow.commands.Command import Command, CommandContext, CommandInput
+from fellow.policies import RequireUserConfirmation
+from fellow.policies.RequireUserConfirmation import RequireUserConfirmationConfig
+from fellow.utils.run_commands import run_commands
+
+
+class SleepInput(CommandInput):
+    name: str
+
+
+def make_command(log, read_only=True, policies=None):
+    def sleep_command(args: SleepInput, context: CommandContext) -> str:
+        """Sleeps a bit."""
+        log.append(("start", args.name, threading.get_ident()))
+        time.sleep(0.05)
+        log.append(("end", args.name, threading.get_ident()))
+        return f"done {args.name}"
+
+    return Command(SleepInput, sleep_command, policies or [], read_only=read_only)
+
+
+def call(call_id, name, arg):
+    return {"id": call_id, "name": name, "arguments": f'{{"name": "{arg}"}}'}
+
+
+def test_results_are_returned_in_call_order():
+    log = []
+    commands = {"read": make_command(log)}
+    results = run_commands(
+        [call("1", "read", "a"), call("2", "read", "b"), call("3", "read", "c")],
+        commands,
+        {},
+        max_workers=4,
+    )
+    assert results == [
+        {"name": "read", "output": "done a", "call_id": "1", "wall_time": ANY},
+        {"name": "read", "output": "done b", "call_id": "2", "wall_time": ANY},
+        {"name": "read", "output": "done c", "call_id": "3", "wall_time": ANY},
+    ]
+    assert all(result["wall_time"] >= 0.05 for result in results)
+
+
+def test_read_only_commands_run_concurrently():
+    log = []
+    commands = {"read": make_command(log)}
+    run_commands(
+        [call("1", "read", "a"), call("2", "read", "b")], commands, {}, max_workers=4
+    )
+    # both commands started before the first one ended
+    assert [entry[0] for entry in log[:2]] == ["start", "start"]
+
+
+def test_writes_are_not_overlapping_with_reads():
+    log = []
+    commands = {"read": make_command(log), "write": make_command(log, read_only=False)}
+    run_commands(
+        [call("1", "read", "a"), call("2", "write", "b"), call("3", "read", "c")],
+        commands,
+        {},
+        max_workers=4,
+    )
+    assert [(entry[0], entry[1]) for entry in log] == [
+        ("start", "a"),
+        ("end", "a"),
+        ("start", "b"),
+        ("end", "b"),
+        ("start", "c"),
+        ("end", "c"),
+    ]
+
+
+def test_interactive_policies_disable_concurrency():
+    log = []
+    policy = RequireUserConfirmation(RequireUserConfirmationConfig())
+    command = make_command(log, policies=[policy])
+    assert not command.parallel_safe
+    assert make_command(log).parallel_safe
+    assert not make_command(log, read_only=False).parallel_safe
+
+
+def test_single_worker_runs_sequentially():
+    log = []
+    commands = {"read": make_command(log)}
+    run_commands(
+        [call("1", "read", "a"), call("2", "read", "b")], commands, {}, max_workers=1
+    )
+    assert [entry[0] for entry in log] == ["start", "end", "start", "end"]
+
+
+def test_unknown_function():
+    results = run_commands([call(None, "missing", "a")], {}, {}, max_workers=4)
+    assert results == [
+        {
+            "name": "missing",
+            "output": "[ERROR] Unknown function: missing",
+            "call_id": None,
+            "wall_time": ANY,
+        }
+    ]